@@ -1,30 +1,143 @@
 from fastapi import FastAPI, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List
-import shutil
 import os
-from modules.scanner import scan_file 
+import tempfile
+import time
+from modules.admission import (
+    MAX_UPLOAD_BYTES,
+    SCAN_TIMEOUT_SECONDS,
+    AdmissionController,
+    AdmissionRejected,
+)
+from modules.findings import FindingsTable, iter_encoded
+from modules.memo import memo_stats
+from modules.metrics import ScanMetrics
+from modules.scanner import DEFAULT_MODEL_PATH, load_classifier, scan_file_into
 
 app = FastAPI()
 
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "sarif": "application/sarif+json",
+}
+
+service_metrics = ScanMetrics()
+admission = AdmissionController()
+
+# Compiled (.npz) models load in milliseconds and need only NumPy, so the
+# classifier is loaded once here rather than per request.
+classifier = load_classifier() if os.path.exists(DEFAULT_MODEL_PATH) else None
+
+# Multipart boundaries and part headers around the file itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request, call_next):
+    # Starlette buffers the whole multipart body before the endpoint runs, so
+    # the upload limit is enforced from Content-Length, before any body is read.
+    if request.url.path == "/scan-file/" and request.method == "POST":
+        length = request.headers.get("content-length")
+        if length is None or not length.isdigit():
+            return JSONResponse(status_code=411, content={"detail": "Content-Length is required."})
+        if int(length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=413, content={"detail": f"Uploads are limited to {MAX_UPLOAD_BYTES} bytes."}
+            )
+    return await call_next(request)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def upload_suffix(filename: str) -> str:
+    """
+    The part of a client-supplied filename kept on the temporary copy: the
+    extension, or the whole name for dotfiles such as .env, which the file
+    classifier and the key/value pass recognise by name. Never a directory.
+    """
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    return name if name.startswith(".") else os.path.splitext(name)[1]
+
+
+def copy_upload(source, destination, max_bytes: int) -> bool:
+    """Copy at most `max_bytes` of an upload; returns whether it was cut short."""
+    remaining = max_bytes
+    while remaining > 0:
+        chunk = source.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            return False
+        destination.write(chunk)
+        remaining -= len(chunk)
+    return bool(source.read(1))
+
+
 @app.post("/scan-file/")
-async def create_upload_file(file: UploadFile = File(...)):
+async def create_upload_file(file: UploadFile = File(...), score: bool = False, format: str = None):
     temp_dir = "temp_uploads"
     if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-        
-    temp_file_path = os.path.join(temp_dir, file.filename)
-    
+        os.makedirs(temp_dir, exist_ok=True)
+
+    temp_file_path = None
+    request_metrics = ScanMetrics()
+
+    # Scans past the byte or time budget return the findings made so far and are
+    # reported as partial, so one huge upload cannot hold a slot indefinitely.
     try:
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        findings = scan_file(temp_file_path)
-        
-        return {"filename": file.filename, "findings": findings}
+        async with admission.slot():
+            # A private file per request: concurrent uploads of the same name must
+            # not share (or delete) each other's copy, and the client's name never
+            # becomes a path.
+            fd, temp_file_path = tempfile.mkstemp(suffix=upload_suffix(file.filename), dir=temp_dir)
+            with os.fdopen(fd, "wb") as buffer:
+                if await run_in_threadpool(copy_upload, file.file, buffer, MAX_UPLOAD_BYTES):
+                    request_metrics.record_truncation("bytes")
+
+            table = FindingsTable()
+            await run_in_threadpool(
+                scan_file_into,
+                table,
+                temp_file_path,
+                metrics=request_metrics,
+                score=score,
+                classifier=classifier,
+                deadline=time.perf_counter() + SCAN_TIMEOUT_SECONDS,
+            )
+            table.rename_file(temp_file_path, file.filename)
+
+        truncated = sorted(request_metrics.truncated_scans)
+        if format in MEDIA_TYPES:
+            headers = {"X-Scan-Truncated": ",".join(truncated)} if truncated else None
+            return StreamingResponse(iter_encoded(table, format), media_type=MEDIA_TYPES[format], headers=headers)
+        return {
+            "filename": file.filename,
+            "partial": bool(truncated),
+            "truncated": truncated,
+            "findings": table.to_dicts(),
+        }
     finally:
-        if os.path.exists(temp_file_path):
+        service_metrics.merge(request_metrics)
+        if temp_file_path is not None and os.path.exists(temp_file_path):
             os.remove(temp_file_path)
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    report = ScanMetrics().merge(service_metrics)
+    for cache, stats in memo_stats().items():
+        report.record_cache(cache, stats["hits"], stats["misses"])
+    return PlainTextResponse(
+        report.to_prometheus() + admission.to_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the Secret Scanner API. Use the /docs endpoint to see the API documentation."}
\ No newline at end of file
+    return {"message": "Welcome to the Secret Scanner API. Use the /docs endpoint to see the API documentation."}
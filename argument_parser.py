@@ -27,6 +27,66 @@ def parse_arguments():
         default="f1_score",
         help="Target metric for optimization.",
     )
+    parser.add_argument(
+        "--dataset_path",
+        type=str,
+        default="secrets_dataset.csv",
+        help="Training CSV, or a directory of shards from generate_dataset.py --mode shards.",
+    )
+    parser.add_argument(
+        "--n_folds",
+        type=int,
+        default=1,
+        help="Stratified cross-validation folds per trial; 1 keeps the single 80/20 split.",
+    )
+    parser.add_argument(
+        "--n_jobs",
+        type=int,
+        default=-1,
+        help="Cores shared between parallel folds and estimators that support n_jobs (-1 = all).",
+    )
+    parser.add_argument(
+        "--search",
+        choices=["full", "halving"],
+        default="full",
+        help="'halving' scores trials on growing data subsamples and prunes the weak ones early.",
+    )
+    parser.add_argument(
+        "--min_fraction",
+        type=float,
+        default=0.1,
+        help="Data fraction of the first successive-halving rung.",
+    )
+    parser.add_argument(
+        "--reduction_factor",
+        type=int,
+        default=3,
+        help="Data growth between rungs; 1/reduction_factor of the trials are promoted.",
+    )
+    parser.add_argument(
+        "--time_weight",
+        type=float,
+        default=0.0,
+        help="Objective is loss + time_weight * fit seconds; 0 optimizes the loss alone.",
+    )
+    parser.add_argument(
+        "--objectives",
+        choices=["loss", "loss_throughput"],
+        default="loss",
+        help="'loss_throughput' also maximizes classifier predictions/sec and exports the Pareto front.",
+    )
+    parser.add_argument(
+        "--max_loss_regression",
+        type=float,
+        default=0.005,
+        help="With loss_throughput, ship the fastest Pareto trial within this loss of the best one.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Stop the study after this many seconds (e.g. a CI time budget).",
+    )
     parser.add_argument(
         "--output_dir",
         type=str,
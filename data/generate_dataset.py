@@ -4,12 +4,26 @@ import string
 import uuid
 import hashlib
 import base64
-import secrets
 import json
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 def generate_random_string(length, charset):
     return ''.join(random.choice(charset) for _ in range(length))
 
+# Seeded stand-ins for secrets.token_* and uuid.uuid4, so a seed fixes the dataset.
+def token_urlsafe(nbytes):
+    return base64.urlsafe_b64encode(random.randbytes(nbytes)).rstrip(b'=').decode('ascii')
+
+def token_hex(nbytes):
+    return random.randbytes(nbytes).hex()
+
+def random_uuid4():
+    return uuid.UUID(int=random.getrandbits(128), version=4)
+
 def generate_realistic_context():
     contexts = [
         'API_KEY = "{}"',
@@ -41,7 +55,7 @@ def generate_positives(count):
         "google_api_key": lambda: "AIza" + generate_random_string(35, alphanumeric_hyphen),
         "slack_token": lambda: f"xoxp-{generate_random_string(12, string.digits)}-{generate_random_string(13, string.digits)}-{generate_random_string(24, alphanumeric)}",
         "slack_webhook": lambda: f"xoxb-{generate_random_string(12, string.digits)}-{generate_random_string(24, alphanumeric)}",
-        "generic_high_entropy": lambda: secrets.token_urlsafe(random.randint(24, 48)),
+        "generic_high_entropy": lambda: token_urlsafe(random.randint(24, 48)),
         "hex_key_64": lambda: generate_random_string(64, hex_chars),
         "hex_key_32": lambda: generate_random_string(32, hex_chars),
         "jwt_token": lambda: '.'.join([
@@ -79,12 +93,12 @@ def generate_negatives(count):
     negatives = []
     
     generators = {
-        "uuid": lambda: str(uuid.uuid4()),
+        "uuid": lambda: str(random_uuid4()),
         "sha256_hash": lambda: hashlib.sha256(str(random.random()).encode()).hexdigest(),
         "md5_hash": lambda: hashlib.md5(str(random.random()).encode()).hexdigest(),
         "base64_string": lambda: base64.b64encode(str(random.random()).encode()).decode(),
-        "long_variable_name": lambda: '_'.join([secrets.token_hex(4) for _ in range(random.randint(4, 7))]),
-        "short_hex_string": lambda: secrets.token_hex(8),
+        "long_variable_name": lambda: '_'.join([token_hex(4) for _ in range(random.randint(4, 7))]),
+        "short_hex_string": lambda: token_hex(8),
         "commit_hash": lambda: generate_random_string(40, string.hexdigits.lower()),
         "short_commit_hash": lambda: generate_random_string(7, string.hexdigits.lower()),
         "file_checksum": lambda: f"sha256:{generate_random_string(64, string.hexdigits.lower())}",
@@ -144,7 +158,361 @@ def add_edge_cases(count):
     
     return edge_cases[:count]
 
-if __name__ == "__main__":
+CORPUS_CHARSETS = {
+    "upper_digits": string.ascii_uppercase + string.digits,
+    "alnum": string.ascii_letters + string.digits,
+    "alnum_hyphen": string.ascii_letters + string.digits + "-_",
+    "base64": string.ascii_letters + string.digits + "+/",
+    "digits": string.digits,
+    "hex": string.hexdigits.lower()[:16],
+}
+
+# Each planted secret is a sequence of (literal prefix, random length, charset)
+# segments. Every format is matched whole by its rule in modules/scanner.py
+# (generic high-entropy values use the URL-safe alphabet of `generic_key`), so
+# the manifest is exact ground truth.
+CORPUS_SECRET_FORMATS = {
+    "aws_access_key": [("AKIA", 16, "upper_digits")],
+    "github_token": [("ghp_", 36, "alnum")],
+    "google_api_key": [("AIza", 35, "alnum_hyphen")],
+    "slack_token": [("xoxb-", 12, "digits"), ("-", 13, "digits"), ("-", 24, "alnum")],
+    "generic_high_entropy": [("", 40, "alnum_hyphen")],
+    "hex_key_64": [("", 64, "hex")],
+}
+
+CORPUS_FILE_TYPES = {
+    # extension, filler line templates, whether the file is a single minified line
+    "py": (".py", [b"def {w}({w}):", b"    return {w} + {w}", b"# {w} {w} {w}", b"{w} = '{t}'"], False),
+    "js": (".js", [b"const {w} = require('{w}');", b"function {w}({w}) {{ return {w}; }}", b"// {w} {w}"], False),
+    "min.js": (".min.js", [b"var {w}=\"{t}\";", b"function {w}(e){{return e.{w}()}}", b"{w}.{w}({w});"], True),
+    "env": (".env", [b"{W}={t}", b"{W}={w}", b"# {w} {w}"], False),
+    "json": (".json", [b'  "{w}": "{t}",', b'  "{w}": {n},', b'  "{w}": "{w}",', b'  "{w}": ["{w}", {n}],'], False),
+    "yaml": (".yaml", [b"{w}: {t}", b"{w}: {n}", b"{w}: [{w}, {w}]", b"# {w} {w}"], False),
+    "txt": (".log", [b"{n} INFO {w} {w} {w} {t}", b"{n} DEBUG {w} {w}", b"{n} WARN {w}"], False),
+    "bin": (".bin", None, False),
+}
+
+# Whole-document formats: the filler lines form the body of one top-level
+# object, between this header and footer. Every JSON body line ends with a
+# comma, so the footer closes the object with a last member of its own.
+CORPUS_DOCUMENTS = {
+    "json": (b"{\n", b'  "_end": null\n}\n'),
+    "yaml": (b"---\n", b""),
+}
+
+SECRET_LINE_TEMPLATES = [
+    b'API_KEY = "{}"',
+    b'export const TOKEN = "{}";',
+    b'password: "{}"',
+    b'"Authorization": "Bearer {}"',
+    b'aws_secret_access_key = "{}"',
+    b"GITHUB_TOKEN={}",
+]
+
+# Secret lines for formats where the generic templates would not parse.
+FORMAT_SECRET_LINE_TEMPLATES = {
+    "env": [b"API_KEY={}", b'GITHUB_TOKEN="{}"', b"export AWS_SECRET_ACCESS_KEY={}"],
+    "json": [b'  "api_key": "{}",', b'  "password": "{}",', b'  "Authorization": "Bearer {}",'],
+    "yaml": [b'api_key: "{}"', b"password: {}", b"aws_secret_access_key: '{}'"],
+}
+
+
+def random_strings_numpy(rng, count: int, length: int, charset: str) -> list:
+    """`count` random strings of `length` chars drawn from `charset`, without a per-char Python loop."""
+    table = np.frombuffer(charset.encode("ascii"), dtype=np.uint8)
+    rows = table[rng.integers(0, len(table), size=(count, length))]
+    return [row.tobytes() for row in rows]
+
+
+def generate_secret_numpy(rng, secret_type: str) -> bytes:
+    parts = []
+    for prefix, length, charset in CORPUS_SECRET_FORMATS[secret_type]:
+        parts.append(prefix.encode("ascii"))
+        parts.append(random_strings_numpy(rng, 1, length, CORPUS_CHARSETS[charset])[0])
+    return b"".join(parts)
+
+
+def _filler_pool(rng, templates, pool_size: int = 512) -> list:
+    words = random_strings_numpy(rng, pool_size, 8, string.ascii_lowercase)
+    upper_words = random_strings_numpy(rng, pool_size, 12, string.ascii_uppercase + "_")
+    tokens = random_strings_numpy(rng, pool_size, 16, CORPUS_CHARSETS["alnum"])
+    numbers = rng.integers(0, 10**6, size=pool_size)
+    pool = []
+    for i in range(pool_size):
+        template = templates[i % len(templates)]
+        line = template
+        # Fill each placeholder independently so lines do not repeat a single word.
+        for j, placeholder in enumerate((b"{w}", b"{w}", b"{w}", b"{w}")):
+            line = line.replace(placeholder, words[(i * 7 + j) % pool_size], 1)
+        line = line.replace(b"{W}", upper_words[i]).replace(b"{t}", tokens[i])
+        line = line.replace(b"{n}", str(numbers[i]).encode("ascii"))
+        pool.append(line.replace(b"{{", b"{").replace(b"}}", b"}"))
+    return pool
+
+
+def generate_corpus_file(rng, file_type: str, size: int, secrets_per_file: float):
+    """Return (content, planted) where planted lists (type, value, byte offset) of each secret."""
+    _, templates, minified = CORPUS_FILE_TYPES[file_type]
+    header, footer = CORPUS_DOCUMENTS.get(file_type, (b"", b""))
+    if templates is None:
+        filler = rng.integers(0, 256, size=size, dtype=np.uint8).tobytes()
+        separator = b"\n"
+    else:
+        pool = _filler_pool(rng, templates)
+        separator = b"" if minified else b"\n"
+        mean_line = sum(len(line) for line in pool) / len(pool) + len(separator)
+        indices = rng.integers(0, len(pool), size=int(size / mean_line) + 1)
+        filler = separator.join(pool[i] for i in indices)[:size]
+        if header or footer:
+            # Documents must not end in a truncated line.
+            filler = filler[: filler.rfind(separator) + 1]
+
+    num_secrets = rng.poisson(secrets_per_file)
+    secret_types = list(CORPUS_SECRET_FORMATS)
+    cuts = np.sort(rng.integers(0, max(1, len(filler)), size=num_secrets))
+    pieces, planted = [], []
+    position = 0
+    offset = 0
+    for cut in cuts:
+        if separator:
+            newline = filler.find(separator, int(cut))
+            cut = len(filler) if newline == -1 else newline + 1
+        cut = max(int(cut), position)
+        pieces.append(filler[position:cut])
+        offset += cut - position
+        position = cut
+
+        secret_type = secret_types[rng.integers(0, len(secret_types))]
+        value = generate_secret_numpy(rng, secret_type)
+        line_templates = FORMAT_SECRET_LINE_TEMPLATES.get(file_type, SECRET_LINE_TEMPLATES)
+        template = line_templates[rng.integers(0, len(line_templates))]
+        prefix, suffix = template.split(b"{}")
+        if not separator:
+            prefix, suffix = b";var k=\"", b"\";"
+        snippet = prefix + value + suffix + separator
+        planted.append((secret_type, value.decode("ascii"), len(header) + offset + len(prefix)))
+        pieces.append(snippet)
+        offset += len(snippet)
+    pieces.append(filler[position:])
+    return header + b"".join(pieces) + footer, planted
+
+
+def _write_corpus_file(job):
+    index, seed_sequence, output_dir, relative_path, file_type, size, secrets_per_file = job
+    rng = np.random.default_rng(seed_sequence)
+    content, planted = generate_corpus_file(rng, file_type, size, secrets_per_file)
+    path = os.path.join(output_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return [
+        {
+            "file": relative_path,
+            "type": secret_type,
+            "value": value,
+            "offset": offset,
+            "line": content.count(b"\n", 0, offset) + 1,
+        }
+        for secret_type, value, offset in planted
+    ]
+
+
+def sample_file_sizes(rng, count: int, distribution: str, median_size: int, max_size: int):
+    if distribution == "fixed":
+        sizes = np.full(count, median_size)
+    elif distribution == "uniform":
+        sizes = rng.integers(1, 2 * median_size, size=count)
+    elif distribution == "lognormal":
+        sizes = rng.lognormal(mean=np.log(median_size), sigma=1.0, size=count)
+    else:
+        raise ValueError(f"Size distribution {distribution} is not supported.")
+    return np.clip(sizes, 1, max_size).astype(np.int64)
+
+
+def parse_file_type_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in CORPUS_FILE_TYPES:
+            raise ValueError(
+                f"File type {name} is not supported. Supported types are: {list(CORPUS_FILE_TYPES)}"
+            )
+        mix[name] = float(weight or 1.0)
+    return mix
+
+
+def generate_corpus(
+    output_dir: str,
+    num_files: int,
+    file_types: dict,
+    size_distribution: str = "lognormal",
+    median_size: int = 16 * 1024,
+    max_size: int = 64 * 1024 * 1024,
+    secrets_per_file: float = 0.5,
+    seed: int = 42,
+    workers: int = None,
+    fanout: int = 32,
+):
+    """
+    Write `num_files` synthetic files under `output_dir` plus a ground-truth
+    `manifest.jsonl` recording the type, value, byte offset and line of every
+    planted secret. Each file has its own seed spawned from `seed`, so the
+    corpus is identical whatever the number of workers.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(file_types)
+    weights = np.array([file_types[name] for name in names], dtype=np.float64)
+    chosen_types = rng.choice(len(names), size=num_files, p=weights / weights.sum())
+    sizes = sample_file_sizes(rng, num_files, size_distribution, median_size, max_size)
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_files)
+
+    jobs = []
+    for i in range(num_files):
+        file_type = names[chosen_types[i]]
+        extension = CORPUS_FILE_TYPES[file_type][0]
+        relative_path = os.path.join(
+            f"dir_{i % fanout:03d}", f"sub_{(i // fanout) % fanout:03d}", f"file_{i:07d}{extension}"
+        )
+        jobs.append((i, seed_sequences[i], output_dir, relative_path, file_type, int(sizes[i]), secrets_per_file))
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "manifest.jsonl")
+    total_secrets = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(manifest_path, "w") as manifest:
+        for records in executor.map(_write_corpus_file, jobs, chunksize=max(1, num_files // 256)):
+            for record in records:
+                manifest.write(json.dumps(record) + "\n")
+            total_secrets += len(records)
+
+    print(f"Wrote {num_files} files ({int(sizes.sum()) / 1e6:.1f} MB of filler) to {output_dir}")
+    print(f"Planted {total_secrets} secrets; ground truth in {manifest_path}")
+    return manifest_path
+
+
+# Same class balance as generate_training_dataset: 2500 + 2500 samples and 500 edge cases.
+DATASET_EDGE_CASE_FRACTION = 500 / 5500
+SHARD_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+
+
+def generate_dataset_rows(num_samples, edge_case_fraction=DATASET_EDGE_CASE_FRACTION):
+    num_edge_cases = int(round(num_samples * edge_case_fraction))
+    num_positives = (num_samples - num_edge_cases) // 2
+    num_negatives = num_samples - num_edge_cases - num_positives
+    rows = [[sample, 1] for sample in generate_positives(num_positives)]
+    rows += [[sample, 0] for sample in generate_negatives(num_negatives)]
+    rows += [[sample, label] for sample, label in add_edge_cases(num_edge_cases)]
+    random.shuffle(rows)
+    return rows
+
+
+def _write_dataset_shard(job):
+    path, shard_seed, num_samples, edge_case_fraction, shard_format = job
+    random.seed(shard_seed)
+    rows = generate_dataset_rows(num_samples, edge_case_fraction)
+    if shard_format == "parquet":
+        import pandas as pd
+
+        pd.DataFrame(rows, columns=["text", "label"]).to_parquet(path, index=False)
+    else:
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["text", "label"])
+            writer.writerows(rows)
+    return len(rows), sum(label for _, label in rows)
+
+
+def generate_dataset_shards(
+    output_dir: str,
+    num_samples: int,
+    shard_size: int = 100_000,
+    edge_case_fraction: float = DATASET_EDGE_CASE_FRACTION,
+    seed: int = 42,
+    workers: int = None,
+    shard_format: str = "csv",
+):
+    """
+    Write the training dataset as `shard-NNNNN.csv` (or .parquet) files under
+    `output_dir`. Worker processes each build and write one shard at a time, so
+    memory is bounded by the shard size, not the dataset size. Shard i is
+    seeded from `seed` and i alone, so the output does not depend on `workers`.
+    """
+    if shard_format not in SHARD_FORMATS:
+        raise ValueError(
+            f"Shard format {shard_format} is not supported. Supported formats are: {list(SHARD_FORMATS)}"
+        )
+    if shard_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet shards need pyarrow; install it or use --shard_format csv.") from e
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):
+        if name.startswith("shard-"):
+            os.remove(os.path.join(output_dir, name))
+
+    num_shards = max(1, -(-num_samples // shard_size))
+    shard_seeds = [
+        int(sequence.generate_state(1)[0]) for sequence in np.random.SeedSequence(seed).spawn(num_shards)
+    ]
+    jobs = []
+    for i in range(num_shards):
+        shard_samples = min(shard_size, num_samples - i * shard_size)
+        path = os.path.join(output_dir, f"shard-{i:05d}{SHARD_FORMATS[shard_format]}")
+        jobs.append((path, shard_seeds[i], shard_samples, edge_case_fraction, shard_format))
+
+    total_samples, positive_count = 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for count, positives in executor.map(_write_dataset_shard, jobs):
+            total_samples += count
+            positive_count += positives
+
+    print(f"Wrote {total_samples} samples in {num_shards} {shard_format} shards to {output_dir}")
+    print(f"Positive samples (secrets): {positive_count}")
+    print(f"Negative samples (non-secrets): {total_samples - positive_count}")
+    return [job[0] for job in jobs]
+
+
+def parse_generator_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Generate training data or scale-testing corpora.")
+    parser.add_argument(
+        "--mode",
+        choices=["dataset", "shards", "corpus"],
+        default="dataset",
+        help=(
+            "'dataset' writes secrets_dataset.csv; 'shards' writes the dataset as CSV/Parquet shards; "
+            "'corpus' writes a tree of synthetic files."
+        ),
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default=None,
+        help="Shard or corpus output directory (default: dataset_shards or corpus).",
+    )
+    parser.add_argument("--num_samples", type=int, default=5500, help="Number of dataset samples in shards mode.")
+    parser.add_argument("--shard_size", type=int, default=100_000, help="Samples per dataset shard.")
+    parser.add_argument("--shard_format", choices=sorted(SHARD_FORMATS), default="csv", help="Dataset shard format.")
+    parser.add_argument("--num_files", type=int, default=1000, help="Number of corpus files.")
+    parser.add_argument(
+        "--file_types",
+        type=str,
+        default="py=0.2,js=0.15,min.js=0.05,env=0.1,json=0.15,yaml=0.1,txt=0.2,bin=0.05",
+        help="Comma-separated type=weight mix of corpus file types.",
+    )
+    parser.add_argument(
+        "--size_distribution", choices=["lognormal", "uniform", "fixed"], default="lognormal"
+    )
+    parser.add_argument("--median_size", type=int, default=16 * 1024, help="Median file size in bytes.")
+    parser.add_argument("--max_size", type=int, default=64 * 1024 * 1024, help="Maximum file size in bytes.")
+    parser.add_argument("--secrets_per_file", type=float, default=0.5, help="Mean planted secrets per file.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility.")
+    parser.add_argument("--workers", type=int, default=None, help="Writer processes (default: CPU count).")
+    return parser.parse_args(argv)
+
+
+def generate_training_dataset(seed=42):
+    random.seed(seed)
     NUM_SAMPLES_PER_CLASS = 2500 
     NUM_EDGE_CASES = 500
     
@@ -197,4 +565,31 @@ if __name__ == "__main__":
     print(f"\nSample negative examples:")
     negatives = [row[0] for row in dataset if row[1] == 0][:5]
     for i, example in enumerate(negatives, 1):
-        print(f"{i}. {example}")
\ No newline at end of file
+        print(f"{i}. {example}")
+
+
+if __name__ == "__main__":
+    arguments = parse_generator_arguments()
+    if arguments.mode == "corpus":
+        generate_corpus(
+            output_dir=arguments.output_dir or "corpus",
+            num_files=arguments.num_files,
+            file_types=parse_file_type_mix(arguments.file_types),
+            size_distribution=arguments.size_distribution,
+            median_size=arguments.median_size,
+            max_size=arguments.max_size,
+            secrets_per_file=arguments.secrets_per_file,
+            seed=arguments.seed,
+            workers=arguments.workers,
+        )
+    elif arguments.mode == "shards":
+        generate_dataset_shards(
+            output_dir=arguments.output_dir or "dataset_shards",
+            num_samples=arguments.num_samples,
+            shard_size=arguments.shard_size,
+            seed=arguments.seed,
+            workers=arguments.workers,
+            shard_format=arguments.shard_format,
+        )
+    else:
+        generate_training_dataset(seed=arguments.seed)
@@ -0,0 +1,125 @@
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from modules.metrics import emit_metric
+
+# Service limits; each can be overridden from the environment.
+MAX_CONCURRENT_SCANS = int(os.getenv("SECRETS_DETECTOR_MAX_CONCURRENT_SCANS", str(os.cpu_count() or 1)))
+MAX_QUEUED_SCANS = int(os.getenv("SECRETS_DETECTOR_MAX_QUEUED_SCANS", str(2 * MAX_CONCURRENT_SCANS)))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("SECRETS_DETECTOR_QUEUE_TIMEOUT", "5"))
+MAX_UPLOAD_BYTES = int(os.getenv("SECRETS_DETECTOR_MAX_UPLOAD_BYTES", str(64 * 1024 * 1024)))
+SCAN_TIMEOUT_SECONDS = float(os.getenv("SECRETS_DETECTOR_SCAN_TIMEOUT", "30"))
+
+
+class AdmissionRejected(Exception):
+    """The service is saturated; `status_code` is 429 (queue full) or 503 (no slot in time)."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class AdmissionController:
+    """
+    Bounds the scans running at once and the requests waiting for a slot.
+
+    A request arriving while every slot is busy and `max_queued` requests are
+    already waiting is refused straight away (429); one that waits longer than
+    `queue_timeout` seconds is refused then (503). Both carry a Retry-After
+    estimated from the average scan time. State is only touched from the event
+    loop, so the counters need no lock.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_SCANS,
+        max_queued: int = MAX_QUEUED_SCANS,
+        queue_timeout: float = QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.completed = 0
+        self.rejected = defaultdict(int)
+        self.queue_seconds = 0.0
+        self.scan_seconds = 0.0
+        self._slots = asyncio.Semaphore(max_concurrent)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained, at least 1."""
+        average = self.scan_seconds / self.completed if self.completed else 1.0
+        backlog = (self.queued + self.in_flight) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(average * backlog))
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._slots.locked():
+            if self.queued >= self.max_queued:
+                self.rejected["queue_full"] += 1
+                raise AdmissionRejected(429, self.retry_after(), "Too many scans queued; retry later.")
+            self.queued += 1
+            wait_start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected["queue_timeout"] += 1
+                raise AdmissionRejected(503, self.retry_after(), "No scan slot became free in time; retry later.")
+            finally:
+                self.queued -= 1
+                self.queue_seconds += time.perf_counter() - wait_start
+        else:
+            await self._slots.acquire()
+        self.admitted += 1
+        self.in_flight += 1
+        scan_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.scan_seconds += time.perf_counter() - scan_start
+            self._slots.release()
+
+    def to_dict(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "queue_seconds": self.queue_seconds,
+        }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        emit_metric(lines, "scans_in_flight", "gauge", "Scans currently running.", [({}, self.in_flight)])
+        emit_metric(lines, "scans_queued", "gauge", "Requests waiting for a scan slot.", [({}, self.queued)])
+        emit_metric(
+            lines, "scan_slots", "gauge", "Maximum number of concurrent scans.", [({}, self.max_concurrent)]
+        )
+        emit_metric(lines, "scans_admitted_total", "counter", "Requests given a scan slot.", [({}, self.admitted)])
+        emit_metric(
+            lines,
+            "scans_rejected_total",
+            "counter",
+            "Requests refused because the service was saturated.",
+            [({"reason": r}, count) for r, count in sorted(self.rejected.items())],
+        )
+        emit_metric(
+            lines,
+            "queue_wait_seconds_total",
+            "counter",
+            "Time requests spent waiting for a scan slot.",
+            [({}, self.queue_seconds)],
+        )
+        return "\n".join(lines) + "\n"
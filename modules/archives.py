@@ -0,0 +1,216 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+from modules.file_classifier import ARCHIVE, SAMPLE_SIZE, SKIP, classify_bytes
+
+# Findings inside an archive are reported as "<archive>!/<member>", nesting as
+# "outer.zip!/inner.tar.gz!/config/.env".
+MEMBER_SEPARATOR = "!/"
+
+# At most this many levels of archives are opened, counting the file itself;
+# archives nested deeper are skipped.
+MAX_ARCHIVE_DEPTH = 3
+
+# Decompressed bytes read per top-level archive, so a compression bomb cannot
+# keep a scan running indefinitely; the rest of the archive is skipped.
+MAX_EXPANDED_BYTES = 4 * 1024 * 1024 * 1024
+
+# A zip inside a stream is spooled so it can be seeked; up to this many bytes
+# stay in memory before the spool moves to a temporary file.
+ZIP_SPOOL_MEMORY_BYTES = 16 * 1024 * 1024
+
+STREAM_OPENERS = {
+    "gzip": lambda f: gzip.GzipFile(fileobj=f, mode="rb"),
+    "bzip2": bz2.BZ2File,
+    "xz": lzma.LZMAFile,
+}
+
+COMPRESSED_SUFFIXES = {
+    ".gz": "",
+    ".tgz": ".tar",
+    ".bz2": "",
+    ".tbz2": ".tar",
+    ".xz": "",
+    ".txz": ".tar",
+}
+
+
+class ExpansionBudget:
+    def __init__(self, max_bytes: int = MAX_EXPANDED_BYTES):
+        self.remaining = max_bytes
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining <= 0
+
+
+class SampledReader:
+    """
+    Binary reader over a (possibly non-seekable) stream whose first `sample_size`
+    bytes are read up front for classification and then served again, so the
+    stream is decompressed once. Reads are charged to an ExpansionBudget and
+    stop when it runs out.
+    """
+
+    def __init__(self, f, budget: ExpansionBudget, sample_size: int = SAMPLE_SIZE):
+        self._f = f
+        self._budget = budget
+        self.sample = f.read(min(sample_size, max(budget.remaining, 0)))
+        budget.remaining -= len(self.sample)
+        self._buffer = self.sample
+
+    def _read_stream(self, size: int, readline: bool) -> bytes:
+        size = min(size, self._budget.remaining) if size >= 0 else self._budget.remaining
+        if size <= 0:
+            return b""
+        data = self._f.readline(size) if readline else self._f.read(size)
+        self._budget.remaining -= len(data)
+        return data
+
+    def rewound(self):
+        """The underlying stream seeked back to its start, or None if it cannot seek."""
+        try:
+            if not self._f.seekable():
+                return None
+            self._f.seek(0)
+        except (AttributeError, OSError):
+            # Members of a tar read in stream mode cannot seek at all.
+            return None
+        return self._f
+
+    def read(self, size: int = -1) -> bytes:
+        if self._buffer:
+            if 0 <= size <= len(self._buffer):
+                data, self._buffer = self._buffer[:size], self._buffer[size:]
+                return data
+            data, self._buffer = self._buffer, b""
+            return data + self._read_stream(size - len(data) if size >= 0 else -1, readline=False)
+        return self._read_stream(size, readline=False)
+
+    def readline(self, size: int = -1) -> bytes:
+        if self._buffer:
+            end = self._buffer.find(b"\n") + 1
+            if end and (size < 0 or end <= size):
+                data, self._buffer = self._buffer[:end], self._buffer[end:]
+                return data
+            if 0 <= size <= len(self._buffer):
+                data, self._buffer = self._buffer[:size], self._buffer[size:]
+                return data
+            data, self._buffer = self._buffer, b""
+            return data + self._read_stream(size - len(data) if size >= 0 else -1, readline=True)
+        return self._read_stream(size, readline=True)
+
+
+def decompressed_name(path: str) -> str:
+    base = os.path.basename(path)
+    root, ext = os.path.splitext(base)
+    if ext.lower() in COMPRESSED_SUFFIXES:
+        return root + COMPRESSED_SUFFIXES[ext.lower()]
+    return base
+
+
+def _iter_tar(f, path, depth, budget):
+    with tarfile.open(fileobj=f, mode="r|") as tar:
+        for member in tar:
+            if budget.exhausted:
+                return
+            if member.isfile():
+                yield from _iter_member(tar.extractfile(member), path + MEMBER_SEPARATOR + member.name, depth, budget)
+
+
+def _iter_zip(f, path, depth, budget):
+    # ZipFile needs the central directory at the end: seekable inputs (a file on
+    # disk, or a member of such a zip) are listed in place, a zip inside a tar
+    # or compressed stream is spooled first.
+    if isinstance(f, SampledReader):
+        seekable = f.rewound()
+        if seekable is None:
+            yield from _iter_spooled_zip(f, path, depth, budget)
+            return
+        f = seekable
+    with zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            if budget.exhausted:
+                return
+            if info.is_dir():
+                continue
+            member_path = path + MEMBER_SEPARATOR + info.filename
+            if info.flag_bits & 0x1:
+                print(f"[INFO] Skipping {member_path} (encrypted).", file=sys.stderr)
+                continue
+            with archive.open(info) as member:
+                yield from _iter_member(member, member_path, depth, budget)
+
+
+def _iter_spooled_zip(reader, path, depth, budget):
+    with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MEMORY_BYTES) as spool:
+        shutil.copyfileobj(reader, spool)
+        if budget.exhausted:
+            # Cut off by the budget: the central directory was never read.
+            print(f"[INFO] Skipping {path} (zip truncated by the expansion budget).", file=sys.stderr)
+            return
+        spool.seek(0)
+        yield from _iter_zip(spool, path, depth, budget)
+
+
+def _iter_archive(f, path, kind, depth, budget):
+    """Members of an archive opened at `depth` (0 for a file on disk)."""
+    if kind == "tar":
+        yield from _iter_tar(f, path, depth, budget)
+    elif kind == "zip":
+        yield from _iter_zip(f, path, depth, budget)
+    else:
+        # A compressed stream has one member, named after the file; a compressed
+        # tarball is listed by its tar members directly (bundle.tar.gz!/config/.env).
+        with STREAM_OPENERS[kind](f) as stream:
+            reader = SampledReader(stream, budget)
+            file_class = classify_bytes(reader.sample, decompressed_name(path))
+            if file_class.reason == "tar":
+                yield from _iter_tar(reader, path, depth, budget)
+            else:
+                member_path = path + MEMBER_SEPARATOR + decompressed_name(path)
+                yield from _iter_classified(reader, member_path, file_class, depth, budget)
+
+
+def _iter_member(f, member_path, depth, budget):
+    reader = SampledReader(f, budget)
+    yield from _iter_classified(reader, member_path, classify_bytes(reader.sample, member_path), depth, budget)
+
+
+def _iter_classified(reader, member_path, file_class, depth, budget):
+    if file_class.route == SKIP:
+        print(f"[INFO] Skipping {member_path} ({file_class.reason}).", file=sys.stderr)
+    elif file_class.route != ARCHIVE:
+        yield member_path, reader, file_class
+    elif depth + 1 >= MAX_ARCHIVE_DEPTH:
+        print(f"[INFO] Skipping {member_path} (nested archives deeper than {MAX_ARCHIVE_DEPTH}).", file=sys.stderr)
+    else:
+        yield from _iter_archive(reader, member_path, file_class.reason, depth + 1, budget)
+
+
+def iter_archive_members(filepath, kind: str, max_expanded_bytes: int = MAX_EXPANDED_BYTES, budget=None):
+    """
+    Yield (member_path, reader, FileClass) for every scannable member of the
+    archive at `filepath`, recursing into nested archives. Members are
+    decompressed on the fly and never written to disk, except a zip inside a
+    tar or compressed stream, which is spooled to a temporary file; each
+    reader must be consumed before the next member is requested, as tar and
+    compressed streams are read front to back. Pass an ExpansionBudget as
+    `budget` to check afterwards whether it ran out.
+    """
+    if budget is None:
+        budget = ExpansionBudget(max_expanded_bytes)
+    with open(filepath, "rb") as f:
+        yield from _iter_archive(f, filepath, kind, 0, budget)
+    if budget.exhausted:
+        print(
+            f"[INFO] Stopped reading {filepath} after {max_expanded_bytes} decompressed bytes.",
+            file=sys.stderr,
+        )
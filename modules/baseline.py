@@ -0,0 +1,163 @@
+import fnmatch
+import json
+import re
+
+from modules.findings import value_digest
+
+BASELINE_VERSION = 1
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+def normalize_path(path: str) -> str:
+    path = path.replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+
+def path_suffixes(path: str):
+    """`path` and every tail of it that starts after a "/", longest first."""
+    yield path
+    start = path.find("/")
+    while start != -1:
+        yield path[start + 1 :]
+        start = path.find("/", start + 1)
+
+
+def compile_globs(globs):
+    """One regex matching any of `globs`, anchored at a path-component boundary; None if empty."""
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:.*/)?{fnmatch.translate(normalize_path(glob))}" for glob in globs))
+
+
+class PathScope:
+    """Literal paths (set lookups over the path's suffixes) plus globs (one compiled regex)."""
+
+    def __init__(self, paths=()):
+        self.literals = set()
+        self.globs = []
+        self._pattern = None
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str):
+        path = normalize_path(path)
+        if _GLOB_CHARS.search(path):
+            self.globs.append(path)
+            self._pattern = None
+        else:
+            self.literals.add(path)
+
+    def matches(self, path: str) -> bool:
+        if self.literals and any(suffix in self.literals for suffix in path_suffixes(path)):
+            return True
+        if self.globs and self._pattern is None:
+            self._pattern = compile_globs(self.globs)
+        return self._pattern is not None and self._pattern.match(path) is not None
+
+    def to_list(self) -> list:
+        return sorted(self.literals) + sorted(self.globs)
+
+
+class Baseline:
+    """
+    Accepted findings, checked at match time so they never reach scoring.
+
+    A baseline file is JSON with three optional lists:
+
+        {"version": 1,
+         "paths": ["tests/fixtures/**"],             # everything under these globs
+         "values": ["<sha256>", ...],                # these values anywhere
+         "findings": [{"value_sha256": "<sha256>",   # these values, only at these paths
+                       "paths": ["config/.env"]}]}
+
+    Values are stored as SHA-256 digests, never in plaintext. A lookup costs
+    one hash of the value and one set lookup, plus a path check for scoped
+    entries, however many entries the baseline holds. Paths match on whole
+    trailing components, so "config/.env" also covers "./app/config/.env".
+    """
+
+    def __init__(self, paths=(), values=(), findings=()):
+        self.paths = PathScope(paths)
+        self.values = set(values)
+        self.findings = {}
+        self._last_path = (None, False)
+        for digest, scope_paths in findings:
+            for path in scope_paths:
+                self.accept(digest, path)
+
+    def __len__(self):
+        return len(self.paths.literals) + len(self.paths.globs) + len(self.values) + len(self.findings)
+
+    def accept(self, digest: str, path: str = None):
+        """Add a value digest, optionally limited to `path` (a literal path or a glob)."""
+        if path is None:
+            self.values.add(digest)
+        else:
+            self.findings.setdefault(digest, PathScope()).add(path)
+
+    def suppresses_path(self, filepath: str) -> bool:
+        """Whether every finding under `filepath` is accepted, so the file need not be read."""
+        # Findings arrive file by file, so the last answer is nearly always reused.
+        # The (path, answer) tuple is replaced whole, which keeps it thread-safe.
+        last_path, last_answer = self._last_path
+        if filepath == last_path:
+            return last_answer
+        answer = self.paths.matches(normalize_path(filepath))
+        self._last_path = (filepath, answer)
+        return answer
+
+    def suppresses(self, filepath: str, value: str) -> bool:
+        if self.suppresses_path(filepath):
+            return True
+        digest = value_digest(value)
+        if digest in self.values:
+            return True
+        scope = self.findings.get(digest)
+        return scope is not None and scope.matches(normalize_path(filepath))
+
+    def write_table(self, table):
+        """Accept every row of a FindingsTable at its own path (a sink for `scan_paths`)."""
+        for i, value in enumerate(table.values):
+            self.accept(value_digest(value), table.files[table.file_id[i]])
+
+    def to_dict(self) -> dict:
+        return {
+            "version": BASELINE_VERSION,
+            "paths": self.paths.to_list(),
+            "values": sorted(self.values),
+            "findings": [
+                {"value_sha256": digest, "paths": scope.to_list()}
+                for digest, scope in sorted(self.findings.items())
+            ],
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def close(self):
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_last_path"] = (None, False)
+        return state
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Baseline":
+        if data.get("version", BASELINE_VERSION) != BASELINE_VERSION:
+            raise ValueError(f"Unsupported baseline version {data.get('version')!r}.")
+        return cls(
+            paths=data.get("paths", ()),
+            values=data.get("values", ()),
+            findings=[(entry["value_sha256"], entry.get("paths", ())) for entry in data.get("findings", ())],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -1,23 +1,73 @@
-import timeit
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+import argparse
+import json
+import platform
 import random
 import string
+import tempfile
+import time
+import timeit
 import ctypes
-import platform
 import math
 from collections import Counter
 
+import yaml
+
+from data.generate_dataset import (
+    generate_corpus,
+    generate_negatives,
+    generate_positives,
+    generate_random_string,
+    parse_file_type_mix,
+)
+from modules.entropy import SecretsDetectorPython, cpp_entropy_loader
+from modules.features import get_features, get_features_batch
+from modules.entropy import analyze_string, analyze_strings, verdict_strings
+from modules.memo import MEMOS, configure_memos, memo_stats
+from modules.scanner import find_matches, scan_file, scan_paths
+
+# One committed baseline per suite size; timings are only comparable between
+# runs of the same parameters (see `baseline_mismatch`).
+BASELINE_DIR = os.path.join(str(SECRETS_DETECTOR_ROOT), "benchmarks")
+
+# Every benchmark is also reported relative to this fixed pure-Python workload,
+# timed in the same run, so a faster or busier machine shifts both alike.
+REFERENCE_BENCHMARK = "calculate_entropy.python.4096"
+REFERENCE_TEXT = "".join(random.Random(0).choice(string.ascii_letters + string.digits) for _ in range(4096))
+
+
+def default_baseline_path(quick: bool) -> str:
+    return os.path.join(BASELINE_DIR, "baseline-quick.json" if quick else "baseline.json")
+
+
 def py_calculate_entropy(data: str) -> float:
     if not data:
         return 0.0
-    
+
     length = len(data)
     counts = Counter(data)
     entropy = 0.0
-    
+
     for count in counts.values():
         p_x = count / length
         entropy -= p_x * math.log2(p_x)
-        
+
     return entropy
 
 CPP_LOADED = False
@@ -26,14 +76,14 @@ try:
     lib_ext = ".dll" if platform.system() == "Windows" else ".so"
     lib_path = f"./simd_entropy{lib_ext}"
     optimizer_lib = ctypes.CDLL(lib_path)
-    
+
     calculate_entropy_func_cpp = optimizer_lib.calculate_entropy_for_secrets
     calculate_entropy_func_cpp.argtypes = [ctypes.c_char_p, ctypes.c_int]
     calculate_entropy_func_cpp.restype = ctypes.c_double
 
     print("Successfully loaded the C++ library.")
     CPP_LOADED = True # type: ignore
-    
+
 except OSError as e:
     print(f"Failed to load C++ library: {e}")
 
@@ -42,44 +92,480 @@ def generate_test_string(length: int) -> str:
         random.choice(string.ascii_letters + string.digits) for _ in range(length)
     )
 
-if __name__ == "__main__":
-    if not CPP_LOADED:
-        print("\nExiting benchmark: C++ library is not available.")
-        print("Please compile simd_entropy.cc first using the run.sh script or g++ command.")
-    else:
-        STRING_LENGTH = 1024
-        NUMBER_OF_RUNS = 10000
-
-        print("\n--- Entropy Calculation Benchmark ---")
-        print(f"String Length: {STRING_LENGTH} characters")
-        print(f"Number of Runs: {NUMBER_OF_RUNS}")
-        print("-------------------------------------")
-
-        test_string_py = generate_test_string(STRING_LENGTH)
-        test_string_cpp_bytes = test_string_py.encode('utf-8')
-
-        python_setup = "from __main__ import py_calculate_entropy, test_string_py"
-        python_stmt = "py_calculate_entropy(test_string_py)"
-        python_time = timeit.timeit(
-            stmt=python_stmt, setup=python_setup, number=NUMBER_OF_RUNS
+
+def time_call(func, number: int, repeat: int = 5, warmup: bool = True) -> float:
+    """Best-of-`repeat` seconds per call of `func`, after one untimed warm-up call."""
+    if warmup:
+        func()
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def time_reference() -> float:
+    """Seconds per call of the reference workload (see REFERENCE_BENCHMARK)."""
+    return time_call(lambda: py_calculate_entropy(REFERENCE_TEXT), number=100, repeat=7)
+
+
+def result(name: str, seconds_per_op: float, bytes_per_op: int = 0, **extra) -> dict:
+    entry = {
+        "name": name,
+        "seconds_per_op": seconds_per_op,
+        "ops_per_second": 1.0 / seconds_per_op if seconds_per_op > 0 else float("inf"),
+    }
+    if bytes_per_op:
+        entry["mb_per_second"] = bytes_per_op / seconds_per_op / 1e6 if seconds_per_op > 0 else float("inf")
+    entry.update(extra)
+    return entry
+
+
+def _samples(count: int) -> list:
+    return generate_positives(count // 2) + generate_negatives(count - count // 2)
+
+
+def build_corpora(target_bytes: int) -> dict:
+    """Synthetic file contents (bytes) per input class, built from the dataset generators."""
+    samples = _samples(max(64, target_bytes // 64))
+
+    def repeat_until(make_chunk, joiner):
+        parts, size = [], 0
+        while size < target_bytes:
+            chunk = make_chunk()
+            parts.append(chunk)
+            size += len(chunk) + len(joiner)
+        return joiner.join(parts)
+
+    minified_js = repeat_until(
+        lambda: f"var {generate_random_string(6, string.ascii_lowercase)}=\"{random.choice(samples)}\";"
+        f"function(e){{return e.{generate_random_string(4, string.ascii_lowercase)}()}}",
+        "",
+    )
+    dotenv_file = repeat_until(
+        lambda: f"{generate_random_string(10, string.ascii_uppercase + '_')}={random.choice(samples)}",
+        "\n",
+    )
+    records = []
+    size = 0
+    while size < target_bytes:
+        record = {generate_random_string(8, string.ascii_lowercase): random.choice(samples) for _ in range(4)}
+        records.append(record)
+        size += sum(len(k) + len(v) + 8 for k, v in record.items())
+    json_file = json.dumps(records, indent=2)
+    yaml_file = yaml.safe_dump(records)
+    binary_ish = bytes(
+        random.getrandbits(8) if random.random() < 0.7 else random.choice(b"AKIA0123abcdef=\n")
+        for _ in range(target_bytes)
+    )
+
+    return {
+        "minified_js": minified_js.encode("utf-8"),
+        "dotenv": dotenv_file.encode("utf-8"),
+        "json": json_file.encode("utf-8"),
+        "yaml": yaml_file.encode("utf-8"),
+        "binary_ish": binary_ish,
+    }
+
+
+def bench_entropy(number: int) -> list:
+    results = []
+    test_string = generate_test_string(1024)
+    results.append(
+        result("calculate_entropy.python.1024", time_call(lambda: py_calculate_entropy(test_string), number))
+    )
+    if CPP_LOADED:
+        encoded = test_string.encode("utf-8")
+        results.append(
+            result(
+                "calculate_entropy.native.1024",
+                time_call(lambda: calculate_entropy_func_cpp(encoded, len(encoded)), number),
+            )
         )
+    return results
 
-        print(f"Python Total Time: {python_time:.4f} seconds")
-        print(
-            f"Python Avg Time/Run: {(python_time / NUMBER_OF_RUNS) * 1e6:.4f} microseconds"
+
+def bench_analyze_for_secrets(lengths, number: int) -> list:
+    results = []
+    loaded, analyze_cpp, detect_cpp = cpp_entropy_loader()
+    for length in lengths:
+        text = generate_test_string(length)
+        encoded = text.encode("utf-8")
+        runs = max(1, number // max(1, length // 64))
+        python_time = time_call(lambda: SecretsDetectorPython.analyze_for_secrets(text), runs)
+        results.append(result(f"analyze_for_secrets.python.{length}", python_time, length))
+        python_detect = time_call(lambda: SecretsDetectorPython._detect_api_key_pattern(text), runs)
+        results.append(result(f"detect_api_key_pattern.python.{length}", python_detect, length))
+        if loaded:
+            native_time = time_call(lambda: analyze_cpp(encoded, len(encoded)), runs)
+            results.append(
+                result(
+                    f"analyze_for_secrets.native.{length}",
+                    native_time,
+                    length,
+                    speedup=python_time / native_time if native_time > 0 else None,
+                )
+            )
+            native_detect = time_call(lambda: detect_cpp(encoded, len(encoded)), runs)
+            results.append(
+                result(
+                    f"detect_api_key_pattern.native.{length}",
+                    native_detect,
+                    length,
+                    speedup=python_detect / native_detect if native_detect > 0 else None,
+                )
+            )
+    return results
+
+
+def bench_regex(corpora: dict) -> list:
+    results = []
+    for name, data in corpora.items():
+        lines = data.decode("utf-8", errors="ignore").splitlines()
+
+        def run():
+            for line in lines:
+                for _ in find_matches(line):
+                    pass
+
+        results.append(result(f"regex_scan.{name}", time_call(run, 1), len(data)))
+    return results
+
+
+def bench_get_features(number: int) -> list:
+    samples = _samples(number)
+
+    def run():
+        for sample in samples:
+            get_features(sample)
+
+    return [result("get_features", time_call(run, 1) / len(samples))]
+
+
+def bench_scan_file(corpora: dict) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, data in corpora.items():
+            path = os.path.join(temp_dir, f"{name}.txt")
+            with open(path, "wb") as f:
+                f.write(data)
+            size = os.path.getsize(path)
+            results.append(result(f"scan_file.{name}", time_call(lambda: scan_file(path), 1), size))
+    return results
+
+
+def bench_api(corpora: dict, number: int) -> list:
+    try:
+        from fastapi.testclient import TestClient
+        from api import app
+    except ImportError as e:
+        print(f"[WARNING] Skipping API benchmark ({e}).")
+        return []
+    client = TestClient(app)
+    payload = corpora["dotenv"]
+
+    def run():
+        response = client.post("/scan-file/", files={"file": ("bench.env", payload)})
+        response.raise_for_status()
+
+    return [result("api.scan_file.dotenv", time_call(run, number), len(payload))]
+
+
+def bench_batch_analysis(number: int) -> list:
+    samples = _samples(number)
+    per_string = time_call(lambda: [analyze_string(s) for s in samples], 1) / len(samples)
+    batched = time_call(lambda: analyze_strings(samples), 1) / len(samples)
+    verdict_only = time_call(lambda: verdict_strings(samples), 1) / len(samples)
+    return [
+        result("analyze_string.per_string", per_string),
+        result("analyze_strings.batch", batched, speedup=per_string / batched if batched > 0 else None),
+        result("verdict_strings.batch", verdict_only, speedup=batched / verdict_only if verdict_only > 0 else None),
+    ]
+
+
+def bench_engine_classes(number: int) -> list:
+    """Python vs native `analyze_for_secrets` per parity input class, with how often their verdicts agree."""
+    from modules.entropy import cpp_wrapper
+    from modules.parity import INPUT_CLASSES, agreement, generate_inputs
+
+    results = []
+    if not cpp_entropy_loader()[0]:
+        return results
+    for input_class in INPUT_CLASSES:
+        texts = generate_inputs(input_class, max(1, number // 10))
+        python_time = time_call(lambda: [SecretsDetectorPython.analyze_for_secrets(t) for t in texts], 1) / len(texts)
+        native_time = time_call(lambda: [cpp_wrapper(t) for t in texts], 1) / len(texts)
+        entry = result(
+            f"engine_parity.{input_class}",
+            native_time,
+            speedup=python_time / native_time if native_time > 0 else None,
         )
+        entry["python_seconds_per_op"] = python_time
+        entry["agreement"] = agreement(texts)
+        results.append(entry)
+    return results
+
+
+def bench_token_array(number: int) -> list:
+    """`get_features` per string vs the vectorized path over fixed-width 40-char tokens (memo off)."""
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + "+/"
+    tokens = ["".join(rng.choice(alphabet) for _ in range(40)) for _ in range(number)]
+    configure_memos(0)
+    per_string = time_call(lambda: [get_features(token) for token in tokens], 1) / len(tokens)
+    vectorized = time_call(lambda: get_features_batch(tokens), 1) / len(tokens)
+    return [
+        result("get_features.per_string", per_string),
+        result("get_features_batch.token_array", vectorized, speedup=per_string / vectorized if vectorized > 0 else None),
+    ]
+
+
+def bench_memo(number: int, capacity: int) -> list:
+    """`get_features` over a stream where each distinct candidate recurs ten times, memo off vs on."""
+    distinct = _samples(max(1, number // 10))
+    stream = [distinct[i % len(distinct)] for i in range(len(distinct) * 10)]
+
+    def run():
+        for sample in stream:
+            get_features(sample)
+
+    configure_memos(0)
+    uncached = time_call(run, 1) / len(stream)
+    configure_memos(capacity)
+    for memo in MEMOS.values():
+        memo.clear()
+    cached = time_call(run, 1) / len(stream)
+    stats = memo_stats().get("get_features", {"hits": 0, "misses": 0})
+    configure_memos(0)
+    entry = result("get_features.memoized", cached, speedup=uncached / cached if cached > 0 else None)
+    entry["hit_rate"] = stats["hits"] / max(1, stats["hits"] + stats["misses"])
+    return [entry]
+
+
+def bench_parallel_scan(num_files: int, worker_counts) -> list:
+    """Threads vs processes for scan_paths over a generated corpus."""
+    results = []
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        generate_corpus(
+            corpus_dir,
+            num_files=num_files,
+            file_types=parse_file_type_mix("py=1,js=1,env=1,json=1,yaml=1,txt=1"),
+            median_size=16 * 1024,
+            workers=1,
+        )
+        os.remove(os.path.join(corpus_dir, "manifest.jsonl"))
+        corpus_bytes = sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(corpus_dir) for name in files
+        )
+        for executor in ("thread", "process"):
+            for workers in worker_counts:
+                seconds = time_call(
+                    lambda: scan_paths([corpus_dir], workers=workers, executor=executor, score=True),
+                    1,
+                    repeat=1,
+                    warmup=False,
+                )
+                results.append(result(f"scan_paths.{executor}.{workers}", seconds, corpus_bytes))
+    return results
+
+
+def suite_parameters(quick: bool = False, memo_size: int = 65536) -> dict:
+    """Input sizes and repetitions of a suite run; results are comparable only when these match."""
+    return {
+        "quick": quick,
+        "number": 200 if quick else 2000,
+        "target_bytes": 64 * 1024 if quick else 1024 * 1024,
+        "lengths": [32, 256, 1024] if quick else [32, 256, 1024, 4096, 16384],
+        "api_requests": 5 if quick else 20,
+        "parallel_files": 32 if quick else 256,
+        "memo_size": memo_size,
+        "native_loaded": CPP_LOADED,
+        "reference": REFERENCE_BENCHMARK,
+    }
+
 
-        cpp_setup = "from __main__ import calculate_entropy_func_cpp, test_string_cpp_bytes, STRING_LENGTH"
-        cpp_stmt = "calculate_entropy_func_cpp(test_string_cpp_bytes, STRING_LENGTH)"
-        cpp_time = timeit.timeit(stmt=cpp_stmt, setup=cpp_setup, number=NUMBER_OF_RUNS)
+def run_suite(quick: bool = False, memo_size: int = 65536) -> dict:
+    random.seed(42)
+    # Kernel benchmarks repeat the same inputs, so they run with the memos off;
+    # bench_memo measures the memo on its own.
+    configure_memos(0)
+    parameters = suite_parameters(quick, memo_size)
+    number = parameters["number"]
+    target_bytes = parameters["target_bytes"]
+    lengths = parameters["lengths"]
 
-        print(f"\nC++ Total Time:    {cpp_time:.4f} seconds")
-        print(f"C++ Avg Time/Run:    {(cpp_time / NUMBER_OF_RUNS) * 1e6:.4f} microseconds")
+    corpora = build_corpora(target_bytes)
+    reference_seconds = time_reference()
+    results = []
+    results += bench_entropy(number)
+    results += bench_analyze_for_secrets(lengths, number)
+    results += bench_regex(corpora)
+    results += bench_get_features(number // 4)
+    results += bench_batch_analysis(number)
+    results += bench_token_array(number)
+    results += bench_engine_classes(number)
+    results += bench_memo(number, memo_size)
+    results += bench_scan_file(corpora)
+    results += bench_api(corpora, parameters["api_requests"])
+    results += bench_parallel_scan(parameters["parallel_files"], [1, 4])
+    # Timed again at the end: the faster of the two is the least disturbed.
+    reference_seconds = min(reference_seconds, time_reference())
+    for entry in results:
+        entry["relative"] = entry["seconds_per_op"] / reference_seconds
 
-        print("-------------------------------------")
-        if cpp_time > 0:
-            speedup = python_time / cpp_time
-            print(f"Conclusion: The C++/SIMD version is {speedup:.1f}x faster.")
-        else:
-            print("C++ version was too fast to measure accurately.")
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "native_loaded": CPP_LOADED,
+        "quick": quick,
+        "parameters": parameters,
+        "reference_seconds_per_op": reference_seconds,
+        "results": {entry["name"]: entry for entry in results},
+    }
 
+
+def baseline_mismatch(report: dict, baseline: dict) -> dict:
+    """
+    Suite parameters that differ between `report` and `baseline`, as
+    {name: (baseline, current)}. Baselines written before parameters were
+    recorded are compared on `quick` alone.
+    """
+    current = report.get("parameters", {"quick": report.get("quick")})
+    reference = baseline.get("parameters", {"quick": baseline.get("quick")})
+    return {
+        name: (reference.get(name), current.get(name))
+        for name in sorted(set(current) | set(reference))
+        if reference.get(name) != current.get(name)
+    }
+
+
+def same_host(report: dict, baseline: dict) -> bool:
+    """Whether `baseline` was recorded on the platform and Python version of `report`."""
+    return (report.get("platform"), report.get("python")) == (baseline.get("platform"), baseline.get("python"))
+
+
+def overall_ratio(report: dict, baseline: dict) -> float:
+    """
+    Geometric mean, over the benchmarks both runs have, of the current relative
+    time per op over the baseline's. Single microbenchmarks swing by tens of
+    percent between identical runs; their mean is what the gate checks.
+    """
+    ratios = [
+        entry["relative"] / baseline["results"][name]["relative"]
+        for name, entry in report["results"].items()
+        if name in baseline.get("results", {})
+    ]
+    if not ratios:
+        return 1.0
+    return math.exp(sum(math.log(ratio) for ratio in ratios) / len(ratios))
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Return the benchmarks whose time per op, relative to the run's reference
+    workload, regressed by more than `tolerance`. Raises ValueError if the two
+    runs used different suite parameters.
+    """
+    mismatch = baseline_mismatch(report, baseline)
+    if mismatch:
+        details = ", ".join(f"{name}: {old!r} -> {new!r}" for name, (old, new) in mismatch.items())
+        raise ValueError(f"Baseline was recorded with different suite parameters ({details}).")
+    regressions = []
+    for name, entry in report["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        ratio = entry["relative"] / reference["relative"]
+        if ratio > 1.0 + tolerance:
+            regressions.append(
+                {"name": name, "baseline": reference["relative"], "current": entry["relative"], "ratio": ratio}
+            )
+    return regressions
+
+
+def parse_benchmark_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="SecretsDetector benchmark suite.")
+    parser.add_argument("--output", type=str, default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Stored baseline to compare against (default: benchmarks/baseline.json, or baseline-quick.json with --quick).",
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed overall slowdown, relative to the reference workload, before failing (0.25 = 25%%).",
+    )
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer runs, for CI smoke checks.")
+    parser.add_argument("--memo-size", type=int, default=65536, help="Memo capacity used by the memo benchmark.")
+    arguments = parser.parse_args(argv)
+    if arguments.baseline is None:
+        arguments.baseline = default_baseline_path(arguments.quick)
+    return arguments
+
+
+def main(argv=None) -> int:
+    arguments = parse_benchmark_arguments(argv)
+    if not CPP_LOADED:
+        print("[WARNING] C++ library is not available; native benchmarks are skipped.")
+        print("Please compile simd_entropy.cc first using the run.sh script or g++ command.")
+
+    report = run_suite(quick=arguments.quick, memo_size=arguments.memo_size)
+
+    print("\n--- Benchmark Results ---")
+    for name, entry in report["results"].items():
+        line = f"{name:<45} {entry['seconds_per_op'] * 1e6:>14.3f} us/op"
+        if "mb_per_second" in entry:
+            line += f" {entry['mb_per_second']:>10.2f} MB/s"
+        if entry.get("speedup"):
+            line += f"  ({entry['speedup']:.1f}x speedup)"
+        print(line)
+
+    with open(arguments.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {arguments.output}")
+
+    if arguments.update_baseline:
+        os.makedirs(os.path.dirname(arguments.baseline) or ".", exist_ok=True)
+        with open(arguments.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated at {arguments.baseline}")
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print(f"[WARNING] No baseline at {arguments.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    try:
+        regressions = compare_to_baseline(report, baseline, arguments.tolerance)
+    except ValueError as e:
+        print(f"[ERROR] {e} Compare against a baseline of the same suite or rerun with --update-baseline.")
+        return 2
+    if regressions:
+        print(f"\n[WARNING] {len(regressions)} benchmark(s) slower than the baseline by over {arguments.tolerance:.0%}:")
+        for regression in regressions:
+            print(
+                f"  {regression['name']}: {regression['baseline']:.3f} -> "
+                f"{regression['current']:.3f} x reference ({regression['ratio']:.2f}x)"
+            )
+    ratio = overall_ratio(report, baseline)
+    print(f"\nOverall time per op relative to the baseline: {ratio:.2f}x")
+    if ratio <= 1.0 + arguments.tolerance:
+        print("No regression against the baseline.")
+        return 0
+    # Only a baseline from this kind of host is a hard gate; others are advisory.
+    if not same_host(report, baseline):
+        print(
+            f"[WARNING] Regressed beyond {arguments.tolerance:.0%}, but the baseline was recorded on "
+            f"{baseline.get('platform')} (Python {baseline.get('python')}); "
+            "record one on this host with --update-baseline to enforce it."
+        )
+        return 0
+    print(f"[ERROR] Regressed beyond {arguments.tolerance:.0%} against the baseline.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+# Longest secret we guarantee to find whole across a window seam. The fixed-format
+# rules are all shorter than 64 bytes; unbounded rules (generic_key) are cut here.
+MAX_SECRET_LENGTH = 512
+CHUNK_SIZE = 64 * 1024
+# With several workers, files over twice this size are scanned as separate ranges.
+RANGE_BYTES = 16 * 1024 * 1024
+
+# line: 1-based line number; column: 0-based byte offset of `data` within the line;
+# owned: matches starting before this byte offset of `data` belong to this window,
+# later ones are left to the next window, which re-reads them from the overlap.
+Window = namedtuple("Window", ["line", "column", "data", "owned"])
+
+
+def _utf8_boundary(data: bytes, position: int) -> int:
+    """Move `position` back so it does not split a UTF-8 sequence."""
+    for _ in range(3):
+        if position <= 0 or (data[position] & 0xC0) != 0x80:
+            break
+        position -= 1
+    return position
+
+
+def iter_line_windows(f, chunk_size: int = CHUNK_SIZE, overlap: int = MAX_SECRET_LENGTH):
+    """
+    Yield overlapping windows over the lines of a binary file object.
+
+    Lines up to `chunk_size + overlap` bytes come out as a single window, as with
+    `for line in f`. Longer lines are split into windows of that size that overlap
+    by `overlap` bytes, so memory stays bounded however long a line is.
+    """
+    window_size = chunk_size + overlap
+    buffer = b""
+    line_num = 1
+    column = 0
+    while True:
+        needed = window_size - len(buffer)
+        piece = f.readline(needed)
+        buffer = buffer + piece if buffer else piece
+        if len(piece) < needed or buffer.endswith(b"\n"):
+            if buffer:
+                yield Window(line_num, column, buffer, len(buffer))
+            if not buffer.endswith(b"\n"):
+                break
+            line_num += 1
+            column = 0
+            buffer = b""
+        else:
+            owned = _utf8_boundary(buffer, chunk_size)
+            yield Window(line_num, column, buffer, owned)
+            buffer = buffer[owned:]
+            column += owned
+
+
+def byte_offsets(text: str, char_positions, errors: str = "surrogateescape"):
+    """Map sorted character positions in `text` to byte offsets in its UTF-8 encoding."""
+    offsets = []
+    last_char, last_byte = 0, 0
+    for position in char_positions:
+        last_byte += len(text[last_char:position].encode("utf-8", errors))
+        last_char = position
+        offsets.append(last_byte)
+    return offsets
+
+
+class RangeReader:
+    """Binary reader over bytes [start, end) of an open file; counts the newlines it returns."""
+
+    def __init__(self, f, start: int, end: int):
+        f.seek(start)
+        self._f = f
+        self._remaining = end - start
+        self.newlines = 0
+
+    def readline(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        line = self._f.readline(size)
+        self._remaining -= len(line)
+        if line.endswith(b"\n"):
+            self.newlines += 1
+        return line
+
+
+def _next_line_start(f, position: int, size: int, block_size: int = CHUNK_SIZE) -> int:
+    """Offset of the first line start at or after `position`; `size` if there is none."""
+    offset = position - 1
+    f.seek(offset)
+    while offset < size:
+        block = f.read(block_size)
+        if not block:
+            break
+        newline = block.find(b"\n")
+        if newline != -1:
+            return offset + newline + 1
+        offset += len(block)
+    return size
+
+
+def newline_aligned_ranges(f, size: int, range_bytes: int = RANGE_BYTES) -> list:
+    """
+    Split [0, size) into consecutive (start, end) ranges of about `range_bytes`,
+    each starting at a line start, so no line (and no match) spans two ranges.
+    A line longer than `range_bytes` stays whole inside one range.
+    """
+    starts = [0]
+    for boundary in range(range_bytes, size, range_bytes):
+        if boundary <= starts[-1]:
+            continue
+        start = _next_line_start(f, boundary, size)
+        if start >= size:
+            break
+        starts.append(start)
+    return list(zip(starts, starts[1:] + [size]))
@@ -0,0 +1,279 @@
+import ctypes
+import json
+import logging
+import platform
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# How per-tree leaf values combine into the class-1 probability.
+MEAN_PROBA = "mean_proba"  # average of per-tree probabilities (RandomForest, DecisionTree)
+LOGIT_SUM = "logit_sum"  # sigmoid(base + sum of leaves) (GradientBoosting, XGBoost, AdaBoost)
+LINEAR = "linear"  # sigmoid(X @ coef + intercept) (LogisticRegression)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class _TreeBuilder:
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right, self.value = [], [], [], [], []
+        self.roots = []
+
+    def add_sklearn_tree(self, tree, leaf_values):
+        offset = len(self.feature)
+        self.roots.append(offset)
+        is_leaf = tree.children_left < 0
+        self.feature.extend(np.where(is_leaf, -1, tree.feature).tolist())
+        self.threshold.extend(tree.threshold.tolist())
+        self.left.extend(np.where(is_leaf, -1, tree.children_left + offset).tolist())
+        self.right.extend(np.where(is_leaf, -1, tree.children_right + offset).tolist())
+        self.value.extend(np.where(is_leaf, leaf_values, 0.0).tolist())
+
+    def add_xgboost_tree(self, node):
+        offset = len(self.feature)
+        self.roots.append(offset)
+        nodes = {}
+
+        def collect(n):
+            nodes[n["nodeid"]] = n
+            for child in n.get("children", []):
+                collect(child)
+
+        collect(node)
+        index = {nodeid: offset + i for i, nodeid in enumerate(sorted(nodes))}
+        for nodeid in sorted(nodes):
+            n = nodes[nodeid]
+            if "leaf" in n:
+                self.feature.append(-1)
+                self.threshold.append(0.0)
+                self.left.append(-1)
+                self.right.append(-1)
+                self.value.append(float(n["leaf"]))
+            else:
+                self.feature.append(int(n["split"].lstrip("f")))
+                self.threshold.append(float(np.float32(n["split_condition"])))
+                self.left.append(index[n["yes"]])
+                self.right.append(index[n["no"]])
+                self.value.append(0.0)
+
+    def arrays(self):
+        return {
+            "feature": np.asarray(self.feature, dtype=np.int32),
+            "threshold": np.asarray(self.threshold, dtype=np.float64),
+            "left": np.asarray(self.left, dtype=np.int32),
+            "right": np.asarray(self.right, dtype=np.int32),
+            "value": np.asarray(self.value, dtype=np.float64),
+            "roots": np.asarray(self.roots, dtype=np.int32),
+        }
+
+
+def _class_one_fraction(tree):
+    values = tree.value[:, 0, :]
+    totals = values.sum(axis=1)
+    return np.divide(values[:, 1], totals, out=np.zeros_like(totals), where=totals > 0)
+
+
+def compile_model(model, n_features: int) -> "CompiledModel":
+    """
+    Flatten a fitted binary classifier into NumPy arrays.
+
+    Supports the families tuned by `optuna_search`: DecisionTree, RandomForest,
+    GradientBoosting, AdaBoost, XGBoost and LogisticRegression. Nothing from
+    scikit-learn or XGBoost is imported here; the fitted estimator is only
+    introspected.
+    """
+    name = type(model).__name__
+    builder = _TreeBuilder()
+    params = {"base": 0.0, "strict": False, "n_features": n_features}
+
+    if name == "LogisticRegression":
+        return CompiledModel(
+            LINEAR,
+            {"coef": np.asarray(model.coef_[0], dtype=np.float64)},
+            base=float(model.intercept_[0]),
+            n_features=n_features,
+        )
+    elif name == "DecisionTreeClassifier":
+        builder.add_sklearn_tree(model.tree_, _class_one_fraction(model.tree_))
+        kind = MEAN_PROBA
+    elif name == "RandomForestClassifier":
+        for estimator in model.estimators_:
+            builder.add_sklearn_tree(estimator.tree_, _class_one_fraction(estimator.tree_))
+        kind = MEAN_PROBA
+    elif name == "GradientBoostingClassifier":
+        for estimator in model.estimators_[:, 0]:
+            builder.add_sklearn_tree(estimator.tree_, model.learning_rate * estimator.tree_.value[:, 0, 0])
+        kind = LOGIT_SUM
+    elif name == "AdaBoostClassifier":
+        total_weight = model.estimator_weights_.sum()
+        for estimator, weight in zip(model.estimators_, model.estimator_weights_):
+            tree = estimator.tree_
+            predicts_one = tree.value[:, 0, 1] > tree.value[:, 0, 0]
+            builder.add_sklearn_tree(tree, np.where(predicts_one, 2.0, -2.0) * weight / total_weight)
+        kind = LOGIT_SUM
+    elif name == "XGBClassifier":
+        for dump in model.get_booster().get_dump(dump_format="json"):
+            builder.add_xgboost_tree(json.loads(dump))
+        kind = LOGIT_SUM
+        params["strict"] = True
+    else:
+        raise ValueError(f"Model {name} cannot be compiled.")
+
+    compiled = CompiledModel(kind, builder.arrays(), **params)
+
+    if name in ("GradientBoostingClassifier", "XGBClassifier"):
+        # The initial raw score is not exposed uniformly, so recover it from the
+        # estimator's own margin on a probe row.
+        probe = np.zeros((1, n_features))
+        if name == "XGBClassifier":
+            margin = model.predict(probe, output_margin=True)
+        else:
+            margin = model.decision_function(probe)
+        compiled.base = float(np.ravel(margin)[0] - compiled.raw_scores(probe)[0])
+
+    return compiled
+
+
+class CompiledModel:
+    """Tree ensemble or linear model stored as flat arrays, evaluated with NumPy (or the native kernel)."""
+
+    def __init__(
+        self,
+        kind: str,
+        arrays: dict,
+        base: float = 0.0,
+        strict: bool = False,
+        n_features: int = 0,
+        max_depth: int = None,
+    ):
+        self.kind = kind
+        self.arrays = arrays
+        self.base = base
+        self.strict = strict
+        self.n_features = n_features
+        if max_depth is None and kind != LINEAR:
+            max_depth = _max_depth(arrays)
+        self.max_depth = max_depth or 0
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            kind=np.array(self.kind),
+            base=np.array(self.base),
+            strict=np.array(self.strict),
+            n_features=np.array(self.n_features),
+            max_depth=np.array(self.max_depth),
+            **self.arrays,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledModel":
+        with np.load(path) as data:
+            scalars = ("kind", "base", "strict", "n_features", "max_depth")
+            arrays = {key: data[key] for key in data.files if key not in scalars}
+            return cls(
+                str(data["kind"]),
+                arrays,
+                base=float(data["base"]),
+                strict=bool(data["strict"]),
+                n_features=int(data["n_features"]),
+                max_depth=int(data["max_depth"]),
+            )
+
+    def _prepare(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        # scikit-learn and XGBoost both compare float32 features against thresholds.
+        return np.ascontiguousarray(X.astype(np.float32).astype(np.float64))
+
+    def raw_scores(self, X):
+        if self.kind == LINEAR:
+            return np.asarray(X, dtype=np.float64) @ self.arrays["coef"] + self.base
+        X = self._prepare(X)
+        kernel = _load_tree_kernel()
+        if kernel is not None:
+            return _native_tree_sum(kernel, self, X)
+        return self._numpy_tree_sum(X)
+
+    def _numpy_tree_sum(self, X):
+        a = self.arrays
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(a["roots"], (X.shape[0], len(a["roots"]))).copy()
+        for _ in range(self.max_depth):
+            features = a["feature"][nodes]
+            internal = features >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.where(internal, features, 0)]
+            thresholds = a["threshold"][nodes]
+            go_left = x < thresholds if self.strict else x <= thresholds
+            nodes = np.where(internal, np.where(go_left, a["left"][nodes], a["right"][nodes]), nodes)
+        return a["value"][nodes].sum(axis=1)
+
+    def predict_proba(self, X):
+        """Class-1 probability per row."""
+        scores = self.raw_scores(X)
+        if self.kind == MEAN_PROBA:
+            return scores / len(self.arrays["roots"])
+        return _sigmoid(scores + (self.base if self.kind == LOGIT_SUM else 0.0))
+
+
+def _max_depth(arrays) -> int:
+    depth = np.zeros(len(arrays["feature"]), dtype=np.int32)
+    # Children always come after their parent in both the scikit-learn and XGBoost layouts.
+    for node in range(len(arrays["feature"])):
+        if arrays["feature"][node] >= 0:
+            depth[arrays["left"][node]] = depth[node] + 1
+            depth[arrays["right"][node]] = depth[node] + 1
+    return int(depth.max()) + 1 if len(depth) else 0
+
+
+_TREE_KERNEL = None
+_TREE_KERNEL_LOADED = False
+
+
+def _load_tree_kernel():
+    global _TREE_KERNEL, _TREE_KERNEL_LOADED
+    if _TREE_KERNEL_LOADED:
+        return _TREE_KERNEL
+    _TREE_KERNEL_LOADED = True
+    try:
+        lib_ext = ".dll" if platform.system() == "Windows" else ".so"
+        optimizer_lib = ctypes.CDLL(f"./simd_entropy{lib_ext}")
+        kernel = optimizer_lib.evaluate_tree_ensemble
+        c_double_p = ctypes.POINTER(ctypes.c_double)
+        c_int_p = ctypes.POINTER(ctypes.c_int)
+        kernel.argtypes = [
+            c_double_p, ctypes.c_int, ctypes.c_int,
+            c_int_p, c_double_p, c_int_p, c_int_p, c_double_p,
+            c_int_p, ctypes.c_int, ctypes.c_bool, c_double_p,
+        ]
+        kernel.restype = None
+        _TREE_KERNEL = kernel
+    except (OSError, AttributeError) as e:
+        logger.info(f"Native tree kernel not available ({e}); using the NumPy evaluator.")
+    return _TREE_KERNEL
+
+
+def _native_tree_sum(kernel, model, X):
+    a = model.arrays
+    out = np.empty(X.shape[0], dtype=np.float64)
+    c_double_p = ctypes.POINTER(ctypes.c_double)
+    c_int_p = ctypes.POINTER(ctypes.c_int)
+    kernel(
+        X.ctypes.data_as(c_double_p), X.shape[0], X.shape[1],
+        a["feature"].ctypes.data_as(c_int_p),
+        a["threshold"].ctypes.data_as(c_double_p),
+        a["left"].ctypes.data_as(c_int_p),
+        a["right"].ctypes.data_as(c_int_p),
+        a["value"].ctypes.data_as(c_double_p),
+        a["roots"].ctypes.data_as(c_int_p),
+        len(a["roots"]),
+        model.strict,
+        out.ctypes.data_as(c_double_p),
+    )
+    return out
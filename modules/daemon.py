@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", "/tmp"), f"secrets-detector-{os.getuid()}.sock"
+)
+
+# Every message, in both directions, is a 4-byte big-endian length followed by
+# that many bytes of UTF-8 JSON.
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# A scored finding blocks a commit when the heuristic flags it or the
+# classifier is at least this confident.
+ML_POSITIVE_PROBABILITY = 0.5
+
+
+def send_message(sock, payload: dict):
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock) -> dict:
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes exceeds the {MAX_MESSAGE_BYTES} byte limit.")
+    return json.loads(_recv_exactly(sock, size).decode("utf-8"))
+
+
+def request(payload: dict, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 60.0) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        send_message(sock, payload)
+        return recv_message(sock)
+
+
+class ScanEngine:
+    """Compiled rules, the native entropy handle and the classifier, loaded once and kept resident."""
+
+    def __init__(self, model_path: str = None):
+        from modules.entropy import cpp_entropy_loader
+        from modules.metrics import ScanMetrics
+        from modules.scanner import DEFAULT_MODEL_PATH, load_classifier
+
+        cpp_entropy_loader()
+        model_path = model_path or DEFAULT_MODEL_PATH
+        self.classifier = load_classifier(model_path) if os.path.exists(model_path) else None
+        self.metrics = ScanMetrics()
+
+    def scan(self, paths, score: bool = False) -> dict:
+        from modules.metrics import ScanMetrics
+        from modules.scanner import iter_files, scan_file
+
+        request_metrics = ScanMetrics()
+        findings = []
+        for filepath in iter_files(paths):
+            findings.extend(
+                scan_file(filepath, metrics=request_metrics, score=score, classifier=self.classifier)
+            )
+        self.metrics.merge(request_metrics)
+        return {"findings": findings, "metrics": request_metrics.to_dict()}
+
+    def handle(self, message: dict, server=None) -> dict:
+        command = message.get("command", "scan")
+        if command == "scan":
+            return self.scan(message.get("paths", []), score=message.get("score", False))
+        if command == "ping":
+            return {"status": "ok", "pid": os.getpid()}
+        if command == "metrics":
+            from modules.memo import memo_stats
+
+            report = self.metrics.to_dict()
+            report["cache"] = memo_stats()
+            return {"metrics": report}
+        if command == "shutdown":
+            if server is not None:
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            return {"status": "shutting down"}
+        return {"error": f"Unknown command {command}."}
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, model_path: str = None):
+    import socketserver
+
+    engine = ScanEngine(model_path)
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            try:
+                message = recv_message(self.request)
+                response = engine.handle(message, self.server)
+            except (ValueError, ConnectionError) as e:
+                response = {"error": str(e)}
+            try:
+                send_message(self.request, response)
+            except OSError as e:
+                print(f"[ERROR] Could not reply to client: {e}", file=sys.stderr)
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    os.chmod(socket_path, 0o600)
+    print(f"[INFO] Secrets detector daemon listening on {socket_path} (pid {os.getpid()}).", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def scan_via_daemon(paths, socket_path: str = DEFAULT_SOCKET_PATH, score: bool = False) -> dict:
+    """Scan through the daemon if one is listening, otherwise fall back to an in-process scan."""
+    absolute_paths = [os.path.abspath(path) for path in paths]
+    try:
+        return request({"command": "scan", "paths": absolute_paths, "score": score}, socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("[WARNING] Secrets detector daemon is not running; scanning in-process.", file=sys.stderr)
+        return ScanEngine().scan(absolute_paths, score=score)
+
+
+def is_positive(finding: dict) -> bool:
+    if finding.get("heuristic_is_secret"):
+        return True
+    return finding.get("ml_probability", 0.0) >= ML_POSITIVE_PROBABILITY
+
+
+def export_staged(paths, directory: str) -> list:
+    """
+    Write the index content (`git show :path`) of each staged path under
+    `directory`, keeping its relative path so it is classified by its real
+    name; returns the written paths.
+    """
+    exported = []
+    for path in paths:
+        blob = subprocess.run(["git", "show", f":{path}"], capture_output=True, check=True).stdout
+        target = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(blob)
+        exported.append(target)
+    return exported
+
+
+def scan_staged(paths, socket_path: str = DEFAULT_SOCKET_PATH, score: bool = False) -> dict:
+    """`scan_via_daemon` over the staged content of `paths`, reported under their repository paths."""
+    with tempfile.TemporaryDirectory(prefix="secrets-detector-staged-") as directory:
+        directory = os.path.realpath(directory)
+        response = scan_via_daemon(export_staged(paths, directory), socket_path, score=score)
+        for finding in response.get("findings", []):
+            finding["file"] = os.path.relpath(finding["file"], directory)
+    return response
+
+
+def parse_daemon_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived secrets scanning daemon and its client.")
+    parser.add_argument("--socket", type=str, default=DEFAULT_SOCKET_PATH, help="Unix domain socket path.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Start the daemon in the foreground.")
+    serve_parser.add_argument("--model", type=str, default=None, help="Classifier to keep loaded.")
+
+    scan_parser = subparsers.add_parser("scan", help="Scan files through the daemon.")
+    scan_parser.add_argument("paths", nargs="*", help="Files or directories to scan.")
+    scan_parser.add_argument(
+        "--score",
+        action="store_true",
+        help="Run the entropy and ML stages; only positive findings then fail the scan.",
+    )
+    scan_parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Scan the content staged in the git index for these repository paths, not the working tree.",
+    )
+
+    subparsers.add_parser("ping", help="Check that the daemon is alive.")
+    subparsers.add_parser("metrics", help="Print the daemon's aggregate scan metrics.")
+    subparsers.add_parser("stop", help="Shut the daemon down.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    arguments = parse_daemon_arguments(argv)
+    if arguments.command == "serve":
+        serve(arguments.socket, arguments.model)
+        return 0
+    if arguments.command == "scan":
+        if not arguments.paths:
+            return 0
+        scan = scan_staged if arguments.staged else scan_via_daemon
+        response = scan(arguments.paths, arguments.socket, score=arguments.score)
+        if "error" in response:
+            print(f"[ERROR] {response['error']}", file=sys.stderr)
+            return 2
+        # Unscored, every rule match counts; scored, only the ones judged secret.
+        blocking = [f for f in response["findings"] if is_positive(f)] if arguments.score else response["findings"]
+        for finding in blocking:
+            print(json.dumps(finding))
+        return 1 if blocking else 0
+
+    command = "shutdown" if arguments.command == "stop" else arguments.command
+    print(json.dumps(request({"command": command}, arguments.socket), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.exit(main())
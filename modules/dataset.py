@@ -0,0 +1,50 @@
+import glob
+import os
+
+import numpy as np
+
+from modules.features import extract_candidate_from_line, get_features_batch
+
+DEFAULT_DATASET_PATH = "secrets_dataset.csv"
+
+
+def dataset_files(path: str) -> list:
+    """`path` itself, or the shards written by `generate_dataset.py --mode shards` if it is a directory."""
+    if not os.path.isdir(path):
+        return [path]
+    files = sorted(
+        glob.glob(os.path.join(path, "shard-*.csv")) + glob.glob(os.path.join(path, "shard-*.parquet"))
+    )
+    if not files:
+        raise FileNotFoundError(f"No dataset shards found in {path}")
+    return files
+
+
+def iter_dataset_chunks(path: str, chunksize: int = 100_000):
+    """Yield `text`/`label` DataFrames of at most `chunksize` rows, one file at a time."""
+    import pandas as pd
+
+    for file in dataset_files(path):
+        if file.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=chunksize, columns=["text", "label"]):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(file, chunksize=chunksize)
+
+
+def load_features(path: str = DEFAULT_DATASET_PATH, chunksize: int = 100_000):
+    """
+    Feature matrix (float32) and labels for a CSV dataset or a shard directory.
+    Raw text is only held one chunk at a time; what stays resident is the
+    10-column feature matrix.
+    """
+    feature_blocks, label_blocks = [], []
+    for chunk in iter_dataset_chunks(path, chunksize):
+        candidates = chunk["text"].apply(extract_candidate_from_line)
+        feature_blocks.append(get_features_batch(candidates).astype(np.float32))
+        label_blocks.append(chunk["label"].to_numpy(dtype=np.int64))
+    if not feature_blocks:
+        raise ValueError(f"Dataset {path} is empty.")
+    return np.concatenate(feature_blocks), np.concatenate(label_blocks)
@@ -2,24 +2,90 @@ import ctypes
 import platform
 import math
 import string
+import sys
 from collections import Counter
+from functools import lru_cache
 import logging
 
+from modules.memo import get_memo
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Candidate charsets, smallest first, with their alphabet sizes; a string
+# belongs to the first one holding all of its characters ('=' is base64
+# padding). The order matches the native engine's charset ids.
+CHARSETS = ("other", "hex", "alnum", "base64", "base64url")
+CHARSET_SIZES = {"hex": 16, "alnum": 62, "base64": 64, "base64url": 64}
+CHARSET_CHARS = {
+    "hex": frozenset(string.hexdigits),
+    "alnum": frozenset(string.ascii_letters + string.digits),
+    "base64": frozenset(string.ascii_letters + string.digits + "+/="),
+    "base64url": frozenset(string.ascii_letters + string.digits + "-_="),
+}
+
+# Strings of a restricted charset at least this long must also come close to
+# the entropy of a random string of the same charset and length. The raw
+# floors keep the fixed 4.0 bits for the larger alphabets, so the charset test
+# only ever removes their positives; hex, which can never reach 4.0 bits, gets
+# a floor of its own. Calibrated on the standard library's identifiers and
+# hex literals: random keys of 24+ characters pass at 0.98 or better, and
+# strings like "1234567890123456" or "ThisIsAVariableName" do not.
+ADAPTIVE_MIN_LENGTH = 24
+NORMALIZED_ENTROPY_THRESHOLD = 0.92
+CHARSET_ENTROPY_FLOORS = {"hex": 3.0, "alnum": 4.0, "base64": 4.0, "base64url": 4.0}
+EXPECTED_TABLE_LENGTH = 512
+
+
+@lru_cache(maxsize=None)
+def expected_entropy(alphabet_size: int, length: int) -> float:
+    """
+    Expected Shannon entropy of `length` characters drawn uniformly from
+    `alphabet_size` symbols, the same table the native engine builds. Lengths
+    past EXPECTED_TABLE_LENGTH use its last entry.
+    """
+    n = min(length, EXPECTED_TABLE_LENGTH)
+    if n <= 0:
+        return 0.0
+    # H = log2(n) - (k / n) * E[c log2 c], with c ~ Binomial(n, 1/k).
+    p = 1.0 / alphabet_size
+    q = 1.0 - p
+    pmf = q**n
+    total = 0.0
+    for c in range(1, n + 1):
+        pmf *= (n - c + 1) / c * (p / q)
+        total += pmf * c * math.log2(c)
+    return math.log2(n) - alphabet_size / n * total
+
+
+def detect_charset(chars) -> str:
+    """The smallest of CHARSETS holding every character in `chars` (a set or Counter)."""
+    for charset in CHARSETS[1:]:
+        if CHARSET_CHARS[charset].issuperset(chars):
+            return charset
+    return "other"
+
+
+def normalized_entropy(entropy: float, charset: str, length: int) -> float:
+    """`entropy` over the expected entropy of a random string of `charset`; 0.0 for "other"."""
+    if charset == "other":
+        return 0.0
+    return entropy / expected_entropy(CHARSET_SIZES[charset], length)
+
+
+def adaptive_verdict(charset: str, length: int, entropy: float, normalized: float):
+    """The charset verdict, or None when the fixed thresholds decide instead."""
+    if charset == "other" or length < ADAPTIVE_MIN_LENGTH:
+        return None
+    return entropy > CHARSET_ENTROPY_FLOORS[charset] and normalized > NORMALIZED_ENTROPY_THRESHOLD
+
 
 class SecretsDetectorPython:
 
     BASE64_CHARS = set(string.ascii_letters + string.digits + "+/")
 
     @staticmethod
-    def _calculate_entropy(text: str) -> float:
-        if not text:
-            return 0.0
-
-        length = len(text)
-        counts = Counter(text)
+    def _entropy_from_counts(counts, length: int) -> float:
         entropy = 0.0
 
         for count in counts.values():
@@ -28,6 +94,35 @@ class SecretsDetectorPython:
 
         return entropy
 
+    @classmethod
+    def _calculate_entropy(cls, text: str) -> float:
+        if not text:
+            return 0.0
+        return cls._entropy_from_counts(Counter(text), len(text))
+
+    @classmethod
+    def verdict_for_secrets(cls, text: str) -> tuple:
+        """
+        `(overall_entropy, cpp_heuristic_is_secret)` as `analyze_for_secrets` would
+        report them, skipping the window statistics and the base64 scan and
+        stopping as soon as the verdict is fixed.
+        """
+        length = len(text)
+        if length < 8:
+            return 0.0, False
+
+        counts = Counter(text)
+        overall_entropy = cls._entropy_from_counts(counts, length)
+        charset = detect_charset(counts)
+        verdict = adaptive_verdict(
+            charset, length, overall_entropy, normalized_entropy(overall_entropy, charset, length)
+        )
+        if verdict is not None:
+            return overall_entropy, verdict
+        # A 32-character window holds at most 32 symbols, so its entropy never
+        # exceeds log2(32) == 5.0: the `> 5.0` window clause cannot decide the verdict.
+        return overall_entropy, overall_entropy > 4.0
+
     @staticmethod
     def _detect_api_key_pattern(text: str) -> bool:
         if len(text) < 20:
@@ -55,12 +150,17 @@ class SecretsDetectorPython:
             "high_entropy_regions": 0,
             "cpp_heuristic_is_secret": False,
             "is_base64_pattern": False,
+            "charset": "other",
+            "normalized_entropy": 0.0,
         }
 
         if length < 8:
             return result
 
-        result["overall_entropy"] = cls._calculate_entropy(text)
+        counts = Counter(text)
+        result["overall_entropy"] = cls._entropy_from_counts(counts, length)
+        result["charset"] = detect_charset(counts)
+        result["normalized_entropy"] = normalized_entropy(result["overall_entropy"], result["charset"], length)
 
         window_size = 32
         entropy_threshold = 4.5
@@ -81,9 +181,14 @@ class SecretsDetectorPython:
         result["max_substring_entropy"] = max_entropy
         result["high_entropy_regions"] = high_entropy_count
 
-        result["cpp_heuristic_is_secret"] = (result["overall_entropy"] > 4.0) or (
-            high_entropy_count > 0 and result["max_substring_entropy"] > 5.0
+        verdict = adaptive_verdict(
+            result["charset"], length, result["overall_entropy"], result["normalized_entropy"]
         )
+        if verdict is None:
+            verdict = (result["overall_entropy"] > 4.0) or (
+                high_entropy_count > 0 and result["max_substring_entropy"] > 5.0
+            )
+        result["cpp_heuristic_is_secret"] = verdict
 
         result["is_base64_pattern"] = cls._detect_api_key_pattern(text)
 
@@ -96,9 +201,12 @@ class EntropyAnalysis(ctypes.Structure):
         ("max_substring_entropy", ctypes.c_double),
         ("high_entropy_regions", ctypes.c_int),
         ("likely_secret", ctypes.c_bool),
+        ("normalized_entropy", ctypes.c_double),
+        ("charset", ctypes.c_int),
     ]
 
 
+@lru_cache(maxsize=None)
 def cpp_entropy_loader():
     CPP_OPTIMIZER_LOADED = False
     _analyze_string_for_secrets_cpp = None
@@ -118,7 +226,7 @@ def cpp_entropy_loader():
         _detect_api_key_pattern_avx2_cpp.restype = ctypes.c_bool
 
         CPP_OPTIMIZER_LOADED = True
-        print("[INFO] C++ secret analysis engine loaded successfully.")
+        print("[INFO] C++ secret analysis engine loaded successfully.", file=sys.stderr)
 
     except (OSError, AttributeError) as e:
         logger.warning(f"C++ analysis engine not found or failed to load ({e}).")
@@ -131,6 +239,50 @@ def cpp_entropy_loader():
     )
 
 
+@lru_cache(maxsize=None)
+def cpp_batch_loader():
+    try:
+        lib_ext = ".dll" if platform.system() == "Windows" else ".so"
+        optimizer_lib = ctypes.CDLL(f"./simd_entropy{lib_ext}")
+
+        _analyze_strings_batch_cpp = optimizer_lib.analyze_strings_batch
+        _analyze_strings_batch_cpp.argtypes = [
+            ctypes.c_char_p,
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.c_int,
+            ctypes.POINTER(EntropyAnalysis),
+            ctypes.POINTER(ctypes.c_bool),
+        ]
+        _analyze_strings_batch_cpp.restype = None
+        return _analyze_strings_batch_cpp
+    except (OSError, AttributeError) as e:
+        logger.info(f"C++ batch analysis not available ({e}).")
+        return None
+
+
+@lru_cache(maxsize=None)
+def cpp_verdict_loader():
+    try:
+        lib_ext = ".dll" if platform.system() == "Windows" else ".so"
+        optimizer_lib = ctypes.CDLL(f"./simd_entropy{lib_ext}")
+
+        _verdict_strings_batch_cpp = optimizer_lib.verdict_strings_batch
+        _verdict_strings_batch_cpp.argtypes = [
+            ctypes.c_char_p,
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.POINTER(ctypes.c_bool),
+        ]
+        _verdict_strings_batch_cpp.restype = None
+        return _verdict_strings_batch_cpp
+    except (OSError, AttributeError) as e:
+        logger.info(f"C++ verdict analysis not available ({e}).")
+        return None
+
+
 def cpp_wrapper(text: str):
     (
         CPP_OPTIMIZER_LOADED,
@@ -151,11 +303,16 @@ def cpp_wrapper(text: str):
             "is_base64_pattern": _detect_api_key_pattern_avx2_cpp(
                 encoded_text, len(encoded_text)
             ),
+            "charset": CHARSETS[analysis_result.charset],
+            "normalized_entropy": analysis_result.normalized_entropy,
         }
     else:
         return None
 
 
+_analysis_memo = get_memo("analyze_string")
+
+
 def analyze_string(text: str) -> dict:
     if not text:
         return {
@@ -164,10 +321,251 @@ def analyze_string(text: str) -> dict:
             "high_entropy_regions": 0,
             "cpp_heuristic_is_secret": False,
             "is_base64_pattern": False,
+            "charset": "other",
+            "normalized_entropy": 0.0,
         }
 
+    cached = _analysis_memo.lookup(text)
+    if cached is not None:
+        return dict(cached)
+
     cpp_result = cpp_wrapper(text)
     if cpp_result:
-        return cpp_result
+        result = cpp_result
+    else:
+        result = SecretsDetectorPython.analyze_for_secrets(text)
+    _analysis_memo.store(text, result)
+    return dict(result)
+
+
+def analyze_strings(texts) -> list:
+    """
+    `analyze_string` over many strings. With the C++ engine the whole batch is
+    one native call on a packed buffer, which holds the GIL only while packing
+    and unpacking, so several scanner threads can analyze concurrently. Strings
+    already in the `analyze_string` memo are not sent to the engine again.
+    """
+    texts = list(texts)
+    batch = cpp_batch_loader()
+    if batch is None or not texts:
+        return [analyze_string(text) for text in texts]
+
+    results = [_analysis_memo.lookup(text) if text else None for text in texts]
+    pending = list({text: None for text, result in zip(texts, results) if result is None})
+    computed = dict(zip(pending, _analyze_batch(batch, pending))) if pending else {}
+    for text, result in computed.items():
+        _analysis_memo.store(text, result)
+    return [
+        dict(result if result is not None else computed[text])
+        for text, result in zip(texts, results)
+    ]
+
+
+def _analyze_batch(batch, texts) -> list:
+    buffer, offsets, lengths, count = _pack(texts)
+    results = (EntropyAnalysis * count)()
+    base64_flags = (ctypes.c_bool * count)()
+
+    batch(buffer, offsets, lengths, count, results, base64_flags)
+
+    return [
+        {
+            "overall_entropy": result.overall_entropy,
+            "max_substring_entropy": result.max_substring_entropy,
+            "high_entropy_regions": result.high_entropy_regions,
+            "cpp_heuristic_is_secret": result.likely_secret,
+            "is_base64_pattern": base64_flag,
+            "charset": CHARSETS[result.charset],
+            "normalized_entropy": result.normalized_entropy,
+        }
+        for result, base64_flag in zip(results, base64_flags)
+    ]
+
+
+def _pack(texts):
+    encoded = [text.encode("utf-8") for text in texts]
+    count = len(encoded)
+    lengths = (ctypes.c_int * count)(*map(len, encoded))
+    offsets = (ctypes.c_int * count)()
+    position = 0
+    for i, data in enumerate(encoded):
+        offsets[i] = position
+        position += len(data)
+    return b"".join(encoded), offsets, lengths, count
+
+
+def verdict_strings(texts) -> list:
+    """
+    `(overall_entropy, cpp_heuristic_is_secret)` per string: the verdict-only
+    mode of both engines, for callers that do not need the full statistics of
+    `analyze_strings` (feature extraction does). Memoized full analyses are
+    reused when present.
+    """
+    texts = list(texts)
+    verdicts = [None] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        cached = _analysis_memo.lookup(text) if text else None
+        if cached is not None:
+            verdicts[i] = (cached["overall_entropy"], cached["cpp_heuristic_is_secret"])
+        else:
+            pending.append(i)
+    if not pending:
+        return verdicts
+
+    batch = cpp_verdict_loader()
+    if batch is None:
+        for i in pending:
+            verdicts[i] = SecretsDetectorPython.verdict_for_secrets(texts[i])
+        return verdicts
+
+    buffer, offsets, lengths, count = _pack([texts[i] for i in pending])
+    entropies = (ctypes.c_double * count)()
+    flags = (ctypes.c_bool * count)()
+    batch(buffer, offsets, lengths, count, entropies, flags)
+    for slot, i in enumerate(pending):
+        verdicts[i] = (entropies[slot], flags[slot])
+    return verdicts
+
+
+# Engines differ in how they look for high-entropy windows and base64 runs:
+# the native one steps windows by 8 bytes and only counts base64 runs in
+# whole, 32-byte aligned blocks; the Python one checks every offset.
+WINDOW_STEPS = {"native": 8, "python": 1}
+TOKEN_BLOCK_ROWS = 4096
+
+
+def token_array_engine() -> str:
+    """The engine `analyze_string` uses, whose semantics `analyze_token_array` reproduces by default."""
+    return "native" if cpp_entropy_loader()[0] else "python"
+
+
+def _byte_lookup(chars):
+    import numpy as np
+
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars.encode("ascii"), dtype=np.uint8)] = True
+    return table
+
+
+def _rows_histogram(block):
+    """(rows, 256) byte counts of a 2-D uint8 array, from one offset bincount."""
+    import numpy as np
+
+    rows = block.shape[0]
+    keys = (np.arange(rows, dtype=np.int64)[:, None] * 256 + block).ravel()
+    return np.bincount(keys, minlength=rows * 256).reshape(rows, 256)
+
+
+def _rows_entropy(block, xlogx, counts=None):
+    """Shannon entropy of each row of a 2-D uint8 array (or of its precomputed `counts`)."""
+    import numpy as np
+
+    width = block.shape[1]
+    if counts is None:
+        counts = _rows_histogram(block)
+    # H = log2(n) - sum(c * log2(c)) / n, with c * log2(c) tabulated for c <= n.
+    return np.log2(width) - xlogx[counts].sum(axis=1) / width
+
+
+def _rows_charset(counts):
+    """Index into CHARSETS of each row's charset, read off its histogram."""
+    import numpy as np
+
+    present = counts > 0
+    charset = np.zeros(len(counts), dtype=np.int64)
+    # Largest first, so the smallest matching charset is written last.
+    for index in range(len(CHARSETS) - 1, 0, -1):
+        outside = ~_byte_lookup("".join(sorted(CHARSET_CHARS[CHARSETS[index]])))
+        charset[~(present & outside).any(axis=1)] = index
+    return charset
+
+
+def analyze_token_array(tokens, engine: str = None) -> dict:
+    """
+    `analyze_string` statistics for a 2-D uint8 array of equal-length tokens
+    (one row each), as arrays: overall_entropy, max_substring_entropy,
+    high_entropy_regions, cpp_heuristic_is_secret, max_base64_run and
+    is_base64_pattern. Histograms are built for all rows at once with an offset
+    `np.bincount`; the only Python loops run over window positions and columns,
+    never over rows. `engine` ("native" or "python") picks which engine's
+    window stride and base64 rule to follow; by default the one in use. The
+    charset and normalized_entropy arrays come from the same histograms.
+    """
+    import numpy as np
+
+    tokens = np.ascontiguousarray(tokens, dtype=np.uint8)
+    if tokens.ndim != 2:
+        raise ValueError(f"Expected a 2-D array of tokens, got shape {tokens.shape}.")
+    engine = engine or token_array_engine()
+    if engine not in WINDOW_STEPS:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {sorted(WINDOW_STEPS)}.")
+    rows, length = tokens.shape
+    window_size = 32
+    result = {
+        "overall_entropy": np.zeros(rows),
+        "max_substring_entropy": np.zeros(rows),
+        "high_entropy_regions": np.zeros(rows, dtype=np.int64),
+        "cpp_heuristic_is_secret": np.zeros(rows, dtype=bool),
+        "max_base64_run": np.zeros(rows, dtype=np.int64),
+        "is_base64_pattern": np.zeros(rows, dtype=bool),
+        "charset": np.full(rows, "other", dtype=object),
+        "normalized_entropy": np.zeros(rows),
+    }
+    if length < 8 or rows == 0:
+        return result
+
+    charset_ids = np.zeros(rows, dtype=np.int64)
+    expected = np.array([0.0] + [expected_entropy(CHARSET_SIZES[c], length) for c in CHARSETS[1:]])
+
+    xlogx = np.zeros(length + 1)
+    xlogx[1:] = np.arange(1, length + 1) * np.log2(np.arange(1, length + 1))
+    is_base64 = _byte_lookup("".join(sorted(SecretsDetectorPython.BASE64_CHARS)))
+    starts = range(0, length - window_size + 1, WINDOW_STEPS[engine])
+
+    # Rows are processed in blocks so the (rows, 256) histograms stay small.
+    for first in range(0, rows, TOKEN_BLOCK_ROWS):
+        block = tokens[first : first + TOKEN_BLOCK_ROWS]
+        span = slice(first, first + len(block))
+        counts = _rows_histogram(block)
+        result["overall_entropy"][span] = _rows_entropy(block, xlogx, counts)
+        charset_ids[span] = _rows_charset(counts)
+
+        max_entropy = np.zeros(len(block))
+        regions = np.zeros(len(block), dtype=np.int64)
+        for start in starts:
+            window_entropy = _rows_entropy(block[:, start : start + window_size], xlogx)
+            regions += window_entropy > 4.5
+            np.maximum(max_entropy, window_entropy, out=max_entropy)
+        result["max_substring_entropy"][span] = max_entropy
+        result["high_entropy_regions"][span] = regions
+
+        mask = is_base64[block]
+        run = np.zeros(len(block), dtype=np.int64)
+        best = np.zeros(len(block), dtype=np.int64)
+        for column in range(length):
+            run = (run + 1) * mask[:, column]
+            np.maximum(best, run, out=best)
+        result["max_base64_run"][span] = best
+        if engine == "python":
+            result["is_base64_pattern"][span] = best >= 20
+        elif length >= 20:
+            whole_blocks = length // 32
+            aligned = mask[:, : whole_blocks * 32].reshape(len(block), whole_blocks, 32)
+            result["is_base64_pattern"][span] = aligned.all(axis=2).any(axis=1)
+
+    restricted = charset_ids > 0
+    result["charset"] = np.array(CHARSETS, dtype=object)[charset_ids]
+    result["normalized_entropy"][restricted] = result["overall_entropy"][restricted] / expected[charset_ids[restricted]]
+    fixed = (result["overall_entropy"] > 4.0) | (
+        (result["high_entropy_regions"] > 0) & (result["max_substring_entropy"] > 5.0)
+    )
+    if length >= ADAPTIVE_MIN_LENGTH:
+        floors = np.array([0.0] + [CHARSET_ENTROPY_FLOORS[c] for c in CHARSETS[1:]])
+        adaptive = (result["overall_entropy"] > floors[charset_ids]) & (
+            result["normalized_entropy"] > NORMALIZED_ENTROPY_THRESHOLD
+        )
+        result["cpp_heuristic_is_secret"] = np.where(restricted, adaptive, fixed)
     else:
-        return SecretsDetectorPython.analyze_for_secrets(text)
+        result["cpp_heuristic_is_secret"] = fixed
+    return result
@@ -0,0 +1,90 @@
+import string
+import re
+
+from modules.entropy import analyze_string, analyze_token_array
+from modules.memo import get_memo
+
+_features_memo = get_memo("get_features")
+
+
+def get_features(s: str):
+    cached = _features_memo.lookup(s)
+    if cached is not None:
+        return list(cached)
+    analysis = analyze_string(s)
+    features = [
+        sum(c.isdigit() for c in s) / len(s),
+        sum(c.islower() for c in s) / len(s),
+        sum(c.isupper() for c in s) / len(s),
+        sum(c in string.punctuation for c in s) / len(s),
+        analysis["overall_entropy"],
+        analysis["max_substring_entropy"],
+        float(analysis["high_entropy_regions"]),
+        float(analysis["cpp_heuristic_is_secret"]),
+        float(analysis["is_base64_pattern"]),
+        len(s),
+    ]
+    _features_memo.store(s, features)
+    return list(features)
+
+
+def get_features_array(tokens):
+    """
+    `get_features` for a 2-D uint8 array of equal-length ASCII tokens, as an
+    (n_tokens, 10) float64 array computed without a Python loop per token.
+    """
+    import numpy as np
+
+    tokens = np.asarray(tokens, dtype=np.uint8)
+    analysis = analyze_token_array(tokens)
+    length = tokens.shape[1]
+    features = np.empty((tokens.shape[0], 10))
+    for column, chars in enumerate((string.digits, string.ascii_lowercase, string.ascii_uppercase, string.punctuation)):
+        table = np.zeros(256, dtype=np.int64)
+        table[list(chars.encode("ascii"))] = 1
+        features[:, column] = table[tokens].sum(axis=1) / length
+    features[:, 4] = analysis["overall_entropy"]
+    features[:, 5] = analysis["max_substring_entropy"]
+    features[:, 6] = analysis["high_entropy_regions"]
+    features[:, 7] = analysis["cpp_heuristic_is_secret"]
+    features[:, 8] = analysis["is_base64_pattern"]
+    features[:, 9] = length
+    return features
+
+
+def get_features_batch(strings):
+    """
+    `get_features` for many strings as an (n, 10) float64 array. ASCII strings
+    are grouped by length and go through `get_features_array`; the others (and
+    empty strings) take the per-string path.
+    """
+    import numpy as np
+
+    strings = list(strings)
+    features = np.empty((len(strings), 10))
+    by_length = {}
+    for i, s in enumerate(strings):
+        if s and s.isascii():
+            by_length.setdefault(len(s), []).append(i)
+        else:
+            features[i] = get_features(s)
+    for length, rows in by_length.items():
+        encoded = "".join(strings[i] for i in rows).encode("ascii")
+        tokens = np.frombuffer(encoded, dtype=np.uint8).reshape(len(rows), length)
+        features[rows] = get_features_array(tokens)
+    return features
+
+
+def extract_candidate_from_line(line: str):
+    patterns = [
+        r'["\'](.*?)["\']',
+        r"[:=]\s*(\S+)",
+        r"(\S+)",
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, line)
+        if match:
+            for group in match.groups():
+                if group:
+                    return group
+    return line
@@ -0,0 +1,88 @@
+import os
+from collections import namedtuple
+
+SKIP = "skip"
+TEXT = "text"
+BYTES = "bytes"
+ARCHIVE = "archive"
+
+FileClass = namedtuple("FileClass", ["route", "reason"])
+
+SAMPLE_SIZE = 8192
+CONTROL_BYTE_RATIO = 0.3
+
+# Generated files whose integrity hashes and checksums are noise to every rule.
+SKIP_FILENAMES = {
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "go.sum",
+}
+
+# (signature, offset, kind, route). Encoded media cannot contain plaintext
+# secrets and are skipped; archives and compressed streams are opened and their
+# members scanned (see modules.archives); executables and databases can embed
+# string literals and get a bytes-only scan.
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", 0, "png", SKIP),
+    (b"\xff\xd8\xff", 0, "jpeg", SKIP),
+    (b"GIF87a", 0, "gif", SKIP),
+    (b"GIF89a", 0, "gif", SKIP),
+    (b"RIFF", 0, "riff", SKIP),
+    (b"\x00\x00\x01\x00", 0, "ico", SKIP),
+    (b"OggS", 0, "ogg", SKIP),
+    (b"fLaC", 0, "flac", SKIP),
+    (b"ID3", 0, "mp3", SKIP),
+    (b"ftyp", 4, "mp4", SKIP),
+    (b"wOFF", 0, "woff", SKIP),
+    (b"wOF2", 0, "woff2", SKIP),
+    (b"PK\x03\x04", 0, "zip", ARCHIVE),
+    (b"\x1f\x8b", 0, "gzip", ARCHIVE),
+    (b"BZh", 0, "bzip2", ARCHIVE),
+    (b"\xfd7zXZ\x00", 0, "xz", ARCHIVE),
+    (b"7z\xbc\xaf\x27\x1c", 0, "7z", SKIP),
+    (b"\x28\xb5\x2f\xfd", 0, "zstd", SKIP),
+    (b"ustar", 257, "tar", ARCHIVE),
+    (b"%PDF-", 0, "pdf", BYTES),
+    (b"\x7fELF", 0, "elf", BYTES),
+    (b"\xcf\xfa\xed\xfe", 0, "mach-o", BYTES),
+    (b"\xca\xfe\xba\xbe", 0, "java-class", BYTES),
+    (b"\x00asm", 0, "wasm", BYTES),
+    (b"SQLite format 3\x00", 0, "sqlite", BYTES),
+]
+
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 12, 13))
+
+
+def classify_bytes(sample: bytes, filename: str = "") -> FileClass:
+    basename = os.path.basename(filename)
+    if basename in SKIP_FILENAMES:
+        return FileClass(SKIP, "lockfile")
+
+    for signature, offset, kind, route in MAGIC_NUMBERS:
+        if sample.startswith(signature, offset):
+            return FileClass(route, kind)
+
+    if not sample:
+        return FileClass(TEXT, "empty")
+    if b"\x00" in sample:
+        return FileClass(BYTES, "NUL bytes")
+    if len(sample) - len(sample.translate(None, _CONTROL_BYTES)) > CONTROL_BYTE_RATIO * len(sample):
+        return FileClass(BYTES, "control bytes")
+
+    # Text of any line length is scanned the same way: long lines, as in
+    # minified bundles, are split into bounded windows (modules.chunker).
+    return FileClass(TEXT, "text")
+
+
+def classify_file(filepath, sample_size: int = SAMPLE_SIZE) -> FileClass:
+    """Route a file to skip, archive, bytes-only or text scanning from its first few KB."""
+    with open(filepath, "rb") as f:
+        sample = f.read(sample_size)
+    return classify_bytes(sample, filepath)
@@ -0,0 +1,327 @@
+import csv
+import hashlib
+import io
+import json
+import math
+import threading
+from array import array
+
+UNSCORED = -1
+
+
+def value_digest(value: str) -> str:
+    """SHA-256 of a matched value; values from undecodable bytes carry surrogate escapes."""
+    return hashlib.sha256(value.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+class FindingsTable:
+    """
+    Findings stored column-wise: integer columns in `array`s, file paths and rule
+    types interned into small lookup tables, and one list of matched values.
+    A finding costs a few dozen bytes instead of a dict per match.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.types = []
+        self._file_ids = {}
+        self._type_ids = {}
+        self.file_id = array("I")
+        self.type_id = array("H")
+        self.line = array("Q")
+        self.column = array("Q")
+        self.values = []
+        self.entropy = array("d")
+        self.heuristic = array("b")
+        self.ml_probability = array("d")
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self.row(i)
+
+    def _intern(self, table, ids, key):
+        index = ids.get(key)
+        if index is None:
+            index = ids[key] = len(table)
+            table.append(key)
+        return index
+
+    def append(self, filepath, line, column, secret_type, value):
+        self.file_id.append(self._intern(self.files, self._file_ids, filepath))
+        self.type_id.append(self._intern(self.types, self._type_ids, secret_type))
+        self.line.append(line)
+        self.column.append(column)
+        self.values.append(value)
+        self.entropy.append(math.nan)
+        self.heuristic.append(UNSCORED)
+        self.ml_probability.append(math.nan)
+
+    def set_scores(self, start, entropies, heuristics, probabilities=None):
+        for offset, (entropy, heuristic) in enumerate(zip(entropies, heuristics)):
+            self.entropy[start + offset] = entropy
+            self.heuristic[start + offset] = int(heuristic)
+        if probabilities is not None:
+            for offset, probability in enumerate(probabilities):
+                self.ml_probability[start + offset] = probability
+
+    def scored(self, i) -> bool:
+        """Whether row `i` went through the entropy stage (not unscored, nor decided by its key name)."""
+        return self.heuristic[i] != UNSCORED and not math.isnan(self.entropy[i])
+
+    def row(self, i) -> dict:
+        finding = {
+            "file": self.files[self.file_id[i]],
+            "line": self.line[i],
+            "column": self.column[i],
+            "type": self.types[self.type_id[i]],
+            "value": self.values[i],
+        }
+        if self.heuristic[i] != UNSCORED:
+            # Rows decided by their key name skip the entropy stage.
+            if not math.isnan(self.entropy[i]):
+                finding["entropy"] = self.entropy[i]
+            finding["heuristic_is_secret"] = bool(self.heuristic[i])
+        if not math.isnan(self.ml_probability[i]):
+            finding["ml_probability"] = self.ml_probability[i]
+        return finding
+
+    def to_dicts(self) -> list:
+        return list(self)
+
+    def shift_lines(self, offset: int):
+        """Add `offset` to every line number, e.g. to place a range scanned on its own."""
+        for i in range(len(self.line)):
+            self.line[i] += offset
+
+    def rename_file(self, old: str, new: str):
+        """Report findings under `old` (and archive members inside it) as `new`."""
+        for i, path in enumerate(self.files):
+            if path == old or path.startswith(old + "!/"):
+                self.files[i] = new + path[len(old) :]
+        self._file_ids = {path: i for i, path in enumerate(self.files)}
+
+    def write_table(self, other: "FindingsTable"):
+        """Append every row of `other`, re-interning its files and types."""
+        file_map = [self._intern(self.files, self._file_ids, f) for f in other.files]
+        type_map = [self._intern(self.types, self._type_ids, t) for t in other.types]
+        self.file_id.extend(file_map[i] for i in other.file_id)
+        self.type_id.extend(type_map[i] for i in other.type_id)
+        self.line.extend(other.line)
+        self.column.extend(other.column)
+        self.values.extend(other.values)
+        self.entropy.extend(other.entropy)
+        self.heuristic.extend(other.heuristic)
+        self.ml_probability.extend(other.ml_probability)
+
+    def close(self):
+        pass
+
+
+class FindingsWriter:
+    """Base for streaming writers: findings are encoded as they arrive, never collected."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, finding: dict):
+        raise NotImplementedError
+
+    def write_table(self, table: FindingsTable):
+        for finding in table:
+            self.write(finding)
+
+    def close(self):
+        self.stream.flush()
+
+
+class NDJSONWriter(FindingsWriter):
+    def write(self, finding: dict):
+        self.stream.write(json.dumps(finding) + "\n")
+        self.count += 1
+
+
+class CSVWriter(FindingsWriter):
+    FIELDS = ["file", "line", "column", "type", "value", "entropy", "heuristic_is_secret", "ml_probability"]
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._writer = csv.DictWriter(stream, fieldnames=self.FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, finding: dict):
+        self._writer.writerow(finding)
+        self.count += 1
+
+
+class SARIFWriter(FindingsWriter):
+    """
+    SARIF 2.1.0. Results are streamed first and the tool's rule list, which is
+    only known at the end, is written after them (member order is not significant
+    in JSON). Secret values are reported as a SHA-256 fingerprint, never in clear.
+    """
+
+    SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._rules = {}
+        self.stream.write(
+            '{"version": "2.1.0", "$schema": "%s", "runs": [{"results": [' % self.SCHEMA
+        )
+
+    def write(self, finding: dict):
+        self._rules.setdefault(finding["type"], len(self._rules))
+        result = {
+            "ruleId": finding["type"],
+            "ruleIndex": self._rules[finding["type"]],
+            "level": "error" if finding.get("heuristic_is_secret") else "warning",
+            "message": {"text": f"Possible {finding['type']} detected."},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": finding["file"]},
+                        "region": {"startLine": finding["line"], "startColumn": finding.get("column", 1)},
+                    }
+                }
+            ],
+            "partialFingerprints": {
+                "secretHash/v1": value_digest(finding["value"])
+            },
+        }
+        properties = {
+            key: finding[key] for key in ("entropy", "ml_probability") if key in finding
+        }
+        if properties:
+            result["properties"] = properties
+        self.stream.write(("," if self.count else "") + json.dumps(result))
+        self.count += 1
+
+    def close(self):
+        rules = [{"id": rule_id} for rule_id in self._rules]
+        tool = {"driver": {"name": "SecretsDetector", "rules": rules}}
+        self.stream.write('], "tool": %s}]}\n' % json.dumps(tool))
+        super().close()
+
+
+class ValueIndex:
+    """
+    Findings grouped by the SHA-256 of their value.
+
+    Serves two purposes: a verdict cache, so each distinct value is scored once
+    however many files repeat it, and an output sink (`write_table`) that
+    reports every distinct value once with all of its occurrences. Plaintext is
+    only kept when `keep_values` is set. Safe to share between threads.
+    """
+
+    def __init__(self, keep_values: bool = False):
+        self.keep_values = keep_values
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, digest):
+        entry = self._entries.get(digest)
+        if entry is None:
+            entry = self._entries[digest] = {"verdict": None, "value": None, "occurrences": []}
+        return entry
+
+    def lookup(self, value: str):
+        """The cached (entropy, heuristic, ml_probability) of `value`, or None."""
+        entry = self._entries.get(value_digest(value))
+        return entry["verdict"] if entry is not None else None
+
+    def remember(self, value: str, entropy: float, heuristic: bool, ml_probability: float = math.nan):
+        with self._lock:
+            self._entry(value_digest(value))["verdict"] = (entropy, bool(heuristic), ml_probability)
+
+    def write_table(self, table: FindingsTable):
+        with self._lock:
+            for i, value in enumerate(table.values):
+                entry = self._entry(value_digest(value))
+                if self.keep_values:
+                    entry["value"] = value
+                # A key-name verdict belongs to its config entry, not to the value.
+                if entry["verdict"] is None and table.scored(i):
+                    entry["verdict"] = (table.entropy[i], bool(table.heuristic[i]), table.ml_probability[i])
+                entry["occurrences"].append(
+                    (table.files[table.file_id[i]], table.line[i], table.column[i], table.types[table.type_id[i]])
+                )
+
+    def grouped(self):
+        """Yield one report per distinct value, most repeated first."""
+        entries = sorted(self._entries.items(), key=lambda item: -len(item[1]["occurrences"]))
+        for digest, entry in entries:
+            if not entry["occurrences"]:
+                continue
+            report = {
+                "value_sha256": digest,
+                "types": sorted({occurrence[3] for occurrence in entry["occurrences"]}),
+                "count": len(entry["occurrences"]),
+            }
+            if entry["value"] is not None:
+                report["value"] = entry["value"]
+            if entry["verdict"] is not None:
+                entropy, heuristic, ml_probability = entry["verdict"]
+                if not math.isnan(entropy):
+                    report["entropy"] = entropy
+                report["heuristic_is_secret"] = heuristic
+                if not math.isnan(ml_probability):
+                    report["ml_probability"] = ml_probability
+            report["occurrences"] = [
+                {"file": file, "line": line, "column": column, "type": secret_type}
+                for file, line, column, secret_type in entry["occurrences"]
+            ]
+            yield report
+
+    def close(self):
+        pass
+
+
+class TeeSink:
+    """Hands each table to several sinks, e.g. an output writer and a Baseline being recorded."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write_table(self, table: FindingsTable):
+        for sink in self.sinks:
+            sink.write_table(table)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+WRITERS = {
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "sarif": SARIFWriter,
+}
+
+
+def open_writer(output_format: str, stream) -> FindingsWriter:
+    if output_format not in WRITERS:
+        raise ValueError(
+            f"Output format {output_format} is not supported. Supported formats are: {list(WRITERS)}"
+        )
+    return WRITERS[output_format](stream)
+
+
+def iter_encoded(table: FindingsTable, output_format: str, rows_per_chunk: int = 1000):
+    """Yield the encoded table in text chunks, for streaming HTTP responses."""
+    buffer = io.StringIO()
+    writer = open_writer(output_format, buffer)
+    for i in range(len(table)):
+        writer.write(table.row(i))
+        if writer.count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    writer.close()
+    yield buffer.getvalue()
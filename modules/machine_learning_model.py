@@ -1,25 +1,38 @@
-from typing import Any, Dict, Tuple, Union
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    classification_report,
-    confusion_matrix,
-)
-import mlflow
+from typing import TYPE_CHECKING, Any, Dict, Tuple, Union
+import importlib
 import os
-import seaborn as sns
-import matplotlib.pyplot as plt
-import ml_collections
 import datetime
 
-import joblib
+if TYPE_CHECKING:
+    import ml_collections
 
 
+class _LazyModule:
+    """Defers importing a heavy tracking/plotting dependency until first attribute access."""
 
-def model_selector(model_name, model_params={}) -> Union[object, None]:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+mlflow = _LazyModule("mlflow")
+sns = _LazyModule("seaborn")
+plt = _LazyModule("matplotlib.pyplot")
+
+
+# Families whose estimators parallelise internally through an `n_jobs` parameter.
+N_JOBS_MODELS = {"RandomForest", "KNN", "XGBoost", "LightGBM", "LogisticRegression"}
+
+
+def model_selector(model_name, model_params={}, n_jobs=None) -> Union[object, None]:
     print(f"Selecting model: {model_name} with params: {model_params}")
+    if n_jobs is not None and model_name in N_JOBS_MODELS:
+        model_params = {**model_params, "n_jobs": n_jobs}
     if model_name == "RandomForest":
         from sklearn.ensemble import RandomForestClassifier
 
@@ -60,6 +73,24 @@ def model_selector(model_name, model_params={}) -> Union[object, None]:
         raise ValueError(f"Model {model_name} is not supported.")
 
 
+def compute_metrics(y_test, y_pred) -> Dict[str, Any]:
+    from sklearn.metrics import (
+        accuracy_score,
+        precision_score,
+        recall_score,
+        f1_score,
+        classification_report,
+    )
+
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, average="weighted"),
+        "recall": recall_score(y_test, y_pred, average="weighted"),
+        "f1_score": f1_score(y_test, y_pred, average="weighted"),
+        "classification_report": classification_report(y_test, y_pred),
+    }
+
+
 class MachineLearningModel(object):
     """
     A class to represent a traditional machine learning model.
@@ -67,14 +98,15 @@ class MachineLearningModel(object):
 
     def __init__(
         self,
-        global_configs: ml_collections.ConfigDict,
+        global_configs: "ml_collections.ConfigDict",
         model_name: str,
         model_params: Dict[str, Any] = {},
         trial_id=None,
+        n_jobs=None,
     ):
         self.global_configs = global_configs
         model_params["random_state"] = self.global_configs.seed
-        self.model = model_selector(model_name, model_params)
+        self.model = model_selector(model_name, model_params, n_jobs=n_jobs)
         if self.model is None:
             raise ValueError(f"Model {model_name} is not supported.")
         self.model_name = model_name
@@ -139,13 +171,11 @@ class MachineLearningModel(object):
         return self.model.predict(X_test)
 
     def evaluate(self, X_test, y_test):
+        from sklearn.metrics import confusion_matrix
+
         y_pred = self.predict(X_test)
 
-        self.metrics["accuracy"] = accuracy_score(y_test, y_pred)
-        self.metrics["precision"] = precision_score(y_test, y_pred, average="weighted")
-        self.metrics["recall"] = recall_score(y_test, y_pred, average="weighted")
-        self.metrics["f1_score"] = f1_score(y_test, y_pred, average="weighted")
-        self.metrics["classification_report"] = classification_report(y_test, y_pred)
+        self.metrics.update(compute_metrics(y_test, y_pred))
 
         print("Classification Report:")
         print(self.metrics["classification_report"])
@@ -190,3 +220,16 @@ class MachineLearningModel(object):
             self.evaluate(X_test, y_test)
 
         return self.metrics
+
+    def log_cross_validation(self, metrics: Dict[str, Any], n_folds: int):
+        """Log fold-averaged metrics as one mlflow run."""
+        mlflow.set_experiment(self.experiment_name)
+        experiment = mlflow.get_experiment_by_name(self.experiment_name)
+
+        with mlflow.start_run(experiment_id=experiment.experiment_id):
+            self.__init_mlflow()
+            mlflow.log_param("n_folds", n_folds)
+            mlflow.log_metric("Accuracy", metrics["accuracy"])
+            mlflow.log_metric("Precision", metrics["precision"])
+            mlflow.log_metric("Recall", metrics["recall"])
+            mlflow.log_metric("F1 Score", metrics["f1_score"])
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Entries per memo; 0 disables memoization (for benchmarking the raw kernels).
+DEFAULT_CAPACITY = int(os.getenv("SECRETS_DETECTOR_MEMO_SIZE", "65536"))
+
+
+def memo_key(text: str) -> bytes:
+    """16-byte BLAKE2b digest of `text`, so long candidates are not kept alive as keys."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+
+
+class LRUMemo:
+    """Bounded, thread-safe least-recently-used cache keyed by `memo_key`."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def lookup(self, text: str):
+        """The cached value for `text`, or None (also when the memo is disabled)."""
+        if not self.enabled:
+            return None
+        key = memo_key(text)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def store(self, text: str, value):
+        if not self.enabled:
+            return
+        key = memo_key(text)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def resize(self, capacity: int):
+        with self._lock:
+            self.capacity = capacity
+            while len(self._entries) > max(capacity, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+MEMOS = {}
+
+
+def get_memo(name: str) -> LRUMemo:
+    memo = MEMOS.get(name)
+    if memo is None:
+        memo = MEMOS.setdefault(name, LRUMemo(DEFAULT_CAPACITY))
+    return memo
+
+
+def configure_memos(capacity: int):
+    """Resize every memo; `configure_memos(0)` turns memoization off."""
+    for memo in MEMOS.values():
+        memo.resize(capacity)
+    global DEFAULT_CAPACITY
+    DEFAULT_CAPACITY = capacity
+
+
+def memo_stats() -> dict:
+    return {name: {"hits": memo.hits, "misses": memo.misses} for name, memo in MEMOS.items()}
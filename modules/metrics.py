@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+STAGES = ("classify", "read", "decode", "regex", "entropy", "ml")
+
+METRIC_PREFIX = "secrets_detector"
+
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def emit_metric(lines: list, name: str, metric_type: str, help_text: str, samples):
+    """Append one metric family in Prometheus text format to `lines`."""
+    full_name = f"{METRIC_PREFIX}_{name}"
+    lines.append(f"# HELP {full_name} {help_text}")
+    lines.append(f"# TYPE {full_name} {metric_type}")
+    for labels, value in samples:
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        lines.append(f"{full_name}{{{label_str}}} {value}" if label_str else f"{full_name} {value}")
+
+
+def percentile(sorted_values, quantile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(quantile * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class ScanMetrics:
+    """
+    Counters and per-stage timers for one scan (or an aggregate of many).
+
+    Each scan owns its own instance; aggregates are built with `merge`, which is
+    the only operation that needs the lock, so worker threads and processes never
+    write to shared state while scanning.
+    """
+
+    def __init__(self, max_latency_samples: int = 10000):
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        self.secrets_found = 0
+        self.findings_suppressed = 0
+        self.scan_duration_seconds = 0.0
+        self.stage_seconds = defaultdict(float)
+        self.findings_by_type = defaultdict(int)
+        self.files_by_route = defaultdict(int)
+        self.file_latencies = deque(maxlen=max_latency_samples)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+        self.truncated_scans = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stage_seconds[stage] += seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[stage] += time.perf_counter() - start
+
+    def record_finding(self, secret_type: str):
+        self.secrets_found += 1
+        self.findings_by_type[secret_type] += 1
+
+    def record_suppressed(self):
+        """A match was accepted by the baseline and dropped before scoring."""
+        self.findings_suppressed += 1
+
+    def record_route(self, route: str):
+        self.files_by_route[route] += 1
+
+    def record_cache(self, cache: str, hits: int, misses: int):
+        self.cache_hits[cache] += hits
+        self.cache_misses[cache] += misses
+
+    def record_truncation(self, reason: str):
+        """A scan stopped early on a budget ("bytes" or "time"); its findings are partial."""
+        self.truncated_scans[reason] += 1
+
+    def record_file(self, num_bytes: int, seconds: float):
+        self.files_scanned += 1
+        self.bytes_scanned += num_bytes
+        self.scan_duration_seconds += seconds
+        self.file_latencies.append(seconds)
+
+    def merge(self, other: "ScanMetrics"):
+        with self._lock:
+            self.files_scanned += other.files_scanned
+            self.bytes_scanned += other.bytes_scanned
+            self.secrets_found += other.secrets_found
+            self.findings_suppressed += other.findings_suppressed
+            self.scan_duration_seconds += other.scan_duration_seconds
+            for stage, seconds in other.stage_seconds.items():
+                self.stage_seconds[stage] += seconds
+            for secret_type, count in other.findings_by_type.items():
+                self.findings_by_type[secret_type] += count
+            for route, count in other.files_by_route.items():
+                self.files_by_route[route] += count
+            self.file_latencies.extend(other.file_latencies)
+            for cache, hits in other.cache_hits.items():
+                self.cache_hits[cache] += hits
+            for cache, misses in other.cache_misses.items():
+                self.cache_misses[cache] += misses
+            for reason, count in other.truncated_scans.items():
+                self.truncated_scans[reason] += count
+        return self
+
+    def latency_quantiles(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.file_latencies)
+        return {q: percentile(latencies, q) for q in LATENCY_QUANTILES}
+
+    def throughput(self) -> dict:
+        if self.scan_duration_seconds <= 0:
+            return {"bytes_per_second": 0.0, "files_per_second": 0.0}
+        return {
+            "bytes_per_second": self.bytes_scanned / self.scan_duration_seconds,
+            "files_per_second": self.files_scanned / self.scan_duration_seconds,
+        }
+
+    def to_dict(self) -> dict:
+        quantiles = self.latency_quantiles()
+        with self._lock:
+            report = {
+                "files_scanned": self.files_scanned,
+                "bytes_scanned": self.bytes_scanned,
+                "secrets_found": self.secrets_found,
+                "findings_suppressed": self.findings_suppressed,
+                "scan_duration_seconds": self.scan_duration_seconds,
+                "stage_seconds": {stage: self.stage_seconds.get(stage, 0.0) for stage in STAGES},
+                "findings_by_type": dict(self.findings_by_type),
+                "files_by_route": dict(self.files_by_route),
+                "truncated_scans": dict(self.truncated_scans),
+                "cache": {
+                    cache: {"hits": self.cache_hits.get(cache, 0), "misses": self.cache_misses.get(cache, 0)}
+                    for cache in sorted(set(self.cache_hits) | set(self.cache_misses))
+                },
+            }
+        report.update(self.throughput())
+        report["file_latency_seconds"] = {
+            f"p{int(q * 100)}": value for q, value in quantiles.items()
+        }
+        return report
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        report = self.to_dict()
+        lines = []
+
+        def emit(name, metric_type, help_text, samples):
+            emit_metric(lines, name, metric_type, help_text, samples)
+
+        emit("files_scanned_total", "counter", "Files scanned.", [({}, report["files_scanned"])])
+        emit("bytes_scanned_total", "counter", "Bytes read from scanned files.", [({}, report["bytes_scanned"])])
+        emit("secrets_found_total", "counter", "Findings reported.", [({}, report["secrets_found"])])
+        emit(
+            "findings_suppressed_total",
+            "counter",
+            "Matches dropped because the baseline accepts them.",
+            [({}, report["findings_suppressed"])],
+        )
+        emit(
+            "scan_duration_seconds_total",
+            "counter",
+            "Wall-clock time spent scanning files.",
+            [({}, report["scan_duration_seconds"])],
+        )
+        emit(
+            "stage_seconds_total",
+            "counter",
+            "Time spent per scan stage.",
+            [({"stage": stage}, seconds) for stage, seconds in report["stage_seconds"].items()],
+        )
+        emit(
+            "findings_total",
+            "counter",
+            "Findings per rule type.",
+            [({"type": t}, count) for t, count in sorted(report["findings_by_type"].items())],
+        )
+        emit(
+            "files_by_route_total",
+            "counter",
+            "Files per classifier route (text, bytes, archive, skip).",
+            [({"route": r}, count) for r, count in sorted(report["files_by_route"].items())],
+        )
+        emit(
+            "scans_truncated_total",
+            "counter",
+            "Scans cut short by a byte or time budget, returning partial findings.",
+            [({"reason": r}, count) for r, count in sorted(report["truncated_scans"].items())],
+        )
+        emit(
+            "cache_hits_total",
+            "counter",
+            "Memoized entropy/feature lookups served from the cache.",
+            [({"cache": c}, stats["hits"]) for c, stats in report["cache"].items()],
+        )
+        emit(
+            "cache_misses_total",
+            "counter",
+            "Memoized entropy/feature lookups that had to be computed.",
+            [({"cache": c}, stats["misses"]) for c, stats in report["cache"].items()],
+        )
+        emit("bytes_per_second", "gauge", "Average scan throughput in bytes.", [({}, report["bytes_per_second"])])
+        emit("files_per_second", "gauge", "Average scan throughput in files.", [({}, report["files_per_second"])])
+        emit(
+            "file_latency_seconds",
+            "summary",
+            "Per-file scan latency over the most recent files.",
+            [({"quantile": str(q)}, v) for q, v in self.latency_quantiles().items()],
+        )
+        return "\n".join(lines) + "\n"
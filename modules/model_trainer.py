@@ -16,50 +16,41 @@ SECRETS_DETECTOR_ROOT = os.getenv(
 sys.path.append(SECRETS_DETECTOR_ROOT)
 import numpy as np
 import random
-from modules.machine_learning_model import MachineLearningModel
+from modules.machine_learning_model import MachineLearningModel, compute_metrics
 import ml_collections
 from typing import Dict, Any
 
-import string
-import re
-from entropy import analyze_string
+from modules.compiled_model import compile_model
+from modules.dataset import DEFAULT_DATASET_PATH, load_features
+from modules.features import extract_candidate_from_line, get_features
 from sklearn.model_selection import train_test_split
-import pandas as pd
 import joblib
 import yaml
 import json
+import time
+import timeit
 
 
-def get_features(s: str):
-    analysis = analyze_string(s)
-    features = [
-        sum(c.isdigit() for c in s) / len(s),
-        sum(c.islower() for c in s) / len(s),
-        sum(c.isupper() for c in s) / len(s),
-        sum(c in string.punctuation for c in s) / len(s),
-        analysis["overall_entropy"],
-        analysis["max_substring_entropy"],
-        float(analysis["high_entropy_regions"]),
-        float(analysis["cpp_heuristic_is_secret"]),
-        float(analysis["is_base64_pattern"]),
-        len(s),
-    ]
-    return features
-
-
-def extract_candidate_from_line(line: str):
-    patterns = [
-        r'["\'](.*?)["\']',
-        r"[:=]\s*(\S+)",
-        r"(\S+)",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, line)
-        if match:
-            for group in match.groups():
-                if group:
-                    return group
-    return line
+# Rows in the fixed feature batch used to time inference during tuning.
+INFERENCE_BATCH_SIZE = 4096
+
+
+def evaluate_fold(estimator, X, y, train_index, test_index) -> Dict[str, float]:
+    """Fit a fresh clone of `estimator` on one fold; runs in a joblib worker."""
+    from sklearn.base import clone
+
+    model = clone(estimator)
+    model.fit(X[train_index], y[train_index])
+    metrics = compute_metrics(y[test_index], model.predict(X[test_index]))
+    del metrics["classification_report"]
+    return metrics
+
+
+def average_metrics(fold_metrics) -> Dict[str, float]:
+    return {
+        key: sum(fold[key] for fold in fold_metrics) / len(fold_metrics)
+        for key in fold_metrics[0]
+    }
 
 
 class ModelTrainer:
@@ -77,8 +68,21 @@ class ModelTrainer:
         self.model_params = model_params
         self.is_best_model = is_best_model
         self.model_name = config.model_name
-        self.model = MachineLearningModel(config, self.model_name, model_params)
+        self.n_folds = config.get("n_folds", 1)
+
+        # Cores are split between folds running in parallel and the estimator's
+        # own n_jobs, so the two levels never oversubscribe the machine.
+        n_jobs = config.get("n_jobs", -1)
+        total_jobs = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 0 else n_jobs
+        self.fold_jobs = max(1, min(self.n_folds, total_jobs))
+        self.model = MachineLearningModel(
+            config,
+            self.model_name,
+            model_params,
+            n_jobs=max(1, total_jobs // self.fold_jobs),
+        )
         self.config = config
+        self.fit_seconds = 0.0
 
     @staticmethod
     def load_model_and_predict(text_line: str):
@@ -96,27 +100,92 @@ class ModelTrainer:
             print("[WARNING] ML model not found. Skipping false positive check.")
             return True, 1.0
 
-    def run(self):
-        df = pd.read_csv("secrets_dataset.csv")
-
-        print("Extracting features...")
-        df["candidate"] = df["text"].apply(extract_candidate_from_line)
-        features = df["candidate"].apply(get_features).tolist()
-        labels = df["label"].tolist()
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            features, labels, test_size=0.2, random_state=42, stratify=labels
+    def measure_inference(self, batch, repeats: int = 3) -> float:
+        """
+        Predictions per second on `batch` for the model the scanner would load:
+        the compiled arrays when the family compiles, else the estimator itself.
+        """
+        batch = np.asarray(batch, dtype=np.float64)
+        try:
+            predict = compile_model(self.model.model, n_features=batch.shape[1]).predict_proba
+        except ValueError:
+            predict = self.model.model.predict_proba
+        seconds = min(timeit.repeat(lambda: predict(batch), number=1, repeat=repeats))
+        return len(batch) / seconds if seconds > 0 else float("inf")
+
+    def export_compiled_model(self, n_features: int):
+        compiled_path = os.path.join(
+            SECRETS_DETECTOR_ROOT, self.config.output_dir, "secret_classifier.npz"
         )
+        try:
+            compile_model(self.model.model, n_features=n_features).save(compiled_path)
+            print(f"Compiled model saved to {compiled_path}")
+        except ValueError as e:
+            print(f"[WARNING] Could not export compiled model: {e}")
+
+    def cross_validate(self, features, labels) -> list:
+        from joblib import Parallel, delayed
+        from sklearn.model_selection import StratifiedKFold
+
+        X = np.asarray(features)
+        y = np.asarray(labels)
+        folds = StratifiedKFold(
+            n_splits=self.n_folds, shuffle=True, random_state=self.config.seed
+        ).split(X, y)
+
+        print(f"Cross-validating over {self.n_folds} folds ({self.fold_jobs} in parallel)...")
+        return Parallel(n_jobs=self.fold_jobs)(
+            delayed(evaluate_fold)(self.model.model, X, y, train_index, test_index)
+            for train_index, test_index in folds
+        )
+
+    def run(self, features=None, labels=None, fraction: float = 1.0):
+        """
+        Train and evaluate; returns the loss (1 - mean target metric).
+
+        `features`/`labels` let a caller that runs many trials extract features
+        once. With `fraction` < 1 the model only sees a stratified subsample,
+        the cheap low-fidelity evaluation of a successive-halving search. The
+        wall-clock time spent fitting and scoring is left in `self.fit_seconds`.
+        """
+        if features is None:
+            dataset_path = self.config.get("dataset_path", DEFAULT_DATASET_PATH)
+            print(f"Extracting features from {dataset_path}...")
+            features, labels = load_features(dataset_path)
+
+        if fraction < 1.0:
+            features, _, labels, _ = train_test_split(
+                features, labels, train_size=fraction, random_state=self.config.seed, stratify=labels
+            )
 
         target_metric_value = []
+        fit_start = time.perf_counter()
 
-        metrics = self.model.train_evaluate(
-            X_train,
-            y_train,
-            X_test,
-            y_test,
-        )
-        target_metric_value.append(metrics[self.config.target_metric])
+        if self.n_folds > 1:
+            fold_metrics = self.cross_validate(features, labels)
+            target_metric_value.extend(
+                fold[self.config.target_metric] for fold in fold_metrics
+            )
+            metrics = average_metrics(fold_metrics)
+            metrics["n_folds"] = self.n_folds
+            self.model.log_cross_validation(metrics, self.n_folds)
+            if self.is_best_model:
+                # Folds only estimate the loss; the saved model sees all the data.
+                self.model.train(features, labels)
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                features, labels, test_size=0.2, random_state=42, stratify=labels
+            )
+
+            metrics = self.model.train_evaluate(
+                X_train,
+                y_train,
+                X_test,
+                y_test,
+            )
+            target_metric_value.append(metrics[self.config.target_metric])
+
+        self.fit_seconds = time.perf_counter() - fit_start
 
         if len(target_metric_value) == 0:
             raise ValueError("No target metric values found. Check your data splits.")
@@ -137,6 +206,7 @@ class ModelTrainer:
             )
             joblib.dump(self.model.model, model_path)
             print(f"Model saved to {model_path}")
+            self.export_compiled_model(n_features=len(features[0]))
 
         return loss_metric
 
@@ -159,6 +229,7 @@ if __name__ == "__main__":
         with open(best_config_path, "r") as f:
             best_config = yaml.safe_load(f)
         best_config["model_name"] = best_model_params.pop("model")
+        best_model_params.pop("pareto_front", None)
     else:
         raise FileNotFoundError(f"Best config file not found: {best_config_path}")
 
@@ -15,7 +15,8 @@ import pandas as pd
 import numpy as np
 import random
 
-from modules.model_trainer import ModelTrainer
+from modules.dataset import load_features
+from modules.model_trainer import INFERENCE_BATCH_SIZE, ModelTrainer
 
 from argument_parser import parse_arguments
 import optuna
@@ -32,12 +33,48 @@ def setting_seed(reproducibility_seed: int) -> None:
     random.seed(reproducibility_seed)
 
 
-setting_seed(42)
-
-arguments = parse_arguments()
-
+def fidelity_schedule(min_fraction: float, reduction_factor: int) -> list:
+    """
+    (step, data fraction) rungs of a successive-halving search: the full data,
+    then 1/reduction_factor of it, and so on down to no less than `min_fraction`.
+    """
+    rungs = 1
+    while reduction_factor ** -rungs >= min_fraction:
+        rungs += 1
+    return [
+        (reduction_factor ** rung, reduction_factor ** (rung - rungs + 1))
+        for rung in range(rungs)
+    ]
+
+
+def time_weighted_loss(loss: float, fit_seconds: float, time_weight: float) -> float:
+    return loss + time_weight * fit_seconds
+
+
+def select_from_pareto_front(front, max_loss_regression: float):
+    """The fastest (loss, predictions/sec) trial whose loss is within `max_loss_regression` of the best."""
+    best_loss = min(trial.values[0] for trial in front)
+    candidates = [trial for trial in front if trial.values[0] <= best_loss + max_loss_regression]
+    return max(candidates, key=lambda trial: trial.values[1])
+
+
+def create_and_optimize_study(arguments, trials) -> None:
+    # Features are extracted once and shared by every trial and rung.
+    print(f"Extracting features from {arguments.dataset_path}...")
+    features, labels = load_features(arguments.dataset_path)
+
+    halving = arguments.search == "halving"
+    multi_objective = arguments.objectives == "loss_throughput"
+    if halving and multi_objective:
+        raise ValueError("Optuna cannot prune multi-objective studies; use --search full with loss_throughput.")
+    # The same rows time every trial, so throughputs are comparable.
+    inference_batch = features[:INFERENCE_BATCH_SIZE]
+    schedule = (
+        fidelity_schedule(arguments.min_fraction, arguments.reduction_factor)
+        if halving
+        else [(1, 1.0)]
+    )
 
-def create_and_optimize_study(trials) -> None:
     def objective(trial: optuna.Trial) -> float:
         suggestions = suggest_hparams(trial, arguments.model_name)
         model_name = suggestions["model_name"]
@@ -56,9 +93,28 @@ def create_and_optimize_study(trials) -> None:
             config=ml_collections_config, model_params=model_params
         )
 
-        loss = model_trainer.run()
-
-        return loss
+        total_fit_seconds = 0.0
+        for step, fraction in schedule:
+            loss = model_trainer.run(features, labels, fraction=fraction)
+            total_fit_seconds += model_trainer.fit_seconds
+            trial.set_user_attr("fit_seconds", total_fit_seconds)
+            trial.set_user_attr("data_fraction", fraction)
+            trial.set_user_attr("loss", loss)
+            value = time_weighted_loss(loss, model_trainer.fit_seconds, arguments.time_weight)
+            if halving:
+                trial.report(value, step)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+
+        if model_trainer.n_folds > 1:
+            # Cross-validation only fits clones; time a model fitted on all the data.
+            model_trainer.model.train(features, labels)
+        throughput = model_trainer.measure_inference(inference_batch)
+        trial.set_user_attr("predictions_per_second", throughput)
+
+        if multi_objective:
+            return value, throughput
+        return value
 
     storage_path = os.path.join(
         SECRETS_DETECTOR_ROOT, arguments.output_dir, "optuna_study.db"
@@ -68,24 +124,49 @@ def create_and_optimize_study(trials) -> None:
     study = optuna.create_study(
         study_name=arguments.study_name,
         load_if_exists=True,
-        direction="minimize",
+        directions=["minimize", "maximize"] if multi_objective else ["minimize"],
         storage=storage,
+        pruner=(
+            optuna.pruners.SuccessiveHalvingPruner(
+                min_resource=1, reduction_factor=arguments.reduction_factor
+            )
+            if halving
+            else None
+        ),
     )
 
     study.optimize(
         objective,
         n_trials=trials,
+        timeout=arguments.timeout,
         gc_after_trial=True,
         show_progress_bar=True,
     )
 
-    print(f"Best params: {study.best_params}")
+    if multi_objective:
+        front = study.best_trials
+        chosen = select_from_pareto_front(front, arguments.max_loss_regression)
+        best_params = dict(chosen.params)
+        best_params["pareto_front"] = [
+            {
+                "trial": trial.number,
+                "loss": trial.values[0],
+                "predictions_per_second": trial.values[1],
+                "params": trial.params,
+            }
+            for trial in sorted(front, key=lambda trial: trial.values[0])
+        ]
+        print(f"Pareto front: {len(front)} trials; chose trial {chosen.number} ({chosen.values})")
+    else:
+        best_params = study.best_params
+
+    print(f"Best params: {best_params}")
 
     best_params_path = os.path.join(
         SECRETS_DETECTOR_ROOT, arguments.output_dir, "best_params.yaml"
     )
     with open(best_params_path, "w") as f:
-        yaml.dump(study.best_params, f)
+        yaml.dump(best_params, f)
         
     config_path = os.path.join(
         SECRETS_DETECTOR_ROOT, arguments.output_dir, "best_config.yaml"
@@ -93,14 +174,15 @@ def create_and_optimize_study(trials) -> None:
     with open(config_path, "w") as f:
         yaml.dump(vars(arguments), f)
 
-    study.optimize(objective, n_trials=trials, n_jobs=1)
-
 
 if __name__ == "__main__":
+    setting_seed(42)
+    arguments = parse_arguments()
+
     if not os.path.exists(arguments.output_dir):
         os.makedirs(arguments.output_dir)
 
     print(f"Starting Optuna study with {arguments.n_trials} trials...")
     print(f"Study name: {arguments.study_name}")
     print(f"Output directory: {arguments.output_dir}")
-    create_and_optimize_study(arguments.n_trials)
+    create_and_optimize_study(arguments, arguments.n_trials)
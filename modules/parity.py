@@ -0,0 +1,172 @@
+import math
+import random
+import string
+
+from modules.entropy import (
+    SecretsDetectorPython,
+    adaptive_verdict,
+    cpp_entropy_loader,
+    cpp_wrapper,
+    detect_charset,
+    normalized_entropy,
+)
+
+# Float fields may differ by summation order only.
+ENTROPY_TOLERANCE = 1e-9
+
+FIELDS = (
+    "overall_entropy",
+    "max_substring_entropy",
+    "high_entropy_regions",
+    "cpp_heuristic_is_secret",
+    "is_base64_pattern",
+    "charset",
+    "normalized_entropy",
+)
+
+# Lengths either side of the engines' cut-offs: 8 (minimum analysed length),
+# 20 (base64 run), 24 (charset thresholds), 32 (window and AVX2 block), the
+# 8-byte window stride and the end of the expected-entropy table.
+BOUNDARY_LENGTHS = (
+    7, 8, 9, 19, 20, 21, 23, 24, 25, 31, 32, 33, 39, 40, 41, 63, 64, 65, 95, 96, 97, 511, 512, 513,
+)
+
+BASE64_ALPHABET = string.ascii_letters + string.digits + "+/"
+UNICODE_ALPHABET = "aé€𝄞日本語ñ中文😀ßΩ" + string.ascii_letters
+
+
+def _random_text(rng, alphabet, length):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def _long_runs(rng):
+    return "".join(rng.choice("ab=/x") * rng.randint(1, 80) for _ in range(rng.randint(1, 6)))
+
+
+def _base64_tail(rng):
+    # A base64 run that straddles or ends after the last whole 32-byte block.
+    return _random_text(rng, " .-", rng.randint(0, 40)) + _random_text(rng, BASE64_ALPHABET, rng.randint(20, 40))
+
+
+def _high_entropy_window(rng):
+    # 32+ distinct symbols in one window, at an offset that is not a multiple of 8.
+    return "a" * rng.randint(1, 7) + "".join(rng.sample(string.printable[:94], 40)) + "a" * rng.randint(0, 40)
+
+
+INPUT_CLASSES = {
+    "hex": lambda rng: _random_text(rng, string.hexdigits[:16], rng.choice((32, 40, 64))),
+    "base64": lambda rng: _random_text(rng, BASE64_ALPHABET, rng.randint(8, 120)),
+    "printable": lambda rng: _random_text(rng, string.printable[:94], rng.randint(0, 300)),
+    "prose": lambda rng: " ".join(_random_text(rng, string.ascii_lowercase, rng.randint(2, 9)) for _ in range(20)),
+    "boundary": lambda rng: _random_text(rng, BASE64_ALPHABET + "-_.", rng.choice(BOUNDARY_LENGTHS)),
+    "long_runs": _long_runs,
+    "base64_tail": _base64_tail,
+    "high_entropy_window": _high_entropy_window,
+    "unicode": lambda rng: _random_text(rng, UNICODE_ALPHABET, rng.randint(1, 80)),
+}
+
+
+def generate_inputs(input_class: str, count: int, seed: int = 0) -> list:
+    rng = random.Random(f"{input_class}:{seed}")
+    return [INPUT_CLASSES[input_class](rng) for _ in range(count)]
+
+
+def native_reference(text: str) -> dict:
+    """
+    What `cpp_wrapper` should return, written with the Python primitives: the
+    native engine works on UTF-8 bytes, steps its windows by 8 bytes, and only
+    flags base64 when a whole 32-byte aligned block is base64 (tail bytes after
+    the last whole block are never checked).
+    """
+    data = text.encode("utf-8").decode("latin-1")  # one code point per byte
+    length = len(data)
+    window_size = 32
+    base64 = SecretsDetectorPython.BASE64_CHARS
+    is_base64 = length >= 20 and any(
+        all(char in base64 for char in data[i : i + window_size])
+        for i in range(0, length - window_size + 1, window_size)
+    )
+    result = {
+        "overall_entropy": 0.0,
+        "max_substring_entropy": 0.0,
+        "high_entropy_regions": 0,
+        "cpp_heuristic_is_secret": False,
+        "is_base64_pattern": is_base64,
+        "charset": "other",
+        "normalized_entropy": 0.0,
+    }
+    if length < 8:
+        return result
+    entropy = SecretsDetectorPython._calculate_entropy
+    windows = [entropy(data[i : i + window_size]) for i in range(0, length - window_size + 1, 8)]
+    result["overall_entropy"] = entropy(data)
+    result["max_substring_entropy"] = max(windows, default=0.0)
+    result["high_entropy_regions"] = sum(w > 4.5 for w in windows)
+    result["charset"] = detect_charset(set(data))
+    result["normalized_entropy"] = normalized_entropy(result["overall_entropy"], result["charset"], length)
+    verdict = adaptive_verdict(result["charset"], length, result["overall_entropy"], result["normalized_entropy"])
+    if verdict is None:
+        verdict = result["overall_entropy"] > 4.0 or (
+            result["high_entropy_regions"] > 0 and result["max_substring_entropy"] > 5.0
+        )
+    result["cpp_heuristic_is_secret"] = verdict
+    return result
+
+
+def _field_mismatches(actual: dict, expected: dict, label: str) -> list:
+    mismatches = []
+    for field in FIELDS:
+        a, e = actual[field], expected[field]
+        same = math.isclose(a, e, abs_tol=ENTROPY_TOLERANCE) if isinstance(e, float) else a == e
+        if not same:
+            mismatches.append(f"{label}.{field}: {a!r} != {e!r}")
+    return mismatches
+
+
+def engine_divergences(text: str) -> list:
+    """
+    Unexplained differences between the engines for `text`; empty when they agree.
+
+    The native result must match `native_reference` on every field. For ASCII
+    text the Python engine sees the same symbols but checks every window
+    offset and every base64 run, so it must agree on the overall entropy and
+    can only find more: higher max window entropy, more high-entropy regions,
+    and a positive verdict or base64 flag wherever the native engine has one.
+    The charset and normalized entropy depend on the histogram alone, so they
+    must agree exactly.
+    """
+    if not cpp_entropy_loader()[0]:
+        raise RuntimeError("The native engine is not loaded; build simd_entropy.so first.")
+    native = cpp_wrapper(text)
+    problems = _field_mismatches(native, native_reference(text), "native")
+    if not text.isascii():
+        return problems
+
+    python = SecretsDetectorPython.analyze_for_secrets(text)
+    if not math.isclose(python["overall_entropy"], native["overall_entropy"], abs_tol=ENTROPY_TOLERANCE):
+        problems.append(f"overall_entropy: python {python['overall_entropy']!r} != native {native['overall_entropy']!r}")
+    if native["max_substring_entropy"] > python["max_substring_entropy"] + ENTROPY_TOLERANCE:
+        problems.append("max_substring_entropy: native found a window the Python engine did not")
+    if native["high_entropy_regions"] > python["high_entropy_regions"]:
+        problems.append("high_entropy_regions: native counted more windows than exist")
+    if python["charset"] != native["charset"]:
+        problems.append(f"charset: python {python['charset']!r} != native {native['charset']!r}")
+    if not math.isclose(python["normalized_entropy"], native["normalized_entropy"], abs_tol=ENTROPY_TOLERANCE):
+        problems.append("normalized_entropy: engines disagree")
+    for field in ("cpp_heuristic_is_secret", "is_base64_pattern"):
+        if native[field] and not python[field]:
+            problems.append(f"{field}: native positive, Python negative")
+    return problems
+
+
+def agreement(texts) -> dict:
+    """Share of `texts` on which both engines give the same value, per field."""
+    texts = list(texts)
+    matches = dict.fromkeys(FIELDS, 0)
+    for text in texts:
+        native = cpp_wrapper(text)
+        python = SecretsDetectorPython.analyze_for_secrets(text)
+        for field in FIELDS:
+            a, b = native[field], python[field]
+            matches[field] += math.isclose(a, b, abs_tol=ENTROPY_TOLERANCE) if isinstance(a, float) else a == b
+    return {field: count / max(1, len(texts)) for field, count in matches.items()}
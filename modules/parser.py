@@ -1,11 +1,33 @@
 import json
+import re
 import yaml
 import os
 
+from modules.archives import iter_archive_members
+from modules.chunker import iter_line_windows
+from modules.file_classifier import ARCHIVE, BYTES, SKIP, classify_file
+from modules.structured import iter_key_values
+
+PRINTABLE_RUN = re.compile(rb"[\x20-\x7e]{8,}")
+
 def parse_file(filepath):
     _, ext = os.path.splitext(filepath)
     
     try:
+        file_class = classify_file(filepath)
+        route = file_class.route
+        if route == SKIP:
+            return
+        if route == ARCHIVE:
+            yield from extract_archive_strings(filepath, file_class.reason)
+            return
+        if route == BYTES:
+            yield from extract_printable_runs(filepath)
+            return
+        if ext not in ['.json', '.yml', '.yaml'] and '.env' not in os.path.basename(filepath):
+            # Bounded windows, so a minified bundle is never one huge line.
+            yield from iter_line_chunks(filepath)
+            return
         with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
             if ext == '.json':
                 data = json.load(f)
@@ -14,12 +36,8 @@ def parse_file(filepath):
                 data = yaml.safe_load(f)
                 yield from extract_strings_from_data(data)
             elif '.env' in os.path.basename(filepath):
-                for line in f:
-                    if '=' in line:
-                        yield line.split('=', 1)[1].strip()
-            else: 
-                for line in f:
-                    yield line
+                for key_value in iter_key_values(filepath, f.read(), file_format="env"):
+                    yield key_value.value
     except Exception as e:
         print(f"[ERROR] Failed to parse {filepath}: {e}")
 
@@ -32,4 +50,32 @@ def extract_strings_from_data(data):
         for item in data:
             yield from extract_strings_from_data(item)
     elif isinstance(data, str):
-        yield data
\ No newline at end of file
+        yield data
+
+def extract_printable_runs(filepath):
+    with open(filepath, 'rb') as f:
+        yield from _printable_runs(f)
+
+def iter_line_chunks(filepath):
+    with open(filepath, 'rb') as f:
+        yield from _line_chunks(f)
+
+def extract_archive_strings(filepath, kind):
+    # Members are streamed out of the archive one after the other, never extracted to disk.
+    for _, reader, member_class in iter_archive_members(filepath, kind):
+        if member_class.route == BYTES:
+            yield from _printable_runs(reader)
+        else:
+            yield from _line_chunks(reader)
+
+def _printable_runs(f):
+    for window in iter_line_windows(f):
+        for match in PRINTABLE_RUN.finditer(window.data):
+            if match.start() < window.owned:
+                yield match.group(0).decode('ascii')
+
+def _line_chunks(f):
+    # Windows overlap by MAX_SECRET_LENGTH, so a candidate cut by one seam is
+    # yielded whole by the next window.
+    for window in iter_line_windows(f):
+        yield window.data.decode('utf-8', errors='ignore')
@@ -1,7 +1,27 @@
 import argparse
+import json
+import math
+import os
 import re
+import sys
 import time
-from collections import defaultdict
+
+from modules.chunker import RANGE_BYTES, RangeReader, byte_offsets, iter_line_windows, newline_aligned_ranges
+from modules.baseline import Baseline
+from modules.archives import ExpansionBudget, iter_archive_members
+from modules.file_classifier import ARCHIVE, BYTES, SKIP, FileClass, classify_file
+from modules.findings import UNSCORED, WRITERS, FindingsTable, TeeSink, ValueIndex, open_writer
+from modules.memo import configure_memos, memo_stats
+from modules.metrics import ScanMetrics
+from modules.structured import (
+    BENIGN,
+    MAX_STRUCTURED_BYTES,
+    SENSITIVE,
+    is_secret_like,
+    iter_key_values,
+    key_signal,
+    structured_format,
+)
 
 SECRET_PATTERNS = {
     "aws_access_key": r"AKIA[0-9A-Z]{16}",
@@ -11,30 +31,630 @@ SECRET_PATTERNS = {
     "generic_key": r"[a-zA-Z0-9\-_]{20,}"
 }
 
-metrics = {
-    "files_scanned": 0,
-    "secrets_found": 0,
-    "scan_duration_seconds": 0.0,
-    "findings_by_type": defaultdict(int)
+# Values assigned to a sensitive key in a config file that no pattern matched.
+SENSITIVE_KEY_TYPE = "sensitive_key"
+
+# Pattern types too broad to be trusted on their own: under a benign key
+# (name, url, version...) their matches are not secrets.
+WEAK_TYPES = {"generic_key"}
+
+# (entropy, heuristic, ml_probability) stored for rows decided by their key name.
+KEY_NAME_SCORES = {SENSITIVE: (math.nan, True, math.nan), BENIGN: (math.nan, False, math.nan)}
+UNSCORED_ROW = (math.nan, UNSCORED, math.nan)
+
+# Distinct values scored per call to the entropy and ML stages; a deadline is
+# checked between batches.
+SCORE_BATCH_SIZE = 4096
+
+COMPILED_PATTERNS = {
+    secret_type: re.compile(pattern) for secret_type, pattern in SECRET_PATTERNS.items()
+}
+
+BYTE_PATTERNS = {
+    secret_type: re.compile(pattern.encode("ascii"))
+    for secret_type, pattern in SECRET_PATTERNS.items()
 }
 
-def scan_file(filepath):
-    print(f"\n[INFO] Scanning {filepath}...")
-    found_secrets = []
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "secret_classifier.npz"
+)
+
+
+def load_classifier(model_path=DEFAULT_MODEL_PATH):
+    """
+    Return a batch scorer mapping candidate strings to secret probabilities.
+
+    Compiled `.npz` models need only NumPy; pickled estimators fall back to
+    joblib and pull in scikit-learn/XGBoost.
+    """
+    if not os.path.exists(model_path):
+        print(f"[WARNING] ML model not found at {model_path}. Skipping ML stage.", file=sys.stderr)
+        return None
+
+    from modules.features import get_features
+
+    if model_path.endswith(".npz"):
+        from modules.compiled_model import CompiledModel
+
+        model = CompiledModel.load(model_path)
+        predict = model.predict_proba
+    else:
+        import joblib
+
+        estimator = joblib.load(model_path)
+        predict = lambda features: estimator.predict_proba(features)[:, 1]
+
+    def classify(values):
+        return [float(p) for p in predict([get_features(value) for value in values])]
+
+    return classify
+
+
+def find_matches(line):
+    for secret_type, pattern in COMPILED_PATTERNS.items():
+        for match in pattern.finditer(line):
+            yield secret_type, match
+
+
+def _past(deadline) -> bool:
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def score_table(table, start, metrics, classifier=None, verdicts=None, shortcuts=None, deadline=None):
+    """
+    Run the entropy (and ML) stage on rows `start:` of a FindingsTable.
+
+    With a ValueIndex as `verdicts`, each distinct value is scored once and
+    repeats, in this file or any file scanned before, reuse its verdict.
+    Only the entropy and the heuristic verdict are stored, so the engines run
+    in verdict-only mode; the classifier computes its own full features.
+    Rows in `shortcuts` (row -> SENSITIVE/BENIGN, from `_scan_key_values`) are
+    decided by their key name and skip both stages. Values are scored in
+    batches of SCORE_BATCH_SIZE; past `deadline` the remaining rows are left
+    unscored and the scan is recorded as truncated.
+    """
+    from modules.entropy import verdict_strings
+
+    values = table.values[start:]
+    if not values:
+        return table
+    shortcuts = shortcuts or {}
+    pending = {value: None for row, value in enumerate(values, start) if row not in shortcuts}
+    if verdicts is not None:
+        pending = {value: None for value in pending if verdicts.lookup(value) is None}
+    pending = list(pending)
+    scores = {}
+    for batch_start in range(0, len(pending), SCORE_BATCH_SIZE):
+        if _past(deadline):
+            metrics.record_truncation("time")
+            break
+        batch = pending[batch_start : batch_start + SCORE_BATCH_SIZE]
+        with metrics.stage("entropy"):
+            verdict_pairs = verdict_strings(batch)
+        probabilities = None
+        if classifier is not None:
+            with metrics.stage("ml"):
+                probabilities = classifier(batch)
+        for i, (value, (entropy, heuristic)) in enumerate(zip(batch, verdict_pairs)):
+            probability = probabilities[i] if probabilities is not None else math.nan
+            scores[value] = (entropy, heuristic, probability)
+            if verdicts is not None:
+                verdicts.remember(value, entropy, heuristic, probability)
+
+    rows = []
+    for row, value in enumerate(values, start):
+        if row in shortcuts:
+            rows.append(KEY_NAME_SCORES[shortcuts[row]])
+        else:
+            rows.append(scores.get(value) or (verdicts is not None and verdicts.lookup(value)) or UNSCORED_ROW)
+    table.set_scores(start, [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+    return table
+
+
+def _scan_key_values(table, filepath, metrics, start, baseline=None):
+    """
+    Use key names in a structured config file (see modules.structured): report
+    secret-like values under sensitive keys that no pattern matched, and return
+    the rows from `start` whose key name settles their verdict for score_table.
+    A row belongs to the last value starting at or before it on its line; a
+    sensitive key only settles it when that value is secret-like, so
+    placeholders such as ${VAULT_PASSWORD} are scored as usual.
+    """
+    reported = {(table.line[row], table.values[row]) for row in range(start, len(table))}
+    assignments = {}
+    for key, value, line, column in iter_key_values(filepath):
+        signal = key_signal(key)
+        assignments.setdefault(line, []).append((column, signal, value))
+        if signal == SENSITIVE and is_secret_like(value) and (line, value) not in reported:
+            if baseline is not None and baseline.suppresses(filepath, value):
+                metrics.record_suppressed()
+                continue
+            table.append(filepath, line, column, SENSITIVE_KEY_TYPE, value)
+            metrics.record_finding(SENSITIVE_KEY_TYPE)
+    shortcuts = {}
+    for row in range(start, len(table)):
+        on_line = assignments.get(table.line[row])
+        if not on_line:
+            continue
+        signal = value = None
+        for column, line_signal, line_value in sorted(on_line, key=lambda item: item[0]):
+            if column > table.column[row]:
+                break
+            signal, value = line_signal, line_value
+        if signal == SENSITIVE and is_secret_like(value):
+            shortcuts[row] = signal
+        elif signal == BENIGN and table.types[table.type_id[row]] in WEAK_TYPES:
+            shortcuts[row] = signal
+    return shortcuts
+
+
+def find_byte_matches(chunk):
+    for secret_type, pattern in BYTE_PATTERNS.items():
+        for match in pattern.finditer(chunk):
+            yield secret_type, match
+
+
+def _scan_stream(f, filepath, metrics, table, route, deadline=None, baseline=None):
+    """
+    Scan an open binary file; returns the number of bytes read. Past `deadline`
+    (a `time.perf_counter()` value) the scan stops and is recorded as truncated.
+    Matches accepted by `baseline` are dropped here, before any scoring.
+    """
+    decode = route != BYTES
+    matcher = find_matches if decode else find_byte_matches
+    perf_counter = time.perf_counter
+    stage_seconds = metrics.stage_seconds
+    num_bytes = 0
+    current_line = 0
+    covered_until = {}
+    window_iter = iter_line_windows(f)
+    while True:
+        t0 = perf_counter()
+        if deadline is not None and t0 > deadline:
+            metrics.record_truncation("time")
+            break
+        window = next(window_iter, None)
+        t1 = perf_counter()
+        if window is None:
+            stage_seconds["read"] += t1 - t0
+            break
+        if window.line != current_line:
+            current_line = window.line
+            covered_until = {}
+        data = window.data
+        num_bytes += window.owned
+        text = data.decode('utf-8', errors='surrogateescape') if decode else data
+        t2 = perf_counter()
+        matches = sorted(matcher(text), key=lambda item: item[1].start())
+        if decode and not data.isascii():
+            starts = byte_offsets(text, [match.start() for _, match in matches])
+        else:
+            starts = [match.start() for _, match in matches]
+        for (secret_type, match), start in zip(matches, starts):
+            if start >= window.owned:
+                continue
+            column = window.column + start
+            if column < covered_until.get(secret_type, 0):
+                continue
+            value = match.group(0)
+            if not decode:
+                value = value.decode('ascii')
+            covered_until[secret_type] = column + len(value)
+            if baseline is not None and baseline.suppresses(filepath, value):
+                metrics.record_suppressed()
+                continue
+            table.append(filepath, window.line, column + 1, secret_type, value)
+            metrics.record_finding(secret_type)
+        t3 = perf_counter()
+        stage_seconds["read"] += t1 - t0
+        stage_seconds["decode"] += t2 - t1
+        stage_seconds["regex"] += t3 - t2
+    return num_bytes
+
+
+def _scan_archive(filepath, kind, metrics, table, deadline=None, baseline=None):
+    """
+    Scan every member of an archive, streamed without extracting to disk; findings
+    are reported under "<archive>!/<member>". Returns the decompressed bytes read.
+    An archive cut off by its expansion budget is recorded as a "bytes" truncation.
+    """
+    num_bytes = 0
+    budget = ExpansionBudget()
+    for member_path, reader, member_class in iter_archive_members(filepath, kind, budget=budget):
+        truncations = metrics.truncated_scans.get("time", 0)
+        num_bytes += _scan_stream(reader, member_path, metrics, table, member_class.route, deadline, baseline)
+        if metrics.truncated_scans.get("time", 0) > truncations:
+            break
+    if budget.exhausted:
+        metrics.record_truncation("bytes")
+    return num_bytes
+
+
+def scan_file_into(
+    table, filepath, metrics=None, score=False, classifier=None, verdicts=None, deadline=None, baseline=None
+):
+    """
+    Append the findings of one file to `table`; returns the number appended.
+    With a `deadline`, findings up to that point are kept (see `_scan_stream`);
+    a scan out of time after reading skips the key/value pass and leaves the
+    rows it could not score unscored, and is recorded as truncated once.
+    Findings accepted by a `baseline` (modules.baseline) are never appended,
+    and files under its path globs are not read at all.
+    """
+    print(f"[INFO] Scanning {filepath}...", file=sys.stderr)
+    if metrics is None:
+        metrics = ScanMetrics()
+    start = len(table)
+    num_bytes = 0
+    shortcuts = None
+    file_start = time.perf_counter()
+    time_cuts = metrics.truncated_scans.get("time", 0)
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, 1):
-                for secret_type, pattern in SECRET_PATTERNS.items():
-                    for match in re.finditer(pattern, line):
-                        finding = {
-                            "file": filepath,
-                            "line": line_num,
-                            "type": secret_type,
-                            "value": match.group(0)
-                        }
-                        found_secrets.append(finding)
-                        metrics["secrets_found"] += 1
-                        metrics["findings_by_type"][secret_type] += 1
+        with metrics.stage("classify"):
+            if baseline is not None and baseline.suppresses_path(filepath):
+                file_class = FileClass(SKIP, "accepted by the baseline")
+            else:
+                file_class = classify_file(filepath)
+        metrics.record_route(file_class.route)
+        if file_class.route == SKIP:
+            print(f"[INFO] Skipping {filepath} ({file_class.reason}).", file=sys.stderr)
+        elif file_class.route == ARCHIVE:
+            num_bytes = _scan_archive(filepath, file_class.reason, metrics, table, deadline, baseline)
+        else:
+            with open(filepath, 'rb') as f:
+                num_bytes = _scan_stream(f, filepath, metrics, table, file_class.route, deadline, baseline)
+            if file_class.route != BYTES and structured_format(filepath) and num_bytes <= MAX_STRUCTURED_BYTES:
+                if not _past(deadline):
+                    try:
+                        shortcuts = _scan_key_values(table, filepath, metrics, start, baseline)
+                    except Exception as e:
+                        print(f"[INFO] No key/value pass for {filepath}: {e}", file=sys.stderr)
+                elif metrics.truncated_scans.get("time", 0) == time_cuts:
+                    metrics.record_truncation("time")
+        if score and metrics.truncated_scans.get("time", 0) == time_cuts:
+            score_table(table, start, metrics, classifier, verdicts, shortcuts, deadline)
     except Exception as e:
-        print(f"[ERROR] Could not read file {filepath}: {e}")
-    return found_secrets
+        print(f"[ERROR] Could not read file {filepath}: {e}", file=sys.stderr)
+    metrics.record_file(num_bytes, time.perf_counter() - file_start)
+    return len(table) - start
+
+
+def _scan_range_into(
+    table, filepath, route, start, end, metrics, score=False, classifier=None, verdicts=None, baseline=None
+):
+    """
+    Scan bytes [start, end) of a file, which must begin at a line start. Line
+    numbers are relative to the range; returns (bytes read, newlines, seconds).
+    """
+    first = len(table)
+    range_start = time.perf_counter()
+    with open(filepath, 'rb') as f:
+        reader = RangeReader(f, start, end)
+        num_bytes = _scan_stream(reader, filepath, metrics, table, route, baseline=baseline)
+    if score:
+        score_table(table, first, metrics, classifier, verdicts)
+    return num_bytes, reader.newlines, time.perf_counter() - range_start
+
+
+def scan_file(
+    filepath, metrics=None, score=False, classifier=None, workers=1, executor="thread", model_path=None, baseline=None
+):
+    """
+    Findings of one file as dicts. With `workers` > 1 a large file is split
+    into newline-aligned ranges scanned concurrently (see `scan_paths`).
+    """
+    if workers > 1:
+        return scan_paths(
+            [filepath],
+            metrics=metrics,
+            workers=workers,
+            executor=executor,
+            score=score,
+            model_path=model_path,
+            classifier=classifier,
+            baseline=baseline,
+        ).to_dicts()
+    table = FindingsTable()
+    scan_file_into(table, filepath, metrics=metrics, score=score, classifier=classifier, baseline=baseline)
+    return table.to_dicts()
+
+
+def iter_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+_worker_classifier = None
+_worker_verdicts = None
+_worker_baseline = None
+
+
+def _init_process_worker(model_path, baseline=None):
+    global _worker_classifier, _worker_verdicts, _worker_baseline
+    _worker_classifier = load_classifier(model_path) if model_path else None
+    _worker_verdicts = ValueIndex()
+    _worker_baseline = baseline
+
+
+def _scan_task(filepath, score, classifier, verdicts=None, span=None, baseline=None):
+    # Each task fills its own table and ScanMetrics; only the caller merges them.
+    metrics = ScanMetrics()
+    table = FindingsTable()
+    if span is None:
+        scan_file_into(
+            table, filepath, metrics=metrics, score=score, classifier=classifier, verdicts=verdicts, baseline=baseline
+        )
+        return table, metrics, None
+    start, end, route, _ = span
+    range_stats = _scan_range_into(
+        table, filepath, route, start, end, metrics, score, classifier, verdicts, baseline
+    )
+    return table, metrics, range_stats
+
+
+def _scan_task_in_process(filepath, score, span=None):
+    # Worker processes are single-threaded, so the memo counters' delta is this task's own.
+    before = memo_stats()
+    table, metrics, range_stats = _scan_task(
+        filepath, score, _worker_classifier, _worker_verdicts, span, _worker_baseline
+    )
+    record_memo_usage(metrics, before)
+    return table, metrics, range_stats
+
+
+def plan_scan_tasks(filepaths, workers=1, range_bytes=RANGE_BYTES, baseline=None) -> list:
+    """
+    One (filepath, span) task per file, except that with several workers a file
+    over twice `range_bytes` becomes one task per newline-aligned byte range;
+    span is then (start, end, route, is_last_range). Files under the
+    `baseline`'s path globs are never split.
+    """
+    tasks = []
+    for filepath in filepaths:
+        size = os.path.getsize(filepath) if workers > 1 and os.path.isfile(filepath) else 0
+        if size > 2 * range_bytes and not (baseline is not None and baseline.suppresses_path(filepath)):
+            file_class = classify_file(filepath)
+            if file_class.route not in (SKIP, ARCHIVE):
+                with open(filepath, 'rb') as f:
+                    ranges = newline_aligned_ranges(f, size, range_bytes)
+                for i, (start, end) in enumerate(ranges):
+                    tasks.append((filepath, (start, end, file_class.route, i == len(ranges) - 1)))
+                continue
+        tasks.append((filepath, None))
+    return tasks
+
+
+def _merge_results(tasks, results, output, metrics):
+    """Write task results to `output` in file order, renumbering the lines of split files."""
+    line_offset, file_bytes, file_seconds = 0, 0, 0.0
+    for (filepath, span), (table, task_metrics, range_stats) in zip(tasks, results):
+        metrics.merge(task_metrics)
+        if span is None:
+            output.write_table(table)
+            continue
+        start, _, route, is_last_range = span
+        if start == 0:
+            line_offset, file_bytes, file_seconds = 0, 0, 0.0
+        num_bytes, newlines, seconds = range_stats
+        if line_offset:
+            table.shift_lines(line_offset)
+        output.write_table(table)
+        line_offset += newlines
+        file_bytes += num_bytes
+        file_seconds += seconds
+        if is_last_range:
+            metrics.record_route(route)
+            metrics.record_file(file_bytes, file_seconds)
+
+
+def record_memo_usage(metrics, before: dict):
+    """Add the memo hits and misses since the `before` snapshot of `memo_stats()` to `metrics`."""
+    for name, stats in memo_stats().items():
+        previous = before.get(name, {"hits": 0, "misses": 0})
+        metrics.record_cache(name, stats["hits"] - previous["hits"], stats["misses"] - previous["misses"])
+
+
+def scan_paths(
+    paths,
+    metrics=None,
+    workers=1,
+    executor="thread",
+    score=False,
+    model_path=None,
+    output=None,
+    classifier=None,
+    range_bytes=RANGE_BYTES,
+    baseline=None,
+):
+    """
+    Scan files and directories, optionally across a thread or process pool.
+
+    Each file's findings are handed to `output` (anything with `write_table`,
+    such as a streaming writer from modules.findings) as soon as the file is
+    done; by default they are collected into a FindingsTable, which is returned.
+    Verdicts are cached by value hash, so a key copied into many files is scored
+    once (once per worker process with the process pool); pass a ValueIndex as
+    `output` to also report each distinct value once, with all its occurrences.
+
+    With several workers, files over twice `range_bytes` are split into
+    newline-aligned ranges that are scanned as separate tasks; their findings
+    are renumbered from per-range newline counts and written in file order.
+
+    Threads share one loaded classifier and are the cheaper choice in
+    memory-limited containers: file reads and the native entropy/tree kernels
+    run without the GIL. Processes also parallelise the regex stage but each
+    one loads its own interpreter and classifier.
+
+    Matches accepted by `baseline` (a modules.baseline.Baseline) are dropped
+    as they are found and counted in `metrics.findings_suppressed`.
+    """
+    if metrics is None:
+        metrics = ScanMetrics()
+    if output is None:
+        output = FindingsTable()
+    verdicts = output if isinstance(output, ValueIndex) else ValueIndex()
+    tasks = plan_scan_tasks(iter_files(paths), workers, range_bytes, baseline)
+    filepaths = [filepath for filepath, _ in tasks]
+    spans = [span for _, span in tasks]
+
+    if executor == "process" and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_process_worker, initargs=(model_path, baseline)
+        ) as pool:
+            chunksize = max(1, len(tasks) // (workers * 8))
+            results = pool.map(
+                _scan_task_in_process, filepaths, [score] * len(tasks), spans, chunksize=chunksize
+            )
+            _merge_results(tasks, results, output, metrics)
+        return output
+
+    if classifier is None and model_path:
+        classifier = load_classifier(model_path)
+    before = memo_stats()
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                lambda filepath, span: _scan_task(filepath, score, classifier, verdicts, span, baseline),
+                filepaths,
+                spans,
+            )
+            _merge_results(tasks, results, output, metrics)
+    else:
+        for filepath in filepaths:
+            table = FindingsTable()
+            scan_file_into(
+                table, filepath, metrics=metrics, score=score, classifier=classifier, verdicts=verdicts, baseline=baseline
+            )
+            output.write_table(table)
+    record_memo_usage(metrics, before)
+    return output
+
+
+def parse_scan_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Scan files for leaked secrets.")
+    parser.add_argument("paths", nargs="+", help="Files or directories to scan.")
+    parser.add_argument(
+        "--score",
+        action="store_true",
+        help="Run the entropy stage (and the ML stage if a model is available) on each finding.",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="Path to the trained classifier used by the ML stage (implies --score).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="Write a JSON report of per-stage timings, throughput and latency percentiles to this path.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(WRITERS),
+        default="ndjson",
+        help="Findings output format, written incrementally as files finish.",
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write findings to this file instead of stdout."
+    )
+    parser.add_argument(
+        "--group-by-value",
+        action="store_true",
+        help="Report each distinct secret value once (as NDJSON), keyed by its SHA-256, with all its occurrences.",
+    )
+    parser.add_argument(
+        "--keep-values",
+        action="store_true",
+        help="With --group-by-value, include the plaintext value in each report.",
+    )
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=None,
+        help="Entries kept in each entropy/feature memo (0 disables; default $SECRETS_DETECTOR_MEMO_SIZE or 65536).",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="JSON baseline of accepted findings (value hashes and path globs) to suppress.",
+    )
+    parser.add_argument(
+        "--write-baseline",
+        type=str,
+        default=None,
+        help="Write a baseline accepting every finding of this scan (plus those in --baseline) to this path.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of files scanned concurrently.")
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Pool used when --workers > 1.",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.group_by_value and arguments.format != "ndjson":
+        parser.error("--group-by-value only supports --format ndjson.")
+    return arguments
+
+
+def main(argv=None):
+    arguments = parse_scan_arguments(argv)
+    if arguments.memo_size is not None:
+        configure_memos(arguments.memo_size)
+    metrics = ScanMetrics()
+    baseline = Baseline.load(arguments.baseline) if arguments.baseline else None
+    stream = open(arguments.output, "w", newline="") if arguments.output else sys.stdout
+    if arguments.group_by_value:
+        writer = ValueIndex(keep_values=arguments.keep_values)
+    else:
+        writer = open_writer(arguments.format, stream)
+    accepted = None
+    if arguments.write_baseline:
+        accepted = Baseline.load(arguments.baseline) if arguments.baseline else Baseline()
+    try:
+        scan_paths(
+            arguments.paths,
+            metrics=metrics,
+            workers=arguments.workers,
+            executor=arguments.executor,
+            score=arguments.score or arguments.model is not None,
+            model_path=arguments.model,
+            output=writer if accepted is None else TeeSink(writer, accepted),
+            baseline=baseline,
+        )
+        if arguments.group_by_value:
+            for report in writer.grouped():
+                stream.write(json.dumps(report) + "\n")
+    finally:
+        writer.close()
+        if arguments.output:
+            stream.close()
+
+    if accepted is not None:
+        accepted.save(arguments.write_baseline)
+        print(f"[INFO] Baseline of {len(accepted)} entries written to {arguments.write_baseline}", file=sys.stderr)
+    if metrics.findings_suppressed:
+        print(f"[INFO] {metrics.findings_suppressed} findings suppressed by the baseline", file=sys.stderr)
+
+    if arguments.profile:
+        with open(arguments.profile, "w") as f:
+            f.write(metrics.to_json(indent=2))
+        print(f"[INFO] Profile written to {arguments.profile}", file=sys.stderr)
+
+    return len(writer) if arguments.group_by_value else writer.count
+
+
+if __name__ == "__main__":
+    main()
@@ -33,15 +33,9 @@ extern "C" {
         }
     }
     
-    double calculate_entropy_for_secrets(const char* input_str, const int length) {
-        if (length == 0) return 0.0;
-        
-        int freq_array[256];
-        calculate_char_freq_avx2_optimized(input_str, length, freq_array);
-        
+    static double entropy_from_freq(const int* freq_array, const int length) {
         double entropy = 0.0;
         const double len_d = static_cast<double>(length);
-        
 
         for (int i = 0; i < 256; ++i) {
             if (freq_array[i] > 0) {
@@ -49,15 +43,98 @@ extern "C" {
                 entropy -= prob * log2(prob);
             }
         }
-        
+
         return entropy;
     }
+
+    double calculate_entropy_for_secrets(const char* input_str, const int length) {
+        if (length == 0) return 0.0;
+        
+        int freq_array[256];
+        calculate_char_freq_avx2_optimized(input_str, length, freq_array);
+        return entropy_from_freq(freq_array, length);
+    }
+
+    // Charsets, smallest first; a string belongs to the first one holding all
+    // of its bytes. '=' is allowed in both base64 alphabets as padding.
+    enum Charset { CHARSET_OTHER = 0, CHARSET_HEX, CHARSET_ALNUM, CHARSET_BASE64, CHARSET_BASE64URL, CHARSET_COUNT };
+    static const int charset_sizes[CHARSET_COUNT] = {0, 16, 62, 64, 64};
+
+    // Strings of a restricted charset at least this long must also come close
+    // to the entropy of a random string of the same charset and length, on top
+    // of a raw floor: the fixed 4.0 bits, except for hex, which can't reach it.
+    static const int adaptive_min_length = 24;
+    static const double normalized_entropy_threshold = 0.92;
+    static const double charset_entropy_floors[CHARSET_COUNT] = {0.0, 3.0, 4.0, 4.0, 4.0};
+    static const int expected_table_length = 512;
+
+    // Reads the histogram, not the string, so it costs 256 lookups whatever the length.
+    static int detect_charset(const int* freq_array) {
+        bool hex = true, alnum = true, base64 = true, base64url = true;
+        for (int c = 0; c < 256; ++c) {
+            if (freq_array[c] == 0) continue;
+            const bool digit = c >= '0' && c <= '9';
+            const bool letter = (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z');
+            hex = hex && (digit || (c >= 'a' && c <= 'f') || (c >= 'A' && c <= 'F'));
+            alnum = alnum && (digit || letter);
+            base64 = base64 && (digit || letter || c == '+' || c == '/' || c == '=');
+            base64url = base64url && (digit || letter || c == '-' || c == '_' || c == '=');
+        }
+        if (hex) return CHARSET_HEX;
+        if (alnum) return CHARSET_ALNUM;
+        if (base64) return CHARSET_BASE64;
+        if (base64url) return CHARSET_BASE64URL;
+        return CHARSET_OTHER;
+    }
+
+    // Expected Shannon entropy of `n` bytes drawn uniformly from `k` symbols:
+    // H = log2(n) - (k / n) * E[c log2 c], with c ~ Binomial(n, 1/k).
+    static double expected_entropy(const int k, const int n) {
+        const double p = 1.0 / k, q = 1.0 - p;
+        double pmf = pow(q, n);
+        double sum = 0.0;
+        for (int c = 1; c <= n; ++c) {
+            pmf *= static_cast<double>(n - c + 1) / c * (p / q);
+            sum += pmf * c * log2(static_cast<double>(c));
+        }
+        return log2(static_cast<double>(n)) - static_cast<double>(k) / n * sum;
+    }
+
+    struct ExpectedEntropyTables {
+        double values[CHARSET_COUNT][expected_table_length + 1];
+
+        ExpectedEntropyTables() {
+            for (int charset = 0; charset < CHARSET_COUNT; ++charset) {
+                values[charset][0] = 0.0;
+                for (int n = 1; n <= expected_table_length; ++n) {
+                    values[charset][n] = charset == CHARSET_OTHER ? 0.0 : expected_entropy(charset_sizes[charset], n);
+                }
+            }
+        }
+    };
+
+    // Built once, on first use; longer strings use the last entry.
+    static double expected_max_entropy(const int charset, const int length) {
+        static const ExpectedEntropyTables tables;
+        return tables.values[charset][std::min(length, expected_table_length)];
+    }
+
+    static double normalized_entropy(const double entropy, const int charset, const int length) {
+        if (charset == CHARSET_OTHER) return 0.0;
+        return entropy / expected_max_entropy(charset, length);
+    }
+
+    static bool adaptive_verdict(const int charset, const double entropy, const double normalized) {
+        return entropy > charset_entropy_floors[charset] && normalized > normalized_entropy_threshold;
+    }
     
     struct EntropyAnalysis {
         double overall_entropy;
         double max_substring_entropy;
         int high_entropy_regions;
         bool likely_secret;
+        double normalized_entropy;
+        int charset;
     };
     
     EntropyAnalysis analyze_string_for_secrets(const char* input_str, const int length) {
@@ -68,7 +145,11 @@ extern "C" {
             return result;
         }
         
-        result.overall_entropy = calculate_entropy_for_secrets(input_str, length);
+        int freq_array[256];
+        calculate_char_freq_avx2_optimized(input_str, length, freq_array);
+        result.overall_entropy = entropy_from_freq(freq_array, length);
+        result.charset = detect_charset(freq_array);
+        result.normalized_entropy = normalized_entropy(result.overall_entropy, result.charset, length);
         
         const int window_size = 32;  
         const double entropy_threshold = 4.5;  
@@ -91,12 +172,44 @@ extern "C" {
         result.max_substring_entropy = max_entropy;
         result.high_entropy_regions = high_entropy_count;
         
-        result.likely_secret = (result.overall_entropy > 4.0) || 
-                              (high_entropy_count > 0 && result.max_substring_entropy > 5.0);
+        if (result.charset != CHARSET_OTHER && length >= adaptive_min_length) {
+            result.likely_secret = adaptive_verdict(result.charset, result.overall_entropy, result.normalized_entropy);
+        } else {
+            result.likely_secret = (result.overall_entropy > 4.0) ||
+                                  (high_entropy_count > 0 && result.max_substring_entropy > 5.0);
+        }
         
         return result;
     }
     
+    // Same likely_secret as analyze_string_for_secrets, without the window
+    // statistics: returns as soon as the verdict is fixed. A 32-byte window
+    // holds at most 32 symbols, so its entropy never exceeds log2(32) == 5.0 and
+    // the `> 5.0` window clause can never decide the verdict; it is not computed.
+    // Restricted charsets are decided by the normalized entropy alone.
+    bool verdict_string_for_secrets(const char* input_str, const int length, double* overall_entropy) {
+        *overall_entropy = 0.0;
+        if (length < 8) return false;
+
+        int freq_array[256];
+        calculate_char_freq_avx2_optimized(input_str, length, freq_array);
+
+        double entropy = 0.0;
+        const double len_d = static_cast<double>(length);
+        for (int i = 0; i < 256; ++i) {
+            if (freq_array[i] > 0) {
+                double prob = static_cast<double>(freq_array[i]) / len_d;
+                entropy -= prob * log2(prob);
+            }
+        }
+        *overall_entropy = entropy;
+        const int charset = detect_charset(freq_array);
+        if (charset != CHARSET_OTHER && length >= adaptive_min_length) {
+            return adaptive_verdict(charset, entropy, normalized_entropy(entropy, charset, length));
+        }
+        return entropy > 4.0;
+    }
+
     bool detect_api_key_pattern_avx2(const char* input_str, const int length) {
         if (length < 20) return false;
         
@@ -148,6 +261,47 @@ extern "C" {
         
         return max_consecutive >= 20;
     }
+
+    // Analyzes `count` strings packed into one buffer in a single call, so ctypes
+    // releases the GIL once for the whole batch instead of once per string.
+    void analyze_strings_batch(const char* buffer, const int* offsets, const int* lengths,
+                               const int count, EntropyAnalysis* results, bool* base64_flags) {
+        for (int i = 0; i < count; ++i) {
+            const char* text = buffer + offsets[i];
+            results[i] = analyze_string_for_secrets(text, lengths[i]);
+            base64_flags[i] = detect_api_key_pattern_avx2(text, lengths[i]);
+        }
+    }
+
+    void verdict_strings_batch(const char* buffer, const int* offsets, const int* lengths,
+                               const int count, double* entropies, bool* verdicts) {
+        for (int i = 0; i < count; ++i) {
+            verdicts[i] = verdict_string_for_secrets(buffer + offsets[i], lengths[i], &entropies[i]);
+        }
+    }
+
+    void evaluate_tree_ensemble(const double* features, const int n_rows, const int n_features,
+                                const int* feature, const double* threshold,
+                                const int* left, const int* right, const double* value,
+                                const int* roots, const int n_trees, const bool strict,
+                                double* out) {
+        for (int r = 0; r < n_rows; ++r) {
+            const double* x = features + static_cast<long>(r) * n_features;
+            double sum = 0.0;
+
+            for (int t = 0; t < n_trees; ++t) {
+                int node = roots[t];
+                while (feature[node] >= 0) {
+                    const double v = x[feature[node]];
+                    const bool go_left = strict ? (v < threshold[node]) : (v <= threshold[node]);
+                    node = go_left ? left[node] : right[node];
+                }
+                sum += value[node];
+            }
+
+            out[r] = sum;
+        }
+    }
 }
 
 class SecretsDetector {
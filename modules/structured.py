@@ -0,0 +1,168 @@
+import os
+import re
+from collections import namedtuple
+
+# One assignment in a config file; `key` is the full dotted path for nested
+# formats (database.password, servers[0].token) and `column` is 1-based.
+KeyValue = namedtuple("KeyValue", ["key", "value", "line", "column"])
+
+SENSITIVE = "sensitive"
+BENIGN = "benign"
+
+# Structured files larger than this are scanned with the line rules only.
+MAX_STRUCTURED_BYTES = 1024 * 1024
+
+# Checked against the whole normalised key (lower case, words joined by "_").
+SENSITIVE_KEY = re.compile(
+    r"(^|_)(database|db|redis|mongo(db)?|postgres(ql)?|mysql|amqp|broker|sqlalchemy)_(url|uri|dsn)$"
+    r"|(^|_)(dsn|connection_string|conn_str)$"
+)
+# Checked word by word from the end of the key: the last word that is in either
+# set decides, so AWS_SECRET_ACCESS_KEY is sensitive and SECRET_KEY_PATH benign.
+SENSITIVE_WORDS = {
+    "secret", "secrets", "password", "passwd", "pwd", "pass", "passphrase", "token", "tokens",
+    "apikey", "key", "keys", "credential", "credentials", "auth", "authorization", "cookie",
+    "session", "signature", "salt", "private", "pat", "bearer",
+}
+BENIGN_WORDS = {
+    "name", "names", "id", "version", "description", "title", "label", "url", "uri", "endpoint",
+    "host", "hostname", "port", "path", "dir", "file", "filename", "region", "zone", "timeout",
+    "ttl", "enabled", "disabled", "debug", "level", "mode", "env", "environment", "email", "user",
+    "username", "lang", "locale", "color", "type", "format", "size", "count", "limit", "length",
+    "algorithm", "expiry", "expires", "header", "prefix", "suffix",
+}
+
+# Values that are obviously not real secrets: references to other variables,
+# placeholders and literal nothings.
+PLACEHOLDER_VALUE = re.compile(
+    r"^(\$\{?[\w.:-]+\}?|\{\{.*\}\}|<[^>]*>|%\(?\w+\)?s?|x+|\*+|\.+|"
+    r"changeme|change_me|example|placeholder|secret|password|todo|none|null|true|false|yes|no)$",
+    re.IGNORECASE,
+)
+MIN_SECRET_VALUE_LENGTH = 8
+
+ENV_ASSIGNMENT = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][\w.-]*)\s*=\s*(.*?)\s*$")
+INI_ASSIGNMENT = re.compile(r"^\s*([^=:#;\[\s][^=:]*?)\s*[=:]\s*(.*?)\s*$")
+PROPERTIES_ASSIGNMENT = re.compile(r"^\s*([^=:#!\s]+)\s*(?:[=:]\s*|\s+)(.*?)\s*$")
+SECTION_HEADER = re.compile(r"^\s*\[+\s*([^\]]+?)\s*\]+\s*$")
+
+FORMATS_BY_EXTENSION = {
+    ".ini": "ini",
+    ".cfg": "ini",
+    ".conf": "ini",
+    ".properties": "properties",
+    ".toml": "toml",
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+
+def structured_format(filepath) -> str:
+    """Name of the key/value format of `filepath`, or None for unstructured files."""
+    basename = os.path.basename(filepath)
+    if basename == ".env" or basename.startswith(".env.") or basename.endswith(".env"):
+        return "env"
+    return FORMATS_BY_EXTENSION.get(os.path.splitext(basename)[1].lower())
+
+
+def normalize_key(key: str) -> str:
+    key = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", key)
+    return re.sub(r"[^a-z0-9]+", "_", key.lower()).strip("_")
+
+
+def key_signal(key: str):
+    """SENSITIVE or BENIGN when the last word of the key decides it, otherwise None."""
+    # Only the last path component names the value: database.password -> password.
+    name = normalize_key(re.split(r"[.\[\]]", key.rstrip("]"))[-1] or key)
+    if SENSITIVE_KEY.search(name):
+        return SENSITIVE
+    for word in reversed(name.split("_")):
+        if word in SENSITIVE_WORDS:
+            return SENSITIVE
+        if word in BENIGN_WORDS:
+            return BENIGN
+    return None
+
+
+def is_secret_like(value: str) -> bool:
+    return len(value) >= MIN_SECRET_VALUE_LENGTH and not PLACEHOLDER_VALUE.match(value)
+
+
+def _unquote(value: str, offset: int):
+    """Strip matching quotes or an unquoted trailing comment; returns (value, offset)."""
+    if len(value) >= 2 and value[0] in "\"'" and value[-1] == value[0]:
+        return value[1:-1], offset + 1
+    if value[:1] in "\"'":
+        closing = value.find(value[0], 1)
+        if closing != -1:
+            return value[1:closing], offset + 1
+    comment = re.search(r"\s+[#;]", value)
+    if comment:
+        value = value[: comment.start()]
+    return value, offset
+
+
+def _iter_assignments(lines, pattern, sections: bool):
+    section = ""
+    for line_num, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped or stripped[0] in "#;!":
+            continue
+        header = SECTION_HEADER.match(line) if sections else None
+        if header:
+            section = header.group(1).strip("\"'") + "."
+            continue
+        match = pattern.match(line)
+        if not match:
+            continue
+        value, start = _unquote(match.group(2), match.start(2))
+        if value:
+            yield KeyValue(section + match.group(1).strip("\"'"), value, line_num, start + 1)
+
+
+def _iter_nodes(node, path):
+    import yaml
+
+    if isinstance(node, yaml.MappingNode):
+        for key_node, value_node in node.value:
+            key = key_node.value if isinstance(key_node, yaml.ScalarNode) else "?"
+            yield from _iter_nodes(value_node, f"{path}.{key}" if path else str(key))
+    elif isinstance(node, yaml.SequenceNode):
+        for i, item in enumerate(node.value):
+            yield from _iter_nodes(item, f"{path}[{i}]")
+    elif isinstance(node, yaml.ScalarNode) and path and isinstance(node.value, str) and node.value:
+        # Quoted scalars start at the quote; report the value itself.
+        quoted = 1 if node.style in ("'", '"') else 0
+        yield KeyValue(path, node.value, node.start_mark.line + 1, node.start_mark.column + 1 + quoted)
+
+
+def iter_key_values(filepath, text: str = None, file_format: str = None):
+    """
+    Yield a KeyValue for each assignment in a .env, INI, properties, TOML, JSON
+    or YAML file; nested JSON/YAML values are keyed by their full path. In the
+    line-based formats, continuation lines and multi-line strings are ignored.
+    Raises on JSON/YAML files that do not parse.
+    """
+    file_format = file_format or structured_format(filepath)
+    if file_format is None:
+        return
+    if text is None:
+        with open(filepath, "r", encoding="utf-8", errors="surrogateescape") as f:
+            text = f.read()
+    lines = text.splitlines()
+    if file_format == "env":
+        yield from _iter_assignments(lines, ENV_ASSIGNMENT, sections=False)
+    elif file_format in ("ini", "toml"):
+        yield from _iter_assignments(lines, INI_ASSIGNMENT, sections=True)
+    elif file_format == "properties":
+        yield from _iter_assignments(lines, PROPERTIES_ASSIGNMENT, sections=False)
+    else:
+        # JSON is (almost) a subset of YAML, and the YAML composer keeps the
+        # line and column of every node.
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        for document in yaml.compose_all(text, Loader=loader):
+            if document is not None:
+                yield from _iter_nodes(document, "")
@@ -0,0 +1,7 @@
+# Scan-only entry point for pre-commit hooks and CI: imports the scanner, parser
+# and entropy engine only, with no dotenv, training or tracking dependencies.
+from modules.scanner import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+import numpy as np
+import pytest
+
+from modules.compiled_model import CompiledModel, compile_model
+from modules.machine_learning_model import model_selector
+
+
+@pytest.mark.parametrize(
+    "model_name, model_params",
+    [
+        ("DecisionTree", {"max_depth": 6}),
+        ("RandomForest", {"n_estimators": 20, "max_depth": 8}),
+        ("GradientBoosting", {"n_estimators": 20}),
+        ("AdaBoost", {"n_estimators": 20}),
+        ("XGBoost", {"n_estimators": 20, "max_depth": 4}),
+        ("LogisticRegression", {}),
+    ],
+)
+def test_compiled_model_matches_estimator(tmp_path, model_name, model_params):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 10))
+    y = (X[:, 0] + X[:, 3] * X[:, 5] > 0).astype(int)
+    model = model_selector(model_name, dict(model_params, random_state=0))
+    model.fit(X, y)
+
+    path = str(tmp_path / "model.npz")
+    compile_model(model, n_features=X.shape[1]).save(path)
+    compiled = CompiledModel.load(path)
+
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X)[:, 1], atol=1e-5)
@@ -16,6 +16,7 @@ SECRETS_DETECTOR_ROOT = os.getenv(
 sys.path.append(SECRETS_DETECTOR_ROOT)
 
 from modules.entropy import SecretsDetectorPython, cpp_wrapper
+from modules.parity import INPUT_CLASSES
 import pytest
 
 
@@ -50,3 +51,115 @@ def test_python_vs_cpp_entropy():
     )
     print(python_result)
     print(cpp_result)
+
+
+VERDICT_SAMPLES = [
+    "",
+    "short",
+    "a" * 100 + "b" * 100 + "c" * 100,
+    "AKIA" + "ABCDEFGHIJKLMNOP",
+    "sha256:9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    "".join(chr(33 + i % 94) for i in range(300)),
+    "password=hunter2hunter2hunter2hunter2",
+]
+
+
+@pytest.mark.parametrize("text", VERDICT_SAMPLES)
+def test_python_verdict_matches_full_analysis(text):
+    full = SecretsDetectorPython.analyze_for_secrets(text)
+    assert SecretsDetectorPython.verdict_for_secrets(text) == (
+        full["overall_entropy"],
+        full["cpp_heuristic_is_secret"],
+    )
+
+
+def test_verdict_strings_match_analyze_strings():
+    from modules.entropy import analyze_strings, verdict_strings
+
+    full = analyze_strings(VERDICT_SAMPLES)
+    assert verdict_strings(VERDICT_SAMPLES) == [
+        (analysis["overall_entropy"], analysis["cpp_heuristic_is_secret"]) for analysis in full
+    ]
+
+
+BENIGN_RESTRICTED_CHARSET = [
+    "1234567890123456",
+    "ThisIsAVariableName",
+    "abcdefabcdef1234",
+    "deadbeefdeadbeefdeadbeefdeadbeef",
+    "getUserAccountByIdentifierAndName",
+    "AbstractSingletonProxyFactoryBean",
+    "thisIsAVeryLongIdentifierNameForTesting",
+]
+
+
+def test_charset_thresholds_catch_hex_keys():
+    from modules.entropy import analyze_strings, expected_entropy
+
+    hex_key = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b"
+    base64_key = "wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY"
+
+    assert expected_entropy(16, 40) < 4.0  # the fixed threshold no hex string can pass
+    python = [SecretsDetectorPython.analyze_for_secrets(t) for t in (hex_key, base64_key)]
+    assert [r["charset"] for r in python] == ["hex", "base64"]
+    assert [r["cpp_heuristic_is_secret"] for r in python] == [True, True]
+
+    for native, expected in zip(analyze_strings([hex_key, base64_key]), python):
+        assert native["charset"] == expected["charset"]
+        assert native["normalized_entropy"] == pytest.approx(expected["normalized_entropy"], abs=1e-9)
+        assert native["cpp_heuristic_is_secret"] == expected["cpp_heuristic_is_secret"]
+
+
+@pytest.mark.parametrize("text", BENIGN_RESTRICTED_CHARSET)
+def test_charset_thresholds_keep_identifiers_and_patterns_negative(text):
+    from modules.entropy import analyze_strings, cpp_entropy_loader, verdict_strings
+
+    assert not SecretsDetectorPython.analyze_for_secrets(text)["cpp_heuristic_is_secret"]
+    assert not SecretsDetectorPython.verdict_for_secrets(text)[1]
+    if cpp_entropy_loader()[0]:
+        assert not cpp_wrapper(text)["cpp_heuristic_is_secret"]
+        assert not analyze_strings([text])[0]["cpp_heuristic_is_secret"]
+        assert not verdict_strings([text])[0][1]
+
+
+@pytest.mark.parametrize("length", [5, 20, 40, 72])
+def test_token_array_matches_per_string_analysis(length):
+    import random
+    import string
+
+    import numpy as np
+
+    from modules.entropy import analyze_token_array, cpp_entropy_loader
+    from modules.features import get_features, get_features_batch
+
+    rng = random.Random(length)
+    alphabets = [string.ascii_letters + string.digits + "+/", "ab-", string.printable[:94]]
+    texts = ["".join(rng.choice(alphabets[i % 3]) for _ in range(length)) for i in range(60)]
+    tokens = np.frombuffer("".join(texts).encode("ascii"), dtype=np.uint8).reshape(len(texts), length)
+
+    engines = {"python": SecretsDetectorPython.analyze_for_secrets}
+    if cpp_entropy_loader()[0]:
+        engines["native"] = cpp_wrapper
+    for engine, analyze in engines.items():
+        bulk = analyze_token_array(tokens, engine=engine)
+        for i, text in enumerate(texts):
+            expected = analyze(text)
+            assert bulk["overall_entropy"][i] == pytest.approx(expected["overall_entropy"], abs=1e-9)
+            assert bulk["max_substring_entropy"][i] == pytest.approx(expected["max_substring_entropy"], abs=1e-9)
+            assert bulk["normalized_entropy"][i] == pytest.approx(expected["normalized_entropy"], abs=1e-9)
+            for key in ("high_entropy_regions", "cpp_heuristic_is_secret", "is_base64_pattern", "charset"):
+                assert bulk[key][i] == expected[key]
+
+    np.testing.assert_allclose(get_features_batch(texts), [get_features(t) for t in texts], atol=1e-9)
+
+
+@pytest.mark.parametrize("input_class", sorted(INPUT_CLASSES))
+def test_engines_agree_up_to_documented_divergences(input_class):
+    from modules.entropy import cpp_entropy_loader
+    from modules.parity import engine_divergences, generate_inputs
+
+    if not cpp_entropy_loader()[0]:
+        pytest.skip("native engine not built")
+    for seed in range(3):
+        for text in generate_inputs(input_class, 100, seed=seed):
+            assert engine_divergences(text) == [], text
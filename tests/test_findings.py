@@ -0,0 +1,163 @@
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+import csv
+import io
+import json
+
+from modules.findings import FindingsTable, ValueIndex, open_writer, value_digest
+from modules.scanner import main, scan_paths
+import pytest
+
+
+AWS_KEY = "AKIA" + "ABCDEFGHIJKLMNOP"
+
+
+def test_findings_table_round_trip_and_merge():
+    table = FindingsTable()
+    table.append("a.py", 2, 7, "aws_access_key", AWS_KEY)
+    table.append("b.py", 1, 1, "generic_key", "abc")
+    table.set_scores(1, [3.5], [True], [0.9])
+
+    other = FindingsTable()
+    other.append("b.py", 4, 2, "aws_access_key", AWS_KEY)
+    table.write_table(other)
+
+    rows = table.to_dicts()
+    assert rows[0] == {"file": "a.py", "line": 2, "column": 7, "type": "aws_access_key", "value": AWS_KEY}
+    assert rows[1]["entropy"] == 3.5 and rows[1]["heuristic_is_secret"] is True
+    assert rows[1]["ml_probability"] == 0.9
+    assert rows[2]["file"] == "b.py" and rows[2]["type"] == "aws_access_key"
+    assert table.files == ["a.py", "b.py"]
+
+
+@pytest.mark.parametrize("output_format", ["ndjson", "csv", "sarif"])
+def test_scan_paths_streams_to_writer(tmp_path, output_format):
+    (tmp_path / "config.py").write_text(f"aws = '{AWS_KEY}'\n")
+    stream = io.StringIO()
+    writer = open_writer(output_format, stream)
+    scan_paths([str(tmp_path)], output=writer)
+    writer.close()
+    text = stream.getvalue()
+
+    if output_format == "ndjson":
+        findings = [json.loads(line) for line in text.splitlines()]
+        assert findings[0]["value"] == AWS_KEY
+    elif output_format == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert rows[0]["type"] == "aws_access_key" and rows[0]["line"] == "1"
+    else:
+        sarif = json.loads(text)
+        run = sarif["runs"][0]
+        assert run["results"][0]["ruleId"] == "aws_access_key"
+        assert {"id": "aws_access_key"} in run["tool"]["driver"]["rules"]
+        assert AWS_KEY not in text
+
+
+def test_main_writes_empty_sarif(tmp_path):
+    (tmp_path / "clean.py").write_text("x = 1\n")
+    output = tmp_path / "out.sarif"
+    assert main([str(tmp_path), "--format", "sarif", "--output", str(output)]) == 0
+    assert json.loads(output.read_text())["runs"][0]["results"] == []
+
+
+def test_value_index_scores_each_value_once(tmp_path, monkeypatch):
+    import modules.entropy
+
+    for i in range(3):
+        (tmp_path / f"vendored_{i}.py").write_text(f"aws = '{AWS_KEY}'\n")
+    scored = []
+    verdict_strings = modules.entropy.verdict_strings
+
+    def counting_verdict_strings(texts):
+        scored.extend(texts)
+        return verdict_strings(texts)
+
+    monkeypatch.setattr(modules.entropy, "verdict_strings", counting_verdict_strings)
+    index = scan_paths([str(tmp_path)], score=True, output=ValueIndex())
+
+    assert scored.count(AWS_KEY) == 1
+    reports = [report for report in index.grouped() if "aws_access_key" in report["types"]]
+    assert len(reports) == 1
+    aws_occurrences = [o for o in reports[0]["occurrences"] if o["type"] == "aws_access_key"]
+    assert len(aws_occurrences) == 3
+    assert reports[0]["value_sha256"] == value_digest(AWS_KEY)
+    assert "value" not in reports[0]
+    assert "heuristic_is_secret" in reports[0]
+
+
+def test_grouped_reports_are_valid_json_without_an_entropy():
+    import math
+
+    table = FindingsTable()
+    table.append("app.py", 1, 1, "generic_key", AWS_KEY)
+    index = ValueIndex()
+    index.remember(AWS_KEY, math.nan, True)
+    index.write_table(table)
+
+    (report,) = index.grouped()
+    assert "entropy" not in report
+    assert report["heuristic_is_secret"] is True
+    json.dumps(report, allow_nan=False)
+
+
+def test_key_name_verdicts_are_not_cached_for_other_files(tmp_path):
+    token = "zQ8xK2mP9vL4nR7tY1wE5uI3oA6sD0fG"
+    (tmp_path / ".env").write_text(f"APP_NAME={token}\n")
+    (tmp_path / "code.py").write_text(f"token = '{token}'\n")
+
+    index = scan_paths([str(tmp_path)], score=True, output=ValueIndex())
+
+    (report,) = [report for report in index.grouped() if report["value_sha256"] == value_digest(token)]
+    assert {o["file"] for o in report["occurrences"]} == {str(tmp_path / ".env"), str(tmp_path / "code.py")}
+    assert report["heuristic_is_secret"] is True
+    assert report["entropy"] == pytest.approx(5.0)
+
+
+def test_scan_entry_point_keeps_stdout_machine_readable(tmp_path):
+    import subprocess
+
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+
+    from modules.compiled_model import compile_model
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 10))
+    model = LogisticRegression().fit(X, (X[:, 4] > 0).astype(int))
+    model_path = str(tmp_path / "model.npz")
+    compile_model(model, n_features=X.shape[1]).save(model_path)
+    target = tmp_path / "config.py"
+    target.write_text(f"aws = '{AWS_KEY}'\ntoken = 'zQ8xK2mP9vL4nR7tY1wE5uI3oA6sD0fG'\n")
+
+    def scan(output_format):
+        completed = subprocess.run(
+            [sys.executable, "scan.py", str(target), "--model", model_path, "--format", output_format],
+            cwd=str(SECRETS_DETECTOR_ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return completed.stdout
+
+    lines = scan("ndjson").splitlines()
+    assert lines
+    assert all("ml_probability" in json.loads(line) for line in lines)
+    sarif = json.loads(scan("sarif"))
+    assert sarif["runs"][0]["results"]
+    rows = list(csv.DictReader(io.StringIO(scan("csv"))))
+    assert rows and all(row["file"] == str(target) for row in rows)
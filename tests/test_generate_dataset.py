@@ -0,0 +1,61 @@
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+import json
+
+import numpy as np
+import yaml
+
+from data.generate_dataset import generate_corpus, generate_dataset_shards, parse_file_type_mix
+from modules.dataset import dataset_files, load_features
+from modules.scanner import scan_file
+
+
+def test_dataset_shards_are_reproducible_and_load_lazily(tmp_path):
+    first = generate_dataset_shards(str(tmp_path / "a"), num_samples=250, shard_size=100, seed=7, workers=1)
+    second = generate_dataset_shards(str(tmp_path / "b"), num_samples=250, shard_size=100, seed=7, workers=2)
+
+    assert len(first) == 3
+    for left, right in zip(first, second):
+        assert pathlib.Path(left).read_bytes() == pathlib.Path(right).read_bytes()
+    assert dataset_files(str(tmp_path / "a")) == first
+
+    features, labels = load_features(str(tmp_path / "a"), chunksize=40)
+    assert features.shape == (250, 10)
+    assert features.dtype == np.float32
+    assert set(np.unique(labels)) <= {0, 1}
+
+
+def test_corpus_documents_parse_and_manifest_is_exact(tmp_path):
+    manifest = generate_corpus(
+        str(tmp_path),
+        num_files=24,
+        file_types=parse_file_type_mix("json=1,yaml=1,env=1,py=1"),
+        median_size=2048,
+        secrets_per_file=2.0,
+        workers=1,
+    )
+    for path in tmp_path.rglob("*.json"):
+        json.loads(path.read_text())
+    for path in tmp_path.rglob("*.yaml"):
+        list(yaml.safe_load_all(path.read_text()))
+
+    records = [json.loads(line) for line in open(manifest)]
+    assert records
+    for record in records:
+        found = {(f["line"], f["value"]) for f in scan_file(str(tmp_path / record["file"]))}
+        assert (record["line"], record["value"]) in found, record
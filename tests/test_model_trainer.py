@@ -0,0 +1,77 @@
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+import ml_collections
+import numpy as np
+import pytest
+
+from modules.model_trainer import ModelTrainer, average_metrics
+
+
+def test_cross_validate_returns_one_score_per_fold(tmp_path):
+    config = ml_collections.ConfigDict(
+        {
+            "seed": 0,
+            "model_name": "RandomForest",
+            "output_dir": str(tmp_path),
+            "target_metric": "f1_score",
+            "n_folds": 4,
+            "n_jobs": 2,
+        }
+    )
+    trainer = ModelTrainer(config=config, model_params={"n_estimators": 10})
+    assert trainer.fold_jobs == 2
+    assert trainer.model.model.n_jobs == 1
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 5))
+    y = (X[:, 0] > 0).astype(int)
+    fold_metrics = trainer.cross_validate(X.tolist(), y.tolist())
+
+    assert len(fold_metrics) == 4
+    averaged = average_metrics(fold_metrics)
+    assert set(averaged) == {"accuracy", "precision", "recall", "f1_score"}
+    assert averaged["f1_score"] == pytest.approx(np.mean([fold["f1_score"] for fold in fold_metrics]))
+    assert averaged["accuracy"] > 0.8
+
+
+@pytest.mark.parametrize(
+    "min_fraction, reduction_factor, expected",
+    [
+        (0.1, 3, [(1, 1 / 9), (3, 1 / 3), (9, 1)]),
+        (0.25, 2, [(1, 0.25), (2, 0.5), (4, 1)]),
+        (1.0, 3, [(1, 1)]),
+    ],
+)
+def test_fidelity_schedule_ends_on_full_data(min_fraction, reduction_factor, expected):
+    from modules.optuna_optimizer import fidelity_schedule
+
+    assert fidelity_schedule(min_fraction, reduction_factor) == pytest.approx(expected)
+
+
+def test_select_from_pareto_front_prefers_fast_trials_within_tolerance():
+    from types import SimpleNamespace
+
+    from modules.optuna_optimizer import select_from_pareto_front
+
+    front = [
+        SimpleNamespace(number=0, values=[0.100, 1_000.0]),
+        SimpleNamespace(number=1, values=[0.103, 20_000.0]),
+        SimpleNamespace(number=2, values=[0.200, 90_000.0]),
+    ]
+    assert select_from_pareto_front(front, 0.005).number == 1
+    assert select_from_pareto_front(front, 0.0).number == 0
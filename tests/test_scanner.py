@@ -0,0 +1,342 @@
+import os
+
+
+import sys
+import pathlib
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+sys.path.append(str(SECRETS_DETECTOR_ROOT))
+
+from modules.file_classifier import ARCHIVE, BYTES, SKIP, TEXT, classify_bytes
+from modules.metrics import ScanMetrics
+from modules.memo import LRUMemo
+from modules.scanner import scan_file, scan_paths
+import pytest
+
+
+AWS_KEY = "AKIA" + "ABCDEFGHIJKLMNOP"
+
+
+def test_scan_file_records_metrics(tmp_path):
+    target = tmp_path / "config.py"
+    target.write_text(f"x = 1\naws = '{AWS_KEY}'\n")
+
+    metrics = ScanMetrics()
+    findings = scan_file(str(target), metrics=metrics)
+
+    assert any(f["type"] == "aws_access_key" and f["line"] == 2 for f in findings)
+    report = metrics.to_dict()
+    assert report["files_scanned"] == 1
+    assert report["bytes_scanned"] == target.stat().st_size
+    assert report["secrets_found"] == len(findings)
+    assert report["findings_by_type"]["aws_access_key"] == 1
+    assert set(report["stage_seconds"]) == {"classify", "read", "decode", "regex", "entropy", "ml"}
+    assert report["file_latency_seconds"]["p99"] > 0
+
+
+def test_scan_file_score_runs_entropy_stage(tmp_path):
+    target = tmp_path / "config.py"
+    target.write_text(f"aws = '{AWS_KEY}'\n")
+
+    metrics = ScanMetrics()
+    findings = scan_file(str(target), metrics=metrics, score=True)
+
+    assert all("entropy" in f for f in findings)
+    assert metrics.stage_seconds["entropy"] > 0
+
+
+def test_metrics_merge_and_prometheus():
+    first, second = ScanMetrics(), ScanMetrics()
+    first.record_file(100, 0.5)
+    first.record_finding("github_token")
+    second.record_file(300, 1.5)
+    second.record_finding("github_token")
+
+    total = ScanMetrics().merge(first).merge(second)
+
+    assert total.files_scanned == 2
+    assert total.throughput()["bytes_per_second"] == pytest.approx(200.0)
+    text = total.to_prometheus()
+    assert 'secrets_detector_findings_total{type="github_token"} 2' in text
+    assert 'secrets_detector_file_latency_seconds{quantile="0.5"}' in text
+
+
+@pytest.mark.parametrize(
+    "sample, filename, route",
+    [
+        (b"\x89PNG\r\n\x1a\n" + b"\x00" * 16, "logo.png", SKIP),
+        (b"PK\x03\x04rest", "bundle.zip", ARCHIVE),
+        (b'{"lockfileVersion": 3}', "package-lock.json", SKIP),
+        (b"\x7fELF\x02\x01", "a.out", BYTES),
+        (b"abc\x00def", "data.db", BYTES),
+        (b"var a=1;" * 1024, "bundle.js", TEXT),
+        (b"x = 1\n" * 100, "app.py", TEXT),
+    ],
+)
+def test_classify_bytes_routes(sample, filename, route):
+    assert classify_bytes(sample, filename).route == route
+
+
+def test_scan_file_long_line_and_binary_routes(tmp_path):
+    minified = tmp_path / "bundle.min.js"
+    minified.write_text("var a=1;" * 20000 + f'var k="{AWS_KEY}";')
+    binary = tmp_path / "blob.bin"
+    binary.write_bytes(b"\x00\x01" * 100 + AWS_KEY.encode() + b"\x00" * 100)
+    image = tmp_path / "logo.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n" + AWS_KEY.encode())
+
+    metrics = ScanMetrics()
+    long_line_findings = scan_file(str(minified), metrics=metrics)
+    binary_findings = scan_file(str(binary), metrics=metrics)
+    image_findings = scan_file(str(image), metrics=metrics)
+
+    assert any(f["value"] == AWS_KEY for f in long_line_findings)
+    assert any(f["value"] == AWS_KEY for f in binary_findings)
+    assert image_findings == []
+    assert metrics.files_by_route == {TEXT: 1, BYTES: 1, SKIP: 1}
+
+
+def test_scan_file_long_line_seams_are_deduplicated(tmp_path, monkeypatch):
+    import io
+    from modules import chunker
+
+    windows = list(chunker.iter_line_windows(io.BytesIO(b"a" * 100 + b"\nb\n"), chunk_size=16, overlap=8))
+    assert [w.line for w in windows][-1] == 2
+    assert b"".join(w.data[: w.owned] for w in windows) == b"a" * 100 + b"\nb\n"
+
+    padding = "x;" * 40000
+    line = padding + f'k="{AWS_KEY}";' + padding + f'k="{AWS_KEY}";'
+    target = tmp_path / "bundle.min.js"
+    target.write_text("first line\n" + line + "\n")
+
+    findings = [f for f in scan_file(str(target)) if f["type"] == "aws_access_key"]
+
+    first_column = len(padding) + len('k="') + 1
+    assert [(f["line"], f["column"]) for f in findings] == [
+        (2, first_column),
+        (2, 2 * first_column + len(AWS_KEY) + 2 - 1),
+    ]
+
+
+@pytest.mark.parametrize("offset", [-30, -19, -10, -1, 0, 4])
+def test_scan_file_finds_secret_across_window_seam(tmp_path, offset):
+    from modules.chunker import CHUNK_SIZE
+
+    prefix = "é" + "." * (CHUNK_SIZE + offset - 2)
+    target = tmp_path / "bundle.min.js"
+    target.write_text(prefix + AWS_KEY + "." * CHUNK_SIZE)
+
+    findings = [f for f in scan_file(str(target)) if f["type"] == "aws_access_key"]
+
+    assert [(f["column"], f["value"]) for f in findings] == [(len(prefix.encode()) + 1, AWS_KEY)]
+
+
+def test_lru_memo_evicts_and_counts():
+    memo = LRUMemo(capacity=2)
+    memo.store("a", 1)
+    memo.store("b", 2)
+    assert memo.lookup("a") == 1
+    memo.store("c", 3)
+    assert memo.lookup("b") is None
+    assert memo.lookup("c") == 3
+    assert (memo.hits, memo.misses) == (2, 1)
+
+    memo.resize(0)
+    assert not memo.enabled and len(memo) == 0
+    memo.store("a", 1)
+    assert memo.lookup("a") is None
+
+
+def test_scan_paths_reports_memo_usage(tmp_path):
+    from modules.entropy import analyze_string
+
+    target = tmp_path / "config.py"
+    target.write_text(f"aws = '{AWS_KEY}'\n")
+    analyze_string(AWS_KEY)
+
+    metrics = ScanMetrics()
+    scan_paths([str(target)], metrics=metrics, score=True)
+
+    assert metrics.to_dict()["cache"]["analyze_string"]["hits"] >= 1
+    assert 'secrets_detector_cache_hits_total{cache="analyze_string"}' in metrics.to_prometheus()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_scan_paths_splits_large_file_preserving_lines(tmp_path, executor):
+    target = tmp_path / "huge.py"
+    lines = []
+    for i in range(400):
+        lines.append(f"aws_{i} = '{AWS_KEY}'" if i % 7 == 0 else f"# filler line {i} " + "x" * (i % 50))
+    target.write_text("\n".join(lines) + "\n")
+
+    expected = scan_file(str(target))
+    metrics = ScanMetrics()
+    parallel = scan_paths(
+        [str(target)], metrics=metrics, workers=2, executor=executor, range_bytes=1024
+    ).to_dicts()
+
+    assert parallel == expected
+    assert metrics.files_scanned == 1
+    assert metrics.bytes_scanned == target.stat().st_size
+    assert metrics.secrets_found == len(expected)
+
+
+def test_scan_file_reads_compressed_and_nested_archives(tmp_path):
+    import gzip
+    import io
+    import tarfile
+    import zipfile
+
+    env = f"\n\nAWS_KEY={AWS_KEY}\n".encode()
+    bundle = tmp_path / "bundle.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tar:
+        info = tarfile.TarInfo("config/.env")
+        info.size = len(env)
+        tar.addfile(info, io.BytesIO(env))
+
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as archive:
+        archive.writestr(".env", env)
+    outer = tmp_path / "outer.zip"
+    with zipfile.ZipFile(outer, "w") as archive:
+        archive.writestr("logs/app.log.gz", gzip.compress(env))
+        archive.writestr("inner.zip", inner.getvalue())
+
+    metrics = ScanMetrics()
+    bundle_findings = scan_file(str(bundle), metrics=metrics)
+    outer_findings = scan_file(str(outer), metrics=metrics)
+
+    assert {(f["file"], f["line"]) for f in bundle_findings if f["value"] == AWS_KEY} == {
+        (f"{bundle}!/config/.env", 3)
+    }
+    assert {f["file"] for f in outer_findings if f["value"] == AWS_KEY} == {
+        f"{outer}!/logs/app.log.gz!/app.log",
+        f"{outer}!/inner.zip!/.env",
+    }
+    assert metrics.files_by_route == {ARCHIVE: 2}
+    assert metrics.bytes_scanned == 3 * len(env)
+
+
+def test_zip_inside_a_stream_is_spooled_and_budget_cuts_are_recorded(tmp_path, monkeypatch):
+    import io
+    import tarfile
+    import zipfile
+
+    import modules.scanner
+    from modules.archives import ExpansionBudget
+
+    env = f"\n\nAWS_KEY={AWS_KEY}\n".encode()
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as archive:
+        archive.writestr(".env", env)
+    bundle = tmp_path / "release.tar.gz"
+    with tarfile.open(bundle, "w:gz") as tar:
+        info = tarfile.TarInfo("dist/config.zip")
+        info.size = len(inner.getvalue())
+        tar.addfile(info, io.BytesIO(inner.getvalue()))
+
+    metrics = ScanMetrics()
+    findings = scan_file(str(bundle), metrics=metrics)
+    assert {(f["file"], f["line"]) for f in findings if f["value"] == AWS_KEY} == {
+        (f"{bundle}!/dist/config.zip!/.env", 3)
+    }
+    assert dict(metrics.truncated_scans) == {}
+
+    # A budget that runs out mid-archive leaves the scan partial, and says so.
+    monkeypatch.setattr(modules.scanner, "ExpansionBudget", lambda: ExpansionBudget(64))
+    metrics = ScanMetrics()
+    assert scan_file(str(bundle), metrics=metrics) == []
+    assert metrics.truncated_scans == {"bytes": 1}
+
+
+def test_key_names_report_and_shortcut_config_values(tmp_path, monkeypatch):
+    import modules.entropy
+    from modules.structured import BENIGN, SENSITIVE, key_signal
+
+    assert key_signal("AWS_SECRET_ACCESS_KEY") == SENSITIVE
+    assert key_signal("database.password") == SENSITIVE
+    assert key_signal("SECRET_KEY_PATH") == BENIGN
+    assert key_signal("servers[0].homepageUrl") == BENIGN
+    assert key_signal("payload") is None
+
+    env = tmp_path / ".env"
+    env.write_text(
+        'export DB_PASSWORD="hunter2horse99"\n'
+        "APP_NAME=my-fancy-application-name-here\n"
+        "API_TOKEN=changeme\n"
+        "PAYLOAD=abcdefghijklmnopqrstuvwxyz\n"
+        "DB_PASSWORD=${DATABASE_PASSWORD_FROM_VAULT}\n"
+    )
+    scored = []
+    real_verdicts = modules.entropy.verdict_strings
+    monkeypatch.setattr(
+        modules.entropy, "verdict_strings", lambda texts: scored.extend(texts) or real_verdicts(texts)
+    )
+
+    findings = {(f["line"], f["type"]): f for f in scan_file(str(env), score=True)}
+
+    assert findings[(1, "sensitive_key")]["value"] == "hunter2horse99"
+    assert findings[(1, "sensitive_key")]["heuristic_is_secret"] is True
+    assert findings[(2, "generic_key")]["heuristic_is_secret"] is False
+    assert "entropy" not in findings[(2, "generic_key")]
+    assert not any(line == 3 for line, _ in findings)
+    # A placeholder under a sensitive key is scored like any match, not confirmed by its key.
+    assert (5, "sensitive_key") not in findings
+    assert findings[(5, "generic_key")]["heuristic_is_secret"] is False
+    assert "entropy" in findings[(5, "generic_key")]
+    assert scored == ["abcdefghijklmnopqrstuvwxyz", "DATABASE_PASSWORD_FROM_VAULT"]
+
+    config = tmp_path / "service.json"
+    config.write_text('{"client_secret": "s3cr3tvalue!!", "homepage_url": "https_example_com_long_path_xx"}')
+    findings = {f["type"]: f for f in scan_file(str(config), score=True)}
+    assert findings["sensitive_key"]["heuristic_is_secret"] is True
+    assert findings["generic_key"]["heuristic_is_secret"] is False
+
+
+def test_baseline_suppresses_before_scoring(tmp_path, monkeypatch):
+    import modules.entropy
+    from modules.baseline import Baseline
+    from modules.findings import value_digest
+
+    other_key = "AKIA" + "QRSTUVWXYZ234567"
+    repo = tmp_path / "repo"
+    (repo / "fixtures").mkdir(parents=True)
+    (repo / "fixtures" / "keys.py").write_text(f"aws = '{other_key}'\n")
+    (repo / "app.py").write_text(f"aws = '{AWS_KEY}'\nother = '{other_key}'\n")
+    (repo / "lib.py").write_text(f"aws = '{AWS_KEY}'\n")
+
+    baseline_path = tmp_path / "baseline.json"
+    Baseline(paths=["fixtures/*"], findings=[(value_digest(AWS_KEY), ["app.py"])]).save(baseline_path)
+    baseline = Baseline.load(baseline_path)
+    assert "AKIA" not in baseline_path.read_text()
+
+    scored = []
+    real_verdicts = modules.entropy.verdict_strings
+    monkeypatch.setattr(
+        modules.entropy, "verdict_strings", lambda texts: scored.extend(texts) or real_verdicts(texts)
+    )
+    metrics = ScanMetrics()
+    findings = scan_paths([str(repo)], metrics=metrics, score=True, baseline=baseline).to_dicts()
+
+    assert {(os.path.basename(f["file"]), f["value"]) for f in findings} == {
+        ("app.py", other_key),
+        ("lib.py", AWS_KEY),
+    }
+    assert metrics.findings_suppressed == 2  # aws_access_key and generic_key in app.py
+    assert metrics.files_by_route[SKIP] == 1
+
+    scored.clear()
+    scan_file(str(repo / "app.py"), score=True, baseline=baseline)
+    assert scored == [other_key]
+
+    baseline.accept(value_digest(other_key))
+    baseline.write_table(scan_paths([str(repo / "lib.py")]))
+    assert scan_paths([str(repo)], baseline=Baseline.from_dict(baseline.to_dict())).to_dicts() == []
@@ -0,0 +1,68 @@
+import os
+
+
+import sys
+import pathlib
+import subprocess
+
+import dotenv
+
+dotenv.load_dotenv(pathlib.Path(__file__).parent.parent / ".env")
+
+
+SECRETS_DETECTOR_ROOT = os.getenv(
+    "SECRETS_DETECTOR_ROOT", default=pathlib.Path(__file__).parent.parent
+)
+
+import pytest
+
+HEAVY_MODULES = {
+    "dotenv",
+    "numpy",
+    "pandas",
+    "sklearn",
+    "xgboost",
+    "mlflow",
+    "seaborn",
+    "matplotlib",
+    "optuna",
+    "joblib",
+    "ml_collections",
+}
+
+SCAN_IMPORT_BUDGET_SECONDS = 0.25
+
+
+def import_profile(module: str) -> dict:
+    """Cumulative import time in seconds per top-level package, from `python -X importtime`."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(SECRETS_DETECTOR_ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        profile[name.strip()] = int(cumulative) / 1e6
+    return profile
+
+
+def test_scan_entry_point_imports_stay_slim():
+    profile = import_profile("scan")
+
+    assert HEAVY_MODULES.isdisjoint(name.split(".")[0] for name in profile)
+    assert profile["scan"] < SCAN_IMPORT_BUDGET_SECONDS
+
+
+def test_training_model_module_defers_tracking_imports():
+    profile = import_profile("modules.machine_learning_model")
+
+    assert {"mlflow", "seaborn", "matplotlib", "sklearn"}.isdisjoint(
+        name.split(".")[0] for name in profile
+    )